@@ -0,0 +1,226 @@
+"""
+בניית פונטים בכמות, בלי השרת: גיליון כתב יד אחד → פונט אחד, לכל הגיליונות בתיקייה או ברשימה.
+
+שימוש:
+    python batch_cli.py <תיקיית גיליונות | manifest.csv> <תיקיית פלט>
+                        [--workers 4] [--glyph-set hebrew] [--profile final] [--flavor woff2]
+                        [--journal journal.jsonl] [--report report.json]
+
+manifest.csv – עמודות sheet (נתיב יחסי לקובץ הרשימה) ו-name (שם קובץ הפונט, לא חובה).
+כל גיליון שהסתיים נרשם מיד ביומן (JSONL); הרצה חוזרת עם אותו יומן מדלגת על גיליונות שכבר
+נבנו ולא השתנו מאז, ומנסה שוב את אלה שנכשלו. בסוף נכתב דו"ח עם זמנים לכל פונט.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from ingest import decode_upload
+from glyph_pipeline import GLYPH_WORKERS, split_sheet, process_glyphs_batch
+from generate_font import BUILD_PROFILES, compile_fonts
+from glyph_sets import glyph_set
+
+SHEET_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp")
+
+
+def _signature(path):
+    """גודל וזמן שינוי – מספיק כדי לזהות שגיליון הוחלף, בלי לקרוא אותו."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def plan_jobs(source):
+    """תיקייה או manifest.csv → רשימת (שם, נתיב גיליון); שמות כפולים הם שגיאה."""
+    if os.path.isdir(source):
+        jobs = [(os.path.splitext(fname)[0], os.path.join(source, fname))
+                for fname in sorted(os.listdir(source))
+                if fname.lower().endswith(SHEET_EXTENSIONS)]
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, newline="", encoding="utf-8") as fh:
+            jobs = [((row.get("name") or "").strip() or os.path.splitext(os.path.basename(row["sheet"]))[0],
+                     os.path.join(base, row["sheet"].strip()))
+                    for row in csv.DictReader(fh) if (row.get("sheet") or "").strip()]
+
+    seen = set()
+    for name, _ in jobs:
+        if name in seen:
+            raise ValueError(f"Duplicate font name in batch: {name}")
+        seen.add(name)
+    return jobs
+
+
+def read_journal(path):
+    """היומן → {שם: הרשומה האחרונה}; שורה חתוכה (הפסקה באמצע כתיבה) מדולגת."""
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry["name"]] = entry
+    return entries
+
+
+def _is_done(entry, sheet, output_dir):
+    return (entry is not None and entry.get("status") == "ok" and os.path.exists(sheet)
+            and entry.get("signature") == _signature(sheet)
+            and os.path.exists(os.path.join(output_dir, entry["font"])))
+
+
+def _init_worker():
+    # כל תהליך בונה פונט אחד בכל רגע – המקביליות היא בין הגיליונות, לא בתוך OpenCV
+    cv2.setNumThreads(1)
+
+
+def build_sheet(name, sheet, output_dir, glyph_set_spec, profile, flavor):
+    """
+    כל הצינור לגיליון אחד, בתוך תהליך העבודה: פענוח → חיתוך → מעקב → קומפילציה → כתיבה.
+    מחזיר רשומת יומן; שגיאה מוחזרת ברשומה ולא נזרקת, כדי שגיליון אחד לא יעצור את השאר.
+    """
+    timings = {}
+    start = last = time.perf_counter()
+
+    def lap(stage_name):
+        nonlocal last
+        now = time.perf_counter()
+        timings[stage_name] = round(now - last, 3)
+        last = now
+
+    entry = {"name": name, "sheet": sheet}
+    try:
+        entry["signature"] = _signature(sheet)
+        names = list(glyph_set(glyph_set_spec).names)
+        with open(sheet, "rb") as fh:
+            gray = decode_upload(fh.read(), grayscale=True)
+        lap("decode")
+
+        pieces = split_sheet(gray, names)
+        lap("split")
+
+        results = process_glyphs_batch([(n, data) for n, _, data in pieces if data], max_workers=1)
+        outlines = {r.name: r.outline for r in results if r.outline}
+        if not outlines:
+            raise ValueError("No glyphs found on the sheet")
+        lap("trace")
+
+        data = compile_fonts({"Regular": outlines}, profile, flavor, max_workers=1)["Regular"]
+        lap("compile")
+
+        font = f"{name}.{flavor or 'ttf'}"
+        tmp_path = os.path.join(output_dir, f".{font}.tmp")
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, os.path.join(output_dir, font))
+        lap("write")
+
+        entry.update(status="ok", font=font, bytes=len(data), glyphs=len(outlines),
+                     missing=[n for n in names if n not in outlines])
+    except Exception as e:
+        entry.update(status="error", error=str(e) or type(e).__name__)
+    entry.update(seconds=round(time.perf_counter() - start, 3), stages=timings)
+    return entry
+
+
+def summarize(entries, wall, built):
+    """
+    דו"ח מסכם: ספירות, אחוזוני זמן לפונט וממוצע לכל שלב.
+    built – הפונטים שנבנו בהרצה הזאת (בלי מה שדולג לפי היומן), בשביל קצב הבנייה.
+    """
+    ok = [e for e in entries if e["status"] == "ok"]
+    seconds = np.array([e["seconds"] for e in ok]) if ok else np.zeros(1)
+    stages = {}
+    for e in ok:
+        for stage_name, value in e["stages"].items():
+            stages.setdefault(stage_name, []).append(value)
+    return {
+        "fonts_ok": len(ok),
+        "fonts_failed": len(entries) - len(ok),
+        "fonts_built": built,
+        "wall_seconds": round(wall, 3),
+        "fonts_per_hour": round(built / wall * 3600, 1) if wall > 0 else None,
+        "font_seconds_p50": round(float(np.percentile(seconds, 50)), 3),
+        "font_seconds_p95": round(float(np.percentile(seconds, 95)), 3),
+        "stage_seconds_mean": {k: round(float(np.mean(v)), 3) for k, v in stages.items()},
+        "failed": {e["name"]: e["error"] for e in entries if e["status"] != "ok"},
+        "fonts": entries,
+    }
+
+
+def run_batch(source, output_dir, workers=None, glyph_set_spec="hebrew", profile="final",
+              flavor=None, journal=None, report=None):
+    os.makedirs(output_dir, exist_ok=True)
+    journal = journal or os.path.join(output_dir, "journal.jsonl")
+    report = report or os.path.join(output_dir, "report.json")
+    glyph_set(glyph_set_spec)  # שם קבוצה שגוי נכשל כאן, לא בכל גיליון בנפרד
+
+    jobs = plan_jobs(source)
+    previous = read_journal(journal)
+    done = {name: previous[name] for name, sheet in jobs if _is_done(previous.get(name), sheet, output_dir)}
+    pending = [(name, sheet) for name, sheet in jobs if name not in done]
+    print(f"📋 {len(jobs)} גיליונות: {len(done)} כבר נבנו, {len(pending)} לבנייה")
+
+    entries = dict(done)
+    workers = max(1, min(workers or GLYPH_WORKERS, len(pending) or 1))
+    start = time.perf_counter()
+    with open(journal, "a", encoding="utf-8") as log, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(build_sheet, name, sheet, output_dir, glyph_set_spec, profile, flavor)
+                   for name, sheet in pending]
+        try:
+            for i, future in enumerate(as_completed(futures), 1):
+                entry = future.result()
+                entries[entry["name"]] = entry
+                log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                log.flush()
+                os.fsync(log.fileno())
+                if entry["status"] == "ok":
+                    print(f"✅ [{i}/{len(pending)}] {entry['font']} – {entry['glyphs']} אותיות, {entry['seconds']}s")
+                else:
+                    print(f"❌ [{i}/{len(pending)}] {entry['name']}: {entry['error']}")
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            print(f"⏸️ הופסק – {journal} שומר את מה שהסתיים, הרצה חוזרת תמשיך משם")
+            raise
+
+    built = sum(1 for name, _ in pending if entries.get(name, {}).get("status") == "ok")
+    summary = summarize([entries[name] for name, _ in jobs if name in entries], time.perf_counter() - start, built)
+    with open(report, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, ensure_ascii=False, indent=2)
+    print(f"📦 {summary['fonts_ok']} פונטים, {summary['fonts_failed']} נכשלו; "
+          f"p50 {summary['font_seconds_p50']}s לפונט, {summary['fonts_per_hour']} פונטים לשעה → {report}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="בניית פונט לכל גיליון כתב יד בתיקייה או ברשימה")
+    parser.add_argument("source", help="תיקיית גיליונות או manifest.csv")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None, help="מספר תהליכים (ברירת מחדל: GLYPH_WORKERS)")
+    parser.add_argument("--glyph-set", default="hebrew", help='קבוצת האותיות בגיליון, למשל "hebrew+digits"')
+    parser.add_argument("--profile", default="final", choices=BUILD_PROFILES)
+    parser.add_argument("--flavor", default=None, choices=("woff", "woff2"), help="ברירת מחדל: TTF")
+    parser.add_argument("--journal", help="יומן ההתקדמות (ברירת מחדל: <output_dir>/journal.jsonl)")
+    parser.add_argument("--report", help="הדו\"ח המסכם (ברירת מחדל: <output_dir>/report.json)")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_batch(args.source, args.output_dir, args.workers, args.glyph_set,
+                            args.profile, args.flavor, args.journal, args.report)
+    except KeyboardInterrupt:
+        return 130
+    return 1 if summary["fonts_failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+מדידת ביצועים של כל הצינור על קורפוס סינתטי של כתב יד (בלי קבצים חיצוניים).
+
+שימוש:
+    python benchmark.py [--sizes 1200,3000] [--noise 0,20] [--repeat 3]
+                        [--save results.json] [--baseline results.json] [--tolerance 0.2]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import platform
+
+import cv2
+import numpy as np
+
+from bw_converter import binarize_array
+from split_letters import locate_letters
+from tracer import write_potrace_svg
+from glyph_pipeline import bitmap_to_outline
+from resolution import trace_factor
+from simplify import simplify_outline
+from svg_reader import read_svg_outline
+from generate_font import new_font, add_glyph
+from glyph_sets import HEBREW
+from glyph_metrics import metrics_for
+from ufo2ft import compileTTF
+
+GRID_COLS = 7
+GRID_ROWS = 4
+
+
+# ===== קורפוס סינתטי =====
+def _random_stroke(rng, box):
+    """קו "כתב יד": הליכה אקראית חלקה בתוך התיבה."""
+    x0, y0, w, h = box
+    n = rng.integers(4, 9)
+    pts = np.cumsum(rng.normal(0, 1, (n, 2)), axis=0)
+    pts -= pts.min(axis=0)
+    pts /= np.maximum(pts.max(axis=0), 1e-6)
+    pts = pts * [w * 0.8, h * 0.8] + [x0 + w * 0.1, y0 + h * 0.1]
+    t = np.linspace(0, 1, 40)[:, None]
+    curve = [pts[0]]
+    for a, b in zip(pts[:-1], pts[1:]):
+        curve.extend(a + (b - a) * t)
+    return np.array(curve, dtype=np.int32).reshape(-1, 1, 2)
+
+
+def synthetic_glyph(rng, size=200, thickness=None):
+    img = np.full((size, size), 255, np.uint8)
+    thickness = thickness or max(2, size // 25)
+    for _ in range(rng.integers(1, 4)):
+        cv2.polylines(img, [_random_stroke(rng, (0, 0, size, size))], False, 0, thickness, cv2.LINE_AA)
+    return img
+
+
+def synthetic_sheet(rng, width, noise=0):
+    """גיליון של 27 אותיות ברשת 7x4, עם רעש גאוסי ותאורה לא אחידה אופציונליים."""
+    height = int(width * 1.3)
+    sheet = np.full((height, width), 255, np.uint8)
+    cell_w, cell_h = width // GRID_COLS, height // GRID_ROWS
+    for i in range(len(HEBREW)):
+        r, c = divmod(i, GRID_COLS)
+        size = int(min(cell_w, cell_h) * 0.6)
+        glyph = synthetic_glyph(rng, size)
+        x = (GRID_COLS - 1 - c) * cell_w + (cell_w - size) // 2
+        y = r * cell_h + (cell_h - size) // 2
+        sheet[y:y + size, x:x + size] = np.minimum(sheet[y:y + size, x:x + size], glyph)
+    if noise:
+        shade = np.linspace(0, noise, width, dtype=np.float32)[None, :]
+        grain = rng.normal(0, noise / 2.0, sheet.shape).astype(np.float32)
+        sheet = np.clip(sheet.astype(np.float32) - shade + grain, 0, 255).astype(np.uint8)
+    return sheet
+
+
+# ===== מדידה =====
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def run(self, stage, fn, *args, items=1, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        self.samples.setdefault(stage, []).append((elapsed, items))
+        return result
+
+    def summary(self):
+        report = {}
+        for stage, samples in self.samples.items():
+            times = np.array([t for t, _ in samples])
+            items = sum(n for _, n in samples)
+            report[stage] = {
+                "runs": len(samples),
+                "p50_ms": round(float(np.percentile(times, 50)) * 1000, 3),
+                "p95_ms": round(float(np.percentile(times, 95)) * 1000, 3),
+                "throughput_per_s": round(items / float(times.sum()), 2) if times.sum() else None,
+            }
+        return report
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ב-Linux היחידה היא KB, ב-macOS בתים
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(timer, rng, width, noise, workdir):
+    names = list(HEBREW.names)
+    sheet = synthetic_sheet(rng, width, noise)
+    ok, encoded = cv2.imencode(".png", sheet)
+    if not ok:
+        raise ValueError("Cannot encode synthetic sheet")
+    encoded = encoded.tobytes()
+
+    gray = timer.run("decode", cv2.imdecode, np.frombuffer(encoded, np.uint8), cv2.IMREAD_GRAYSCALE)
+    timer.run("threshold", binarize_array, gray)
+    boxes = timer.run("segment", locate_letters, gray, len(names))
+
+    outlines = {}
+    for name, (x, y, w, h) in zip(names, boxes):
+        crop = gray[y:y + h, x:x + w]
+        if crop.size == 0:
+            continue
+        bw = binarize_array(crop)
+        outline = timer.run("trace", bitmap_to_outline, bw, factor=trace_factor(bw.shape))
+        outline = timer.run("simplify", simplify_outline, outline)
+        svg_path = os.path.join(workdir, f"{name}.svg")
+        write_potrace_svg(outline, bw.shape[1], bw.shape[0], svg_path)
+        outlines[name] = timer.run("outline_parse", read_svg_outline, svg_path)[0]
+
+    metrics = timer.run("metrics", metrics_for, outlines)
+    font = new_font()
+    for name, outline in outlines.items():
+        add_glyph(font, name, outline, metrics[name])
+    ttf = timer.run("compileTTF", compileTTF, font, items=len(outlines))
+    timer.run("save", ttf.save, os.path.join(workdir, "bench.ttf"))
+
+
+def compare(current, baseline, tolerance):
+    """מחזיר רשימת שלבים שה-p50 שלהם איטי מה-baseline ביותר מ-tolerance."""
+    regressions = []
+    for stage, stats in current.items():
+        base = baseline.get(stage)
+        if not base or not base.get("p50_ms"):
+            continue
+        ratio = stats["p50_ms"] / base["p50_ms"]
+        marker = "❌" if ratio > 1 + tolerance else "✅"
+        print(f"{marker} {stage:14s} {base['p50_ms']:>10.3f}ms → {stats['p50_ms']:>10.3f}ms ({ratio:.2f}x)")
+        if ratio > 1 + tolerance:
+            regressions.append(stage)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="מדידת ביצועים של צינור יצירת הפונט")
+    parser.add_argument("--sizes", default="1200,3000", help="רוחב הגיליון בפיקסלים, מופרד בפסיקים")
+    parser.add_argument("--noise", default="0,20", help="רמות רעש/הצללה, מופרדות בפסיקים")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save", help="שמירת התוצאות כ-JSON")
+    parser.add_argument("--baseline", help="JSON קודם להשוואה")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="האטה מותרת מול ה-baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    timer = StageTimer()
+    cases = [(int(s), float(n)) for s in args.sizes.split(",") for n in args.noise.split(",")]
+
+    total_start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as workdir:
+        for width, noise in cases:
+            for _ in range(args.repeat):
+                run_case(timer, rng, width, noise, workdir)
+    total = time.perf_counter() - total_start
+
+    fonts = len(cases) * args.repeat
+    results = {
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "cases": [{"width": w, "noise": n} for w, n in cases],
+        "repeat": args.repeat,
+        "fonts_per_s": round(fonts / total, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": timer.summary(),
+    }
+
+    for stage, stats in results["stages"].items():
+        print(f"⏱️ {stage:14s} p50 {stats['p50_ms']:>10.3f}ms  p95 {stats['p95_ms']:>10.3f}ms  "
+              f"{stats['throughput_per_s']}/s")
+    print(f"📦 {results['fonts_per_s']} פונטים לשנייה, שיא זיכרון {results['peak_rss_mb']}MB")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results["stages"], baseline.get("stages", {}), args.tolerance)
+        if regressions:
+            print(f"❌ האטה בשלבים: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import os
+
+import cv2
+import numpy as np
+
+from instrumentation import stage
+
+# ===== הגדרות סף =====
+# auto – בחירה לפי סטטיסטיקת התמונה; otsu / sauvola / niblack / clahe – שיטה קבועה
+BINARIZE_METHOD = os.environ.get("BINARIZE_METHOD", "auto")
+# תמונות גדולות מזה (בצלע הארוכה) מחושבות על עותק מוקטן; משטח הסף מוגדל חזרה
+PROXY_MAX_SIDE = int(os.environ.get("BINARIZE_PROXY_SIDE", "1024"))
+
+METHODS = ("auto", "otsu", "sauvola", "niblack", "clahe")
+
+SAUVOLA_K = 0.3           # רגישות Sauvola (גבוה יותר → פחות דיו)
+SAUVOLA_R = 128.0         # טווח סטיית התקן הדינמי בתמונת 8 ביט
+NIBLACK_K = -0.2
+MIN_WINDOW = 15           # חלון מקומי מינימלי בפיקסלים (של העותק המוקטן)
+CLAHE_CLIP = 2.0
+CLAHE_TILES = 8
+
+# ===== ספים לבחירה האוטומטית =====
+STATS_TILES = 8           # רשת האריחים למדידת אחידות התאורה
+UNEVEN_LIGHTING = 0.12    # פיזור בהירות הנייר בין האריחים (יחסית לממוצע) שמעליו Otsu נכשל
+LOW_CONTRAST = 80         # טווח p1..p99 שמתחתיו מפעילים CLAHE לפני הסף
+
+
+def _odd(n):
+    n = int(n)
+    return n if n % 2 else n + 1
+
+
+def default_window(shape):
+    """חלון מקומי לפי גודל התמונה: בערך שמינית מהצלע הקצרה, לא פחות מ-MIN_WINDOW."""
+    return _odd(max(MIN_WINDOW, min(shape[:2]) // 8))
+
+
+def local_mean_std(gray, window):
+    """
+    ממוצע וסטיית תקן מקומיים בחלון window×window לכל פיקסל, מתוך תמונות אינטגרליות
+    (סכום וסכום ריבועים) – O(1) לפיקסל בלי תלות בגודל החלון.
+    """
+    r = window // 2
+    padded = cv2.copyMakeBorder(gray, r, r + 1, r, r + 1, cv2.BORDER_REFLECT)
+    s, sq = cv2.integral2(padded, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+    h, w = gray.shape
+    area = float(window * window)
+
+    def box(integral):
+        return (integral[window:window + h, window:window + w] - integral[:h, window:window + w]
+                - integral[window:window + h, :w] + integral[:h, :w])
+
+    mean = box(s) / area
+    var = box(sq) / area - mean * mean
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def sauvola_threshold(gray, window, k=SAUVOLA_K, r=SAUVOLA_R):
+    """T = m · (1 + k · (s/R − 1)) – סף שמתאים את עצמו לצללים ולרקע לא אחיד."""
+    mean, std = local_mean_std(gray, window)
+    return mean * (1.0 + k * (std / r - 1.0))
+
+
+def niblack_threshold(gray, window, k=NIBLACK_K):
+    """T = m + k · s – רגיש יותר לקווים דקים, אבל מוסיף רעש באזורים ריקים."""
+    mean, std = local_mean_std(gray, window)
+    return mean + k * std
+
+
+def apply_clahe(gray, clip=CLAHE_CLIP, tiles=CLAHE_TILES):
+    """השוואת היסטוגרמה מקומית (CLAHE) – מותחת ניגודיות בצילום חלש או דהוי."""
+    return cv2.createCLAHE(clipLimit=clip, tileGridSize=(tiles, tiles)).apply(gray)
+
+
+def _proxy(gray, max_side=PROXY_MAX_SIDE):
+    """
+    עותק מוקטן לתמונות גדולות, או התמונה עצמה. ההקטנה היא בפקטור שלם,
+    שבו INTER_AREA הוא ממוצע בלוקים פשוט ומהיר בהרבה מפקטור שבור.
+    """
+    factor = -(-max(gray.shape) // max_side)
+    if factor <= 1:
+        return gray
+    return cv2.resize(gray, (gray.shape[1] // factor, gray.shape[0] // factor), interpolation=cv2.INTER_AREA)
+
+
+def image_stats(gray):
+    """
+    סטטיסטיקה זולה לבחירת שיטה: טווח הבהירות (p1..p99), והפיזור של בהירות הנייר
+    (אחוזון 90 בכל אריח ברשת STATS_TILES×STATS_TILES) ביחס לממוצע שלה.
+    """
+    cumulative = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel().cumsum()
+    p1, p99 = np.searchsorted(cumulative, cumulative[-1] * np.array([0.01, 0.99]))
+
+    tiles = min(STATS_TILES, *gray.shape)
+    th, tw = gray.shape[0] // tiles, gray.shape[1] // tiles
+    grid = gray[:th * tiles, :tw * tiles].reshape(tiles, th, tiles, tw).transpose(0, 2, 1, 3)
+    grid = grid.reshape(tiles, tiles, -1)
+    k = int(grid.shape[2] * 0.9)
+    paper = np.partition(grid, k, axis=2)[:, :, k].astype(np.float64)
+    unevenness = float((paper.max() - paper.min()) / max(paper.mean(), 1.0))
+    return {"contrast": float(p99 - p1), "unevenness": unevenness}
+
+
+def choose_method(gray):
+    """
+    מסלול מהיר: Otsu גלובלי כשהתאורה אחידה (סריקה), Sauvola כשיש צללים,
+    ו-CLAHE לפני Sauvola כשהניגודיות נמוכה.
+    """
+    stats = image_stats(gray)
+    if stats["contrast"] < LOW_CONTRAST:
+        return "clahe"
+    if stats["unevenness"] > UNEVEN_LIGHTING:
+        return "sauvola"
+    return "otsu"
+
+
+def threshold_surface(gray, method, window=None):
+    """משטח סף לכל פיקסל (float) עבור השיטות המקומיות."""
+    window = window or default_window(gray.shape)
+    if method == "sauvola":
+        return sauvola_threshold(gray, window)
+    if method == "niblack":
+        return niblack_threshold(gray, window)
+    raise ValueError(f"Unknown binarization method: {method}")
+
+
+def binarize(gray, method=None, invert=False, window=None):
+    """
+    מערך אפור → שחור-לבן (0/255) עם רקע לבן, או דיו לבן על שחור כש-invert=True.
+    השיטה והמשטח המקומי מחושבים על עותק מוקטן של תמונות גדולות; רק ההשוואה
+    הסופית רצה ברזולוציה המלאה. מחזיר (bw, שם השיטה שנבחרה).
+    """
+    method = method or BINARIZE_METHOD
+    if method not in METHODS:
+        raise ValueError(f"Unknown binarization method: {method}")
+
+    with stage("binarize", bytes_in=gray.size) as rec:
+        proxy = _proxy(gray)
+        if method == "auto":
+            method = choose_method(proxy)
+
+        if method == "otsu":
+            _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        else:
+            local = method
+            if method == "clahe":
+                # CLAHE משנה את הבהירות עצמה, ולכן משווים מול התמונה המשופרת ולא המקורית
+                gray = apply_clahe(gray)
+                proxy = _proxy(gray)
+                local = "sauvola"
+            surface = threshold_surface(proxy, local, window).astype(np.float32)
+            if proxy is not gray:
+                surface = cv2.resize(surface, (gray.shape[1], gray.shape[0]), interpolation=cv2.INTER_LINEAR)
+            bw = (gray > surface).astype(np.uint8) * 255
+
+        # רוב התמונה היא רקע – אם יצא יותר שחור מלבן, הקוטביות הפוכה
+        if cv2.countNonZero(bw) * 2 < bw.size:
+            bw = cv2.bitwise_not(bw)
+        if invert:
+            bw = cv2.bitwise_not(bw)
+        rec.bytes_out = bw.size
+    return bw, method
@@ -1,23 +1,29 @@
 import os
 import sys
 import cv2
-import numpy as np
+from instrumentation import stage
+from binarize import binarize
 
-def convert_image_to_bw(input_path, output_path):
-    gray = cv2.imread(input_path, cv2.IMREAD_GRAYSCALE)
-    if gray is None:
-        print(f"❌ לא ניתן לטעון את התמונה: {input_path}")
-        return False
+def binarize_array(gray, method=None):
+    """
+    סף על מערך אפור בזיכרון; מחזיר תמונה שחור-לבן עם רקע לבן.
+    ברירת המחדל (BINARIZE_METHOD=auto) בוחרת בין Otsu לסף מקומי לפי התאורה – ראו binarize.
+    """
+    return binarize(gray, method)[0]
 
-    _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+def convert_image_to_bw(input_path, output_path):
+    with stage("bw_convert") as rec:
+        gray = cv2.imread(input_path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            print(f"❌ לא ניתן לטעון את התמונה: {input_path}")
+            return False
+        rec.bytes_in = os.path.getsize(input_path)
 
-    white_bg = np.sum(bw == 255)
-    black_fg = np.sum(bw == 0)
-    if black_fg > white_bg:
-        bw = cv2.bitwise_not(bw)
+        bw = binarize_array(gray)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    cv2.imwrite(output_path, bw)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        cv2.imwrite(output_path, bw)
+        rec.bytes_out = os.path.getsize(output_path)
     print(f"✅ {input_path} → {output_path}")
     return True
 
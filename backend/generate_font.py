@@ -1,115 +1,182 @@
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
 from defcon import Font
 from ufo2ft import compileTTF
-from fontTools.svgLib.path import parse_path
 from fontTools.pens.transformPen import TransformPen
-from fontTools.misc.transform import Identity
-from xml.dom import minidom
+from fontTools.pens.recordingPen import replayRecording
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.misc.roundTools import otRound
+from fontTools import subset
+from instrumentation import stage
+from simplify import optimize_outline
+from tracer import count_points
+from svg_reader import read_svg_folder
+from glyph_sets import CODEPOINTS
+from glyph_metrics import X_HEIGHT, glyph_transform, metrics_for, outline_bounds, compute_metrics, estimate_x_height
 
 # ===== מיפוי אותיות =====
-letter_map = {
-    "alef": 0x05D0, "bet": 0x05D1, "gimel": 0x05D2, "dalet": 0x05D3, "he": 0x05D4,
-    "vav": 0x05D5, "zayin": 0x05D6, "het": 0x05D7, "tet": 0x05D8, "yod": 0x05D9,
-    "kaf": 0x05DB, "lamed": 0x05DC, "mem": 0x05DE, "nun": 0x05E0, "samekh": 0x05E1,
-    "ayin": 0x05E2, "pe": 0x05E4, "tsadi": 0x05E6, "qof": 0x05E7, "resh": 0x05E8,
-    "shin": 0x05E9, "tav": 0x05EA,
-    "finalkaf": 0x05DA, "finalmem": 0x05DD, "finalnun": 0x05DF, "finalpe": 0x05E3, "finaltsadi": 0x05E5
-}
-
-# ===== הזזות אנכיות =====
-vertical_offsets = {"yod": 370, "qof": -250}
-
-# ===== הגדרות כלליות =====
-GLOBAL_Y_SHIFT = 0
-PADDING_GENERAL = 12
-PADDING_LARGE = 15
-GLOBAL_SCALE = 1.0
-# ===== טרנספורמציות מיוחדות =====
-special_transforms = {}
+# שם → נקודת קוד לכל האותיות בכל הקבוצות הרשומות (glyph_sets)
+letter_map = CODEPOINTS
 
-def generate_ttf(svg_folder, output_ttf):
-    print("🚀 התחלת יצירת פונט...")
+# ===== מטריקות =====
+# רוחב, קנה מידה, קו בסיס ויורדים מחושבים אוטומטית מהתיבות התוחמות – ראו glyph_metrics
+NOTDEF_WIDTH = 500
+
+# ===== פרופילי בנייה =====
+BUILD_PROFILES = ("preview", "final")
+
+def new_font(style="Regular"):
     font = Font()
     font.info.familyName = "uiHebrew Handwriting"
-    font.info.styleName = "Regular"
-    font.info.fullName = "uiHebrew Handwriting"
+    font.info.styleName = style
+    font.info.fullName = "uiHebrew Handwriting" if style == "Regular" else f"uiHebrew Handwriting {style}"
     font.info.unitsPerEm = 1000
     font.info.ascender = 800
     font.info.descender = -200
-
-    logs = []
-
-    for filename in sorted(os.listdir(svg_folder)):
-        if not filename.lower().endswith(".svg"):
-            continue
-        try:
-            name = filename.split("_", 1)[1].replace(".svg", "") if "_" in filename else filename.replace(".svg", "")
-            if name not in letter_map:
-                msg = f"🔸 אות לא במפה: {name}"
-                print(msg)
-                logs.append(msg)
-                continue
-
-            unicode_val = letter_map[name]
-            svg_path = os.path.join(svg_folder, filename)
-
-            doc = minidom.parse(svg_path)
-            paths = doc.getElementsByTagName('path')
-            if not paths:
-                msg = f"⚠️ אין path בקובץ: {filename}"
-                print(msg)
-                logs.append(msg)
-                doc.unlink()
-                continue
-
-            glyph = font.newGlyph(name)
-            glyph.unicode = unicode_val
-            glyph.width = 465
-            if name == "alef":
-                glyph.leftMargin = 70
-                glyph.rightMargin = 20
-            else:
-                glyph.leftMargin = 14
-                glyph.rightMargin = 14
-
-            vertical_shift = vertical_offsets.get(name, 0) + GLOBAL_Y_SHIFT
-            transform = Identity.scale(GLOBAL_SCALE, GLOBAL_SCALE).translate(PADDING_GENERAL, vertical_shift - PADDING_GENERAL)
-            if name in special_transforms:
-                transform = special_transforms[name].scale(GLOBAL_SCALE, GLOBAL_SCALE).translate(PADDING_GENERAL, vertical_shift - PADDING_GENERAL)
-
-            pen = glyph.getPen()
-            tp = TransformPen(pen, transform)
-            successful_paths = 0
-
-            for path_element in paths:
-                d = path_element.getAttribute('d')
-                if d.strip():
-                    try:
-                        parse_path(d, tp)
-                        successful_paths += 1
-                    except Exception as e:
-                        msg = f"⚠️ שגיאה בנתיב בקובץ {filename}: {e}"
-                        print(msg)
-                        logs.append(msg)
-
-            doc.unlink()
-            if successful_paths == 0:
-                msg = f"❌ לא ניתן לנתח path עבור {filename}"
-            else:
-                msg = f"✅ {name} נוסף בהצלחה ({successful_paths} path/paths)"
-            print(msg)
-            logs.append(msg)
-
-        except Exception as e:
-            msg = f"❌ שגיאה בעיבוד {filename}: {e}"
-            print(msg)
-            logs.append(msg)
-
+    font.info.xHeight = X_HEIGHT
+    return font
+
+
+def add_glyph(font, name, outline, metrics=None):
+    """
+    מוסיף לפונט אות מתוך קווי מתאר (רשימת פקודות עט ביחידות potrace).
+    metrics – GlyphMetrics מחישוב על כל האותיות יחד (compute_metrics);
+    בלעדיו המטריקות מחושבות מהאות לבדה.
+    """
+    if metrics is None:
+        metrics = metrics_for({name: outline})[name]
+    glyph = font.newGlyph(name)
+    glyph.unicode = letter_map[name]
+    glyph.width = metrics.advance
+    replayRecording(outline, TransformPen(glyph.getPen(), glyph_transform(metrics)))
+    return glyph
+
+
+def compile_preview(outlines, info=None, metrics=None):
+    """
+    בנייה מהירה לתצוגה מקדימה: OTF/CFF ישירות מקווי המתאר עם FontBuilder של fontTools,
+    בלי defcon, בלי העתקת השכבה, בלי cu2qu ובלי קומפילציית פיצ'רים של ufo2ft.
+    """
+    info = info or new_font().info
+    names = sorted(name for name in outlines if name in letter_map)
+    metrics = metrics or metrics_for({name: outlines[name] for name in names})
+    fb = FontBuilder(info.unitsPerEm, isTTF=False)
+    fb.setupGlyphOrder([".notdef"] + names)
+    fb.setupCharacterMap({letter_map[name]: name for name in names})
+
+    charstrings = {".notdef": T2CharStringPen(NOTDEF_WIDTH, None).getCharString()}
+    hmtx = {".notdef": (NOTDEF_WIDTH, 0)}
+    for name in names:
+        advance = metrics[name].advance
+        pen = T2CharStringPen(advance, None)
+        bounds_pen = BoundsPen(None)
+        transform = glyph_transform(metrics[name])
+        replayRecording(outlines[name], TransformPen(pen, transform))
+        replayRecording(outlines[name], TransformPen(bounds_pen, transform))
+        charstrings[name] = pen.getCharString()
+        bounds = bounds_pen.bounds
+        hmtx[name] = (advance, otRound(bounds[0]) if bounds else 0)
+
+    ps_name = f"{info.familyName}-{info.styleName}".replace(" ", "")
+    fb.setupCFF(ps_name, {"FullName": info.fullName}, charstrings, {})
+    fb.setupHorizontalMetrics(hmtx)
+    fb.setupHorizontalHeader(ascent=info.ascender, descent=info.descender)
+    fb.setupNameTable({"familyName": info.familyName, "styleName": info.styleName})
+    fb.setupOS2(sTypoAscender=info.ascender, sTypoDescender=info.descender,
+                usWinAscent=info.ascender, usWinDescent=-info.descender, sxHeight=X_HEIGHT)
+    fb.setupPost()
+    return fb.font
+
+
+def compile_font(font=None, outlines=None, profile="final", metrics=None):
+    """
+    profile="final" – ufo2ft.compileTTF המלא על פונט ה-defcon, להורדה בתשלום.
+    profile="preview" – compile_preview מתוך outlines (אותו מטמון קווי מתאר), לתצוגה מקדימה.
+    """
+    if profile not in BUILD_PROFILES:
+        raise ValueError(f"Unknown build profile: {profile}")
+    if profile == "preview":
+        with stage("compile_preview"):
+            return compile_preview(outlines, font.info if font is not None else None, metrics)
+    with stage("compileTTF"):
+        return compileTTF(font)
+
+
+def font_to_bytes(ttf, flavor=None):
+    """
+    שומר את הפונט לבאפר בזיכרון במקום לקובץ. flavor="woff2" דורש את החבילה brotli.
+    """
+    with stage("save_font") as rec:
+        ttf.flavor = flavor
+        buf = io.BytesIO()
+        ttf.save(buf)
+        data = buf.getvalue()
+        rec.bytes_out = len(data)
+    return data
+
+
+def subset_font(ttf, names):
+    """
+    מצמצם את הפונט לאותיות names בלבד (ל-webfont של התצוגה המקדימה):
+    בלי hinting, בלי שמות גליפים ועם טבלת name מינימלית.
+    """
+    with stage("subset"):
+        options = subset.Options()
+        options.hinting = False
+        options.glyph_names = False
+        options.notdef_outline = True
+        options.name_IDs = [1, 2]
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=[letter_map[name] for name in names if name in letter_map])
+        subsetter.subset(ttf)
+    return ttf
+
+
+def _compile_style(style, outlines, metrics, profile, flavor):
+    font = new_font(style)
+    if profile == "final":
+        for name in sorted(outlines):
+            add_glyph(font, name, outlines[name], metrics[name])
+    return style, font_to_bytes(compile_font(font, outlines, profile, metrics), flavor)
+
+
+def compile_fonts(styles, profile="final", flavor=None, max_workers=None):
+    """
+    בנייה בכמות של כמה פונטים (משקלים/סגנונות/קבוצות אותיות) בקריאה אחת:
+    {סגנון: {שם: קווי מתאר}} → {סגנון: bytes}.
+    התיבות התוחמות של כל האותיות בכל הסגנונות מחושבות במעבר וקטורי אחד,
+    והקומפילציות עצמן רצות במקביל על מאגר תהליכים.
+    """
+    keyed = {(style, name): outline
+             for style, outlines in styles.items()
+             for name, outline in outlines.items() if name in letter_map}
+    bounds = outline_bounds(keyed)
+
+    jobs = []
+    for style, outlines in styles.items():
+        style_bounds = {name: bounds[(style, name)] for name in outlines if (style, name) in bounds}
+        jobs.append((style, {name: outlines[name] for name in style_bounds}, compute_metrics(style_bounds)))
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if max_workers <= 1:
+        results = [_compile_style(*job, profile, flavor) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_compile_style, *job, profile, flavor) for job in jobs]
+            results = [future.result() for future in futures]
+    return dict(results)
+
+
+def save_font(font, output_ttf, logs, profile="final", outlines=None):
     # ===== שמירה תמידית של הפונט =====
     try:
         os.makedirs(os.path.dirname(output_ttf), exist_ok=True)
-        ttf = compileTTF(font)
-        ttf.save(output_ttf)
+        data = font_to_bytes(compile_font(font, outlines, profile))
+        with open(output_ttf, "wb") as fh:
+            fh.write(data)
         msg = f"🎉 הפונט נוצר בהצלחה בנתיב: {output_ttf}"
         print(msg)
         logs.append(msg)
@@ -118,5 +185,59 @@ def generate_ttf(svg_folder, output_ttf):
         print(msg)
         logs.append(msg)
 
+
+def _add_glyphs(font, outlines, logs, details=None):
+    """מוסיף את כל האותיות, עם מטריקות שמחושבות על כולן יחד."""
+    known = {}
+    for name in sorted(outlines):
+        if name in letter_map:
+            known[name] = outlines[name]
+        else:
+            msg = f"🔸 אות לא במפה: {name}"
+            print(msg)
+            logs.append(msg)
+
+    bounds = outline_bounds(known)
+    metrics = compute_metrics(bounds)
+    msg = f"📏 גובה גוף משוער: {estimate_x_height(bounds):.0f} יחידות מקור → {X_HEIGHT} יחידות פונט"
+    print(msg)
+    logs.append(msg)
+
+    for name, outline in known.items():
+        add_glyph(font, name, outline, metrics[name])
+        msg = f"✅ {name} נוסף בהצלחה (רוחב {metrics[name].advance}{(details or {}).get(name, '')})"
+        print(msg)
+        logs.append(msg)
+    return metrics
+
+
+def generate_ttf(svg_folder, output_ttf):
+    print("🚀 התחלת יצירת פונט...")
+    font = new_font()
+
+    logs = []
+    outlines, details = {}, {}
+
+    for filename, name, outline, paths, error in read_svg_folder(svg_folder):
+        msg = None
+        if error:
+            msg = f"❌ שגיאה בעיבוד {filename}: {error}"
+        elif not paths:
+            msg = f"⚠️ אין path בקובץ: {filename}"
+        elif name not in letter_map:
+            msg = f"🔸 אות לא במפה: {name}"
+        else:
+            # ===== פישוט קווי המתאר לפני ההכנסה לפונט =====
+            points_before = count_points(outline)[1]
+            outlines[name] = optimize_outline(outline)
+            details[name] = (f", {paths} path/paths, "
+                             f"{points_before} → {count_points(outlines[name])[1]} נקודות")
+        if msg:
+            print(msg)
+            logs.append(msg)
+
+    _add_glyphs(font, outlines, logs, details)
+    save_font(font, output_ttf, logs)
+
     # ===== תמיד מחזירים True =====
     return True, logs
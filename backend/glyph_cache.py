@@ -0,0 +1,267 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from instrumentation import record_job
+
+# מודולי הצינור (NumPy, OpenCV, fontTools) נטענים בשימוש הראשון ולא בייבוא –
+# השרת יוצר את המטמונים בעלייה, הרבה לפני שמישהו בונה פונט (ראו startup)
+
+# מעלים את המספר כשמשנים את המעקב, כדי לפסול רשומות ישנות
+CACHE_VERSION = 5
+
+
+def cache_key(name, data, options=None):
+    """
+    מפתח תוכן: hash של הביטמפ החתוך יחד עם פרמטרי המעקב והפישוט.
+    המיקום בפונט לא נכנס למפתח – הוא מחושב בכל בנייה מהתיבות התוחמות (glyph_metrics).
+    """
+    import simplify
+    import resolution
+
+    params = {
+        "version": CACHE_VERSION,
+        "name": name,
+        "trace": options or {},
+        "simplify": simplify.SIMPLIFY_TOLERANCE,
+        "trace_size": resolution.GLYPH_TRACE_SIZE,
+    }
+    h = hashlib.sha256(data)
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _to_json(outline, bounds):
+    return {"outline": [[op, [list(p) for p in pts]] for op, pts in outline], "bounds": bounds}
+
+
+def _from_json(value):
+    bounds = value["bounds"]
+    return [(op, tuple(tuple(p) for p in pts)) for op, pts in value["outline"]], tuple(bounds) if bounds else None
+
+
+class GlyphCache:
+    """
+    מטמון קווי מתאר לפי מפתח תוכן: LRU בזיכרון, ואופציונלית גם עותק JSON בדיסק
+    כדי שבנייה אחרי הפעלה מחדש לא תצטרך לעקוב שוב.
+    לכל אות נשמרת גם התיבה התוחמת שלה, שממנה מחושבות המטריקות בכל בנייה.
+    העותק בדיסק מנוקה ב-collect_garbage: קבצים שלא נקראו יותר מ-ttl_seconds,
+    ומעבר ל-max_files – הישנים ביותר (זמן השינוי של קובץ מתעדכן בכל קריאה).
+    """
+
+    def __init__(self, cache_dir=None, max_entries=1024, ttl_seconds=None, max_files=None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_files = max_files
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entry(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), encoding="utf-8") as fh:
+                    entry = _from_json(json.load(fh))
+            except (OSError, ValueError, KeyError):
+                return None
+            try:
+                os.utime(self._path(key))
+            except OSError:
+                pass
+            self._remember(key, entry)
+            return entry
+        return None
+
+    def get(self, key):
+        entry = self._entry(key)
+        return entry[0] if entry else None
+
+    def put(self, key, outline, bounds=None):
+        from glyph_metrics import outline_bounds
+
+        if bounds is None:
+            bounds = outline_bounds({key: outline})[key]
+        self._remember(key, (outline, bounds))
+        if self.cache_dir:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(_to_json(outline, bounds), fh)
+            os.replace(tmp_path, self._path(key))
+
+    def collect_garbage(self):
+        """מוחק מהדיסק רשומות ישנות (ttl_seconds) ועודפות (max_files); מחזיר כמה נמחקו."""
+        if not self.cache_dir:
+            return 0
+        files = []
+        for fname in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, fname)
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        files.sort(reverse=True)
+
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds else None
+        removed = 0
+        for i, (mtime, path) in enumerate(files):
+            if (cutoff is not None and mtime < cutoff) or (self.max_files and i >= self.max_files):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def outlines_for(self, sources, max_workers=None, **options):
+        """
+        מחזיר ({שם: קווי מתאר}, {שם: מפתח}, {שם: שגיאה}) עבור {שם: bytes}.
+        רק אותיות שאינן במטמון נשלחות למעקב (במקביל).
+        """
+        outlines, keys, errors, _ = self.entries_for(sources, max_workers=max_workers, **options)
+        return outlines, keys, errors
+
+    def entries_for(self, sources, max_workers=None, **options):
+        """
+        כמו outlines_for, ובנוסף {שם: תיבה תוחמת}. התיבות של אותיות חדשות
+        מחושבות יחד במעבר וקטורי אחד ונשמרות במטמון עם קווי המתאר.
+        """
+        from glyph_metrics import outline_bounds
+        from glyph_pipeline import process_glyphs_batch
+
+        keys = {name: cache_key(name, data, options) for name, data in sources.items()}
+        outlines, bounds, errors, misses = {}, {}, {}, []
+        for name, key in keys.items():
+            entry = self._entry(key)
+            if entry is None:
+                misses.append((name, sources[name]))
+            else:
+                outlines[name], bounds[name] = entry
+
+        traced = {}
+        for result in process_glyphs_batch(misses, max_workers=max_workers, **options):
+            if result.error:
+                errors[result.name] = result.error
+            else:
+                traced[result.name] = result.outline
+        new_bounds = outline_bounds(traced)
+        for name, outline in traced.items():
+            self.put(keys[name], outline, new_bounds[name])
+        outlines.update(traced)
+        bounds.update(new_bounds)
+        return outlines, keys, errors, bounds
+
+
+class IncrementalFontBuilder:
+    """
+    שומר את פונט ה-defcon מהבנייה הקודמת ומחליף בו רק אותיות שהמפתח שלהן השתנה.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.font = None
+        self.keys = {}
+        self._lock = threading.Lock()
+
+    def build(self, sources, max_workers=None, profile="final", flavor=None, **options):
+        """
+        בונה את הפונט לבאפר בזיכרון ומחזיר (bytes, logs).
+        profile="preview" בונה ישר מקווי המתאר שבמטמון (בלי defcon);
+        profile="final" מעדכן את פונט ה-defcon השמור ומריץ את ufo2ft.
+        """
+        from generate_font import letter_map, new_font, add_glyph, compile_font, font_to_bytes
+        from glyph_metrics import compute_metrics
+        from tracer import count_points
+
+        outlines, keys, errors, bounds = self.cache.entries_for(sources, max_workers=max_workers, **options)
+        logs = [f"❌ שגיאה בעיבוד {name}: {error}" for name, error in errors.items()]
+        for msg in logs:
+            print(msg)
+
+        counts = [count_points(outline) for outline in outlines.values()]
+        record_job(len(outlines), sum(c for c, _ in counts), sum(p for _, p in counts))
+
+        known = {name: b for name, b in bounds.items() if name in letter_map}
+        metrics = compute_metrics(known)
+
+        if profile == "preview":
+            data = font_to_bytes(compile_font(outlines=outlines, profile=profile, metrics=metrics), flavor)
+        else:
+            with self._lock:
+                if self.font is None:
+                    self.font = new_font()
+                font = self.font
+
+                for name in list(self.keys):
+                    if name not in outlines:
+                        if name in font:
+                            del font[name]
+                        del self.keys[name]
+
+                # אות מתעדכנת אם קווי המתאר שלה או המטריקות שלה השתנו
+                # (למשל כשאות חדשה מזיזה את הערכת גובה הגוף של כולן)
+                dirty = [name for name in sorted(known)
+                         if self.keys.get(name) != (keys[name], metrics[name])]
+                for name in dirty:
+                    if name in font:
+                        del font[name]
+                    add_glyph(font, name, outlines[name], metrics[name])
+                    self.keys[name] = (keys[name], metrics[name])
+
+                msg = f"♻️ {len(dirty)} אותיות עודכנו, {len(self.keys) - len(dirty)} נלקחו מהבנייה הקודמת"
+                print(msg)
+                logs.append(msg)
+                data = font_to_bytes(compile_font(font, profile=profile), flavor)
+
+        msg = f"🎉 הפונט נוצר בהצלחה ({profile}, {len(data)} בתים)"
+        print(msg)
+        logs.append(msg)
+        return data, logs
+
+
+class FontCache:
+    """
+    LRU של פונטים בנויים (bytes) לפי מפתח של קבוצת האותיות, חסום בגודל כולל,
+    כך שהורדה חוזרת של אותו פונט לא בונה ולא קוראת מהדיסק.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
@@ -0,0 +1,127 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+from fontTools.misc.transform import Identity
+
+from glyph_sets import GLYPHS, MARK_ALIGNMENTS
+
+# ===== יעדים ביחידות הפונט (unitsPerEm=1000) =====
+X_HEIGHT = int(os.environ.get("FONT_X_HEIGHT", "540"))        # גובה גוף האות (בסיס עד ראש ה"גוף")
+SIDE_BEARING = int(os.environ.get("FONT_SIDE_BEARING", "30"))  # רווח משני צידי הדיו
+MARK_GAP = 40                                                   # מרווח בין סימן ניקוד לאות
+
+# אופן היישור של כל אות מגיע מרישום הקבוצות (glyph_sets); אות לא רשומה נחשבת body
+
+# advance – רוחב האות; scale/dx/dy – מיפוי מיחידות potrace ליחידות הפונט: (s*x + dx, s*y + dy)
+GlyphMetrics = namedtuple("GlyphMetrics", ["advance", "scale", "dx", "dy"])
+
+_CURVE_T = np.linspace(0.0, 1.0, 9)
+_CURVE_BASIS = np.stack([(1 - _CURVE_T) ** 3, 3 * (1 - _CURVE_T) ** 2 * _CURVE_T,
+                         3 * (1 - _CURVE_T) * _CURVE_T ** 2, _CURVE_T ** 3], axis=1)
+
+
+def glyph_transform(metrics):
+    return Identity.translate(metrics.dx, metrics.dy).scale(metrics.scale)
+
+
+def outline_bounds(outlines):
+    """
+    {שם: קווי מתאר} → {שם: (xMin, yMin, xMax, yMax) או None לאות ריקה}, במעבר וקטורי אחד
+    על כל האותיות יחד: נקודות על הקו נאספות למערך אחד, עקומות נדגמות בבת אחת,
+    והמינימום/מקסימום לכל אות מחושבים ב-ufunc.at.
+    """
+    names = list(outlines)
+    points, owners, curves, curve_owners = [], [], [], []
+    for index, name in enumerate(names):
+        current = None
+        for op, pts in outlines[name]:
+            if not pts:
+                continue
+            if op == "curveTo" and len(pts) == 3 and current is not None:
+                curves.append((current,) + tuple(pts))
+                curve_owners.append(index)
+                points.append(pts[-1])
+                owners.append(index)
+            else:
+                # moveTo/lineTo, וגם נקודות הבקרה של qCurveTo (גבול שמרני)
+                points.extend(pts)
+                owners.extend([index] * len(pts))
+            current = pts[-1]
+
+    lo = np.full((len(names), 2), np.inf)
+    hi = np.full((len(names), 2), -np.inf)
+    if points:
+        pts = np.asarray(points, dtype=np.float64)
+        idx = np.asarray(owners)
+        np.minimum.at(lo, idx, pts)
+        np.maximum.at(hi, idx, pts)
+    if curves:
+        samples = np.einsum("tk,nkd->ntd", _CURVE_BASIS, np.asarray(curves, dtype=np.float64))
+        idx = np.repeat(np.asarray(curve_owners), len(_CURVE_T))
+        flat = samples.reshape(-1, 2)
+        np.minimum.at(lo, idx, flat)
+        np.maximum.at(hi, idx, flat)
+
+    result = {}
+    for index, name in enumerate(names):
+        if np.isfinite(lo[index]).all():
+            result[name] = (float(lo[index, 0]), float(lo[index, 1]), float(hi[index, 0]), float(hi[index, 1]))
+        else:
+            result[name] = None
+    return result
+
+
+def _align(name):
+    glyph = GLYPHS.get(name)
+    return glyph.align if glyph else "body"
+
+
+def estimate_x_height(bounds):
+    """
+    גובה גוף האות ביחידות המקור: חציון הגבהים של אותיות ה-body (בלי ל', בלי
+    האותיות התלויות ובלי סימנים). אם אין כאלה – חציון כל האותיות שאינן ניקוד.
+    """
+    heights = [b[3] - b[1] for name, b in bounds.items() if b and _align(name) == "body"]
+    if not heights:
+        heights = [b[3] - b[1] for name, b in bounds.items() if b and _align(name) not in MARK_ALIGNMENTS]
+    return float(np.median(heights)) if heights else 0.0
+
+
+def compute_metrics(bounds, x_height=X_HEIGHT, side_bearing=SIDE_BEARING):
+    """
+    מטריקות לכל האותיות מתוך תיבות התוחמות שלהן, בחישוב וקטורי אחד:
+    קנה מידה אחיד כך שגוף האות המשוער יגיע ל-x_height, רוחב = דיו + side_bearing משני הצדדים,
+    ויישור אנכי לפי הרישום – קו בסיס לרוב האותיות, ראש על x_height לאותיות התלויות (ך ן ף ץ ק י),
+    ומרכז הגוף למקף. סימני ניקוד מקבלים רוחב אפס וממורכזים סביב נקודת האפס.
+    מחזיר {שם: GlyphMetrics}; אות ריקה מקבלת רק רוחב.
+    """
+    names = [name for name, b in bounds.items() if b]
+    metrics = {name: GlyphMetrics(2 * side_bearing, 1.0, 0.0, 0.0) for name, b in bounds.items() if not b}
+    if not names:
+        return metrics
+
+    source_height = estimate_x_height(bounds)
+    scale = x_height / source_height if source_height > 0 else 1.0
+
+    box = np.array([bounds[name] for name in names], dtype=np.float64) * scale
+    align = np.array([_align(name) for name in names])
+    mark = np.isin(align, list(MARK_ALIGNMENTS))
+    middle = (box[:, 1] + box[:, 3]) / 2.0
+
+    advance = np.where(mark, 0, np.rint(box[:, 2] - box[:, 0] + 2 * side_bearing))
+    dx = np.where(mark, -(box[:, 0] + box[:, 2]) / 2.0, side_bearing - box[:, 0])
+    dy = np.select(
+        [align == "top", np.isin(align, ["middle", "center"]), align == "below", align == "above"],
+        [x_height - box[:, 3], x_height / 2.0 - middle, -MARK_GAP - box[:, 3], x_height + MARK_GAP - box[:, 1]],
+        default=-box[:, 1],
+    )
+
+    for i, name in enumerate(names):
+        metrics[name] = GlyphMetrics(int(advance[i]), scale, round(float(dx[i]), 3), round(float(dy[i]), 3))
+    return metrics
+
+
+def metrics_for(outlines, **kwargs):
+    """קיצור: תיבות תוחמות ומטריקות לכל {שם: קווי מתאר} בבת אחת."""
+    return compute_metrics(outline_bounds(outlines), **kwargs)
@@ -0,0 +1,237 @@
+import os
+import time
+import threading
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+
+from bw_converter import binarize_array
+from resolution import reduce, fit_factor, keep_factor, trace_factor, box_to_working, box_to_full
+from tracer import trace_bitmap, write_potrace_svg, count_points
+from simplify import SIMPLIFY_TOLERANCE, simplify_outline, optimize_outline
+from instrumentation import stage, observe, record_simplify
+
+# כתיבת קבצי ביניים (BW/SVG) לדיסק – רק לצורך דיבאג
+DEBUG_INTERMEDIATES = os.environ.get("DEBUG_INTERMEDIATES", "0") == "1"
+
+# מספר תהליכים לעיבוד מקבילי של אותיות (ברירת מחדל: מספר הליבות)
+GLYPH_WORKERS = int(os.environ.get("GLYPH_WORKERS", "0")) or os.cpu_count() or 1
+
+# תוצאה של אות אחת בעיבוד מקבילי: outline=None כשיש error;
+# points – (נקודות לפני הפישוט, אחריו), כי המדדים של תהליכי העבודה לא חוזרים לתהליך הראשי
+GlyphResult = namedtuple("GlyphResult", ["name", "outline", "error", "elapsed", "points"], defaults=(None,))
+
+# מאגר תהליכים אחד לכל תהליך שרת, בגודל GLYPH_WORKERS, שנוצר בשימוש הראשון.
+# forkserver ולא fork: השימוש הראשון קורה בתוך thread של בקשה (gthread), ו-fork מתהליך
+# מרובה threads יכול לרשת מנעולים תפוסים.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def decode_image(data):
+    """
+    מפענח תמונה מתוך באפר בזיכרון (bytes) לתמונה אפורה, בלי לכתוב קובץ.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    gray = cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError("Cannot decode image buffer")
+    return gray
+
+
+def bitmap_to_outline(gray, otsu=False, factor=1, **trace_options):
+    """
+    סף → מעקב: מחזיר קווי מתאר (פקודות עט ביחידות potrace) ממערך אפור.
+    ברירת המחדל היא סף קבוע כמו ב-potrace; otsu=True מפעיל את bw_converter.
+    factor – הקטנה בפקטור שלם לפני המעקב; הפלט נשאר ביחידות של התמונה המקורית.
+    """
+    working = reduce(gray, factor, pad_top=True)
+    bitmap = binarize_array(working.image) if otsu else working.image
+    return trace_bitmap(bitmap, scale=1.0 / working.factor, **trace_options)
+
+
+def _tolerance(simplify, factor):
+    """סבילות הפישוט ביחידות המקור: אחרי הקטנה פי factor, פיקסל עבודה שווה factor פיקסלי מקור."""
+    return (SIMPLIFY_TOLERANCE if simplify is None else simplify) * factor
+
+
+def write_debug_files(name, gray, outline, bw_dir=None, svg_dir=None):
+    if bw_dir:
+        os.makedirs(bw_dir, exist_ok=True)
+        cv2.imwrite(os.path.join(bw_dir, f"{name}.png"), gray)
+    if svg_dir:
+        os.makedirs(svg_dir, exist_ok=True)
+        height, width = gray.shape
+        write_potrace_svg(outline, width, height, os.path.join(svg_dir, f"{name}.svg"))
+
+
+def outline_from_buffer(data, name, debug_dirs=None, simplify=None, **trace_options):
+    """
+    מבאפר של תמונה ישר לקווי מתאר (אחרי פישוט), כולו בזיכרון.
+    simplify – סבילות הפישוט (None: SIMPLIFY_TOLERANCE, 0: בלי פישוט).
+    debug_dirs=(bw_dir, svg_dir) כותב גם את קבצי הביניים, כשהדגל DEBUG_INTERMEDIATES פעיל.
+    """
+    with stage("decode", bytes_in=len(data)):
+        gray = decode_image(data)
+    factor = trace_factor(gray.shape)
+    with stage("trace"):
+        outline = bitmap_to_outline(gray, factor=factor, **trace_options)
+    outline = optimize_outline(outline, _tolerance(simplify, factor))
+    if DEBUG_INTERMEDIATES and debug_dirs:
+        write_debug_files(name, gray, outline, *debug_dirs)
+    return outline
+
+
+def split_sheet(gray, names):
+    """
+    מחלק גיליון שלם (מערך אפור) לאותיות: איתור תיבות על עותק גס, ואז סף אחד על
+    עותק ברזולוציית המעקב (כך שצל שעובר בין אותיות מטופל בהקשר המלא) וחיתוך ממנו,
+    כשכל חיתוך מקודד ל-PNG. מחזיר רשימת (שם, תיבה, bytes) בסדר של names;
+    התיבות בקואורדינטות של הגיליון המקורי, בדיוק האזור שנחתך.
+    """
+    from split_letters import locate_letters
+
+    pieces = split_template_sheet(gray, names)
+    if pieces is not None:
+        return pieces
+
+    boxes = locate_letters(gray, count=len(names))
+    sizes = [max(w, h) for _, _, w, h in boxes if w and h]
+    working = reduce(gray, keep_factor(np.median(sizes)) if sizes else 1)
+    bw = binarize_array(working.image)
+    pieces = []
+    for name, box in zip(names, boxes):
+        wx, wy, ww, wh = box_to_working(box, working)
+        crop = bw[wy:wy + wh, wx:wx + ww]
+        box = box_to_full((wx, wy, ww, wh), working, gray.shape)
+        if crop.size == 0:
+            pieces.append((name, box, None))
+            continue
+        ok, buf = cv2.imencode(".png", crop)
+        pieces.append((name, box, buf.tobytes() if ok else None))
+    return pieces
+
+
+def split_template_sheet(gray, names):
+    """
+    גיליון שצולם מהתבנית המודפסת (template_sheet): הומוגרפיה אחת מסמני הפינות,
+    עיוות אחד לכל המשבצות וסף אחד על כולן יחד – בלי חיפוש קווי מתאר.
+    משבצת בלי דיו חוזרת בלי bytes. מחזיר None אם אין בתמונה סמנים של התבנית.
+    """
+    from template_sheet import (template_layout, register_sheet, extract_slots,
+                                RegistrationError, MIN_SLOT_INK)
+
+    layout = template_layout(len(names))
+    try:
+        with stage("register_sheet"):
+            homography = register_sheet(gray, layout)
+    except RegistrationError:
+        return None
+
+    with stage("extract_slots"):
+        slots, boxes = extract_slots(gray, homography, layout)
+        bw = binarize_array(slots.reshape(-1, slots.shape[-1])).reshape(slots.shape)
+    inked = (bw < 128).reshape(len(names), -1).mean(axis=1) > MIN_SLOT_INK
+    pieces = []
+    for name, box, crop, has_ink in zip(names, boxes, bw, inked):
+        ok, buf = cv2.imencode(".png", crop) if has_ink else (False, None)
+        pieces.append((name, box, buf.tobytes() if ok else None))
+    return pieces
+
+
+def render_sheet_preview(gray, pieces, max_side=1200):
+    """תמונת JPEG מוקטנת של הגיליון עם מסגרת סביב כל אות שזוהתה."""
+    # הקטנה לפני ההמרה לצבע, בפקטור שלם – בלי עותק BGR ברזולוציה המלאה
+    working = reduce(gray, fit_factor(gray.shape, max_side))
+    preview = cv2.cvtColor(working.image, cv2.COLOR_GRAY2BGR)
+    scale = 1.0 / working.factor
+    for i, (_, (x, y, w, h), data) in enumerate(pieces):
+        color = (60, 180, 60) if data else (40, 40, 220)
+        p0 = (int(x * scale), int(y * scale))
+        p1 = (int((x + w) * scale), int((y + h) * scale))
+        cv2.rectangle(preview, p0, p1, color, 2)
+        cv2.putText(preview, str(i + 1), (p0[0] + 3, p0[1] + 16), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+    ok, buf = cv2.imencode(".jpg", preview, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    if not ok:
+        raise ValueError("Cannot encode sheet preview")
+    return buf.tobytes()
+
+
+def _process_glyph(name, source, options):
+    start = time.perf_counter()
+    try:
+        options = dict(options)
+        simplify = options.pop("simplify", None)
+        gray = source if isinstance(source, np.ndarray) else decode_image(source)
+        factor = trace_factor(gray.shape)
+        traced = bitmap_to_outline(gray, factor=factor, **options)
+        outline = simplify_outline(traced, _tolerance(simplify, factor))
+        points = (count_points(traced)[1], count_points(outline)[1])
+        return GlyphResult(name, outline, None, time.perf_counter() - start, points)
+    except Exception as e:
+        return GlyphResult(name, None, str(e), time.perf_counter() - start)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=GLYPH_WORKERS,
+                                        mp_context=multiprocessing.get_context("forkserver"))
+        return _pool
+
+
+def shutdown_pool():
+    """סוגר את מאגר התהליכים (ביציאת תהליך השרת, ראו gunicorn.conf.py)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def process_glyphs_batch(items, max_workers=None, **options):
+    """
+    סף → מעקב → פישוט → קווי מתאר לכל האלפבית במקביל, על מאגר תהליכים.
+    items – רשימת (שם, מקור) כשהמקור הוא bytes של תמונה או מערך NumPy.
+    מחזיר רשימת GlyphResult באותו סדר; שגיאה באות אחת לא עוצרת את השאר.
+    """
+    items = list(items)
+    # המאגר המשותף תמיד בגודל GLYPH_WORKERS; max_workers רק קובע אם לעבוד בלעדיו (1)
+    # ואת גודל המנות
+    max_workers = min(max_workers or GLYPH_WORKERS, GLYPH_WORKERS)
+    names = [name for name, _ in items]
+    sources = [source for _, source in items]
+
+    bytes_in = sum(len(s) for s in sources if isinstance(s, bytes))
+    with stage("trace_batch", bytes_in=bytes_in):
+        if max_workers <= 1 or len(items) <= 1:
+            results = [_process_glyph(name, source, options) for name, source in items]
+        else:
+            pool = _get_pool()
+            chunksize = max(1, -(-len(items) // (max_workers * 2)))
+            results = list(pool.map(_process_glyph, names, sources, [options] * len(items), chunksize=chunksize))
+
+    for result in results:
+        observe("decode_and_trace", result.elapsed)
+        if result.points:
+            record_simplify(*result.points)
+    return results
+
+
+def load_sources(glyph_dir, names, sources=None):
+    """
+    משלים את ה-bytes של אותיות חסרות מתוך קבצי ה-PNG השמורים
+    (למשל אחרי הפעלה מחדש של השרת).
+    """
+    sources = dict(sources or {})
+    for name in names:
+        if name in sources:
+            continue
+        path = os.path.join(glyph_dir, f"{name}.png")
+        if os.path.exists(path):
+            with open(path, "rb") as fh:
+                sources[name] = fh.read()
+    return sources
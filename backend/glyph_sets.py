@@ -0,0 +1,137 @@
+import os
+from collections import namedtuple
+
+# ===== רישום קבוצות אותיות =====
+# כל אות מוגדרת פעם אחת: שם (שם הגליף בפונט ושם הקובץ), נקודת קוד, ואופן היישור
+# האנכי שלה (ראו glyph_metrics):
+#   body     – יושבת על קו הבסיס, והגובה שלה קובע את גובה הגוף (x-height)
+#   baseline – יושבת על קו הבסיס, אבל גבוהה/נמוכה מהגוף (ל, ספרות, אותיות גדולות, סימני פיסוק)
+#   top      – הראש על גובה הגוף והשאר יורד מתחת לקו הבסיס (ך ן ף ץ ק, g p q y) או מרחף (י, מירכאות)
+#   middle   – ממורכזת באמצע גובה הגוף (מקף)
+#   below / above / center – סימן ניקוד ברוחב אפס, מתחת לאות / מעליה / בתוכה
+# הסדר בתוך קבוצה הוא סדר המשבצות בתבנית ובדף החיתוך.
+Glyph = namedtuple("Glyph", ["name", "codepoint", "align"])
+
+ALIGNMENTS = ("body", "baseline", "top", "middle", "below", "above", "center")
+MARK_ALIGNMENTS = frozenset({"below", "above", "center"})
+
+
+def _glyphs(align, spec):
+    """'שם:קוד שם:קוד ...' → רשימת Glyph עם אותו יישור."""
+    glyphs = []
+    for item in spec.split():
+        name, code = item.split(":")
+        glyphs.append(Glyph(name, int(code, 16), align))
+    return glyphs
+
+
+_DEFINITIONS = {
+    "hebrew": (
+        _glyphs("body", "alef:05D0 bet:05D1 gimel:05D2 dalet:05D3 he:05D4 vav:05D5 zayin:05D6 "
+                        "het:05D7 tet:05D8")
+        + _glyphs("top", "yod:05D9")
+        + _glyphs("body", "kaf:05DB")
+        + _glyphs("baseline", "lamed:05DC")
+        + _glyphs("body", "mem:05DE nun:05E0 samekh:05E1 ayin:05E2 pe:05E4 tsadi:05E6")
+        + _glyphs("top", "qof:05E7")
+        + _glyphs("body", "resh:05E8 shin:05E9 tav:05EA")
+        + _glyphs("top", "finalkaf:05DA")
+        + _glyphs("body", "finalmem:05DD")
+        + _glyphs("top", "finalnun:05DF finalpe:05E3 finaltsadi:05E5")
+    ),
+    "digits": _glyphs("baseline", "zero:0030 one:0031 two:0032 three:0033 four:0034 "
+                                  "five:0035 six:0036 seven:0037 eight:0038 nine:0039"),
+    "punctuation": (
+        _glyphs("baseline", "period:002E comma:002C colon:003A semicolon:003B exclam:0021 "
+                            "question:003F parenleft:0028 parenright:0029")
+        + _glyphs("middle", "hyphen:002D")
+        + _glyphs("top", "quotesingle:0027 quotedbl:0022 geresh:05F3 gershayim:05F4")
+    ),
+    "latin": (
+        _glyphs("baseline", " ".join(f"{c}:{ord(c):04X}" for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+        + _glyphs("body", " ".join(f"{c}:{ord(c):04X}" for c in "acemnorsuvwxz"))
+        + _glyphs("baseline", " ".join(f"{c}:{ord(c):04X}" for c in "bdfhiklt"))
+        + _glyphs("top", " ".join(f"{c}:{ord(c):04X}" for c in "gjpqy"))
+    ),
+    "niqqud": (
+        _glyphs("below", "sheva:05B0 hiriq:05B4 tsere:05B5 segol:05B6 patah:05B7 qamats:05B8 "
+                         "qubuts:05BB")
+        + _glyphs("above", "holam:05B9 shindot:05C1 sindot:05C2")
+        + _glyphs("center", "dagesh:05BC")
+    ),
+}
+
+
+class GlyphSet:
+    """
+    קבוצת אותיות סדורה עם חיפוש באינדקס: שם ↔ משבצת בתבנית ↔ נקודת קוד.
+    """
+
+    def __init__(self, name, glyphs):
+        self.name = name
+        self.glyphs = tuple(glyphs)
+        self.names = tuple(g.name for g in self.glyphs)
+        self._slots = {g.name: i for i, g in enumerate(self.glyphs)}
+        codepoints = {g.codepoint for g in self.glyphs}
+        if len(self._slots) != len(self.glyphs) or len(codepoints) != len(self.glyphs):
+            raise ValueError(f"Duplicate glyph name or codepoint in glyph set {name}")
+
+    def __len__(self):
+        return len(self.glyphs)
+
+    def __iter__(self):
+        return iter(self.glyphs)
+
+    def __contains__(self, name):
+        return name in self._slots
+
+    def __getitem__(self, slot):
+        return self.glyphs[slot]
+
+    def slot(self, name):
+        """המשבצת של האות בתבנית/בדף החיתוך."""
+        return self._slots[name]
+
+    def codepoint(self, name):
+        return self.glyphs[self._slots[name]].codepoint
+
+    def labels(self):
+        """התווים להצגה בממשק; סימני ניקוד מוצגים על עיגול מקווקו (◌)."""
+        return [("◌" if g.align in MARK_ALIGNMENTS else "") + chr(g.codepoint) for g in self.glyphs]
+
+    def __add__(self, other):
+        return GlyphSet(f"{self.name}+{other.name}", self.glyphs + other.glyphs)
+
+    def __repr__(self):
+        return f"GlyphSet({self.name!r}, {len(self)} glyphs)"
+
+
+GLYPH_SETS = {name: GlyphSet(name, glyphs) for name, glyphs in _DEFINITIONS.items()}
+
+# טבלה אחת לכל הרישום: שם → Glyph (השמות ייחודיים בין כל הקבוצות)
+GLYPHS = {}
+for _set in GLYPH_SETS.values():
+    for _glyph in _set:
+        if _glyph.name in GLYPHS:
+            raise ValueError(f"Glyph {_glyph.name} is defined in more than one glyph set")
+        GLYPHS[_glyph.name] = _glyph
+CODEPOINTS = {name: g.codepoint for name, g in GLYPHS.items()}
+
+
+def glyph_set(spec):
+    """
+    "hebrew" או "hebrew+digits+punctuation" → GlyphSet אחד, במשבצות לפי סדר הקבוצות.
+    """
+    parts = [part.strip() for part in spec.split("+") if part.strip()]
+    unknown = [part for part in parts if part not in GLYPH_SETS]
+    if unknown or not parts:
+        raise ValueError(f"Unknown glyph set: {spec}")
+    result = GLYPH_SETS[parts[0]]
+    for part in parts[1:]:
+        result = result + GLYPH_SETS[part]
+    return result
+
+
+# קבוצת האותיות שהאתר עובד איתה (תבנית, דף חיתוך, בניית הפונט)
+ACTIVE_GLYPH_SET = glyph_set(os.environ.get("GLYPH_SET", "hebrew"))
+HEBREW = GLYPH_SETS["hebrew"]
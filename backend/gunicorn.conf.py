@@ -0,0 +1,74 @@
+"""
+הגדרות gunicorn לפרודקשן (ראו Dockerfile):
+    gunicorn -c backend/gunicorn.conf.py wsgi:app
+
+כמה תהליכי עבודה, כל אחד עם כמה threads. האפליקציה נטענת פעם אחת בתהליך הראשי (preload_app);
+הספריות הכבדות (OpenCV, NumPy, fontTools, ufo2ft) נטענות לפי WARMUP (ראו startup):
+ב-thread ברקע בכל תהליך אחרי ה-fork, או בתהליך הראשי לפני ה-fork (preload) כדי לשתף זיכרון.
+מספר ה-threads של OpenCV/BLAS ושל מאגר המעקב מחולק בין התהליכים, כדי שסך כל החישוב
+לא יעלה על מספר הליבות.
+
+החלפה מסודרת: kill -HUP לתהליך הראשי מפעיל תהליכים חדשים, והישנים מסיימים את הבקשות
+שבטיפול ואת בניית הפונטים שכבר רצה (worker_exit) לפני שהם יוצאים.
+"""
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CPU_COUNT = os.cpu_count() or 1
+
+chdir = BASE_DIR
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", str(max(1, min(CPU_COUNT, 4)))))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+preload_app = True
+
+# בקשה שתוקעת את התהליך יותר מ-timeout שניות – התהליך מוחלף; בנייה מלאה רצה ברקע (FONT_JOBS)
+timeout = int(os.environ.get("REQUEST_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "60"))
+keepalive = 5
+# מחזור תהליכים מדי פעם, נגד זליגת זיכרון איטית בספריות ה-C
+max_requests = int(os.environ.get("MAX_REQUESTS", "1000"))
+max_requests_jitter = max_requests // 10
+
+# מגבלות על כותרות הבקשה (גודל הגוף – MAX_CONTENT_LENGTH ב-server.py)
+limit_request_line = 8190
+limit_request_fields = 100
+limit_request_field_size = 8190
+
+accesslog = "-"
+errorlog = "-"
+
+# ===== threads לכל תהליך =====
+# חייב לקרות לפני ש-NumPy/OpenCV נטענים (preload_app טוען אותם אחרי קובץ ההגדרות)
+THREADS_PER_WORKER = int(os.environ.get("THREADS_PER_WORKER", "0")) or max(1, CPU_COUNT // workers)
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS",
+             "OPENCV_FOR_THREADS_NUM"):
+    os.environ.setdefault(_var, str(THREADS_PER_WORKER))
+os.environ.setdefault("GLYPH_WORKERS", str(THREADS_PER_WORKER))
+
+
+def when_ready(server):
+    import startup
+
+    if startup.WARMUP == "preload":
+        startup.warm_up()
+
+
+def post_fork(server, worker):
+    import startup
+
+    if "cv2" in sys.modules:
+        sys.modules["cv2"].setNumThreads(THREADS_PER_WORKER)
+    if startup.WARMUP == "thread":
+        startup.start_warm_up()
+
+
+def worker_exit(server, worker):
+    app_module = sys.modules.get("server")
+    if app_module is not None:
+        app_module.FONT_JOBS.shutdown(wait=True)
+    pipeline = sys.modules.get("glyph_pipeline")
+    if pipeline is not None:
+        pipeline.shutdown_pool()
@@ -0,0 +1,101 @@
+import io
+import os
+from instrumentation import stage
+
+# ===== מגבלות העלאה =====
+MAX_GLYPH_BYTES = int(os.environ.get("MAX_GLYPH_BYTES", str(4 * 1024 * 1024)))
+MAX_BATCH_BYTES = int(os.environ.get("MAX_BATCH_BYTES", str(32 * 1024 * 1024)))
+MAX_GLYPH_PIXELS = int(os.environ.get("MAX_GLYPH_PIXELS", str(4096 * 4096)))
+# תמונה שלמה (צילום/גיליון) – עד 48 מגה-פיקסל, כלומר ~150MB כמערך צבע בזיכרון
+MAX_IMAGE_BYTES = int(os.environ.get("MAX_IMAGE_BYTES", str(25 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.environ.get("MAX_IMAGE_PIXELS", str(48 * 1000 * 1000)))
+
+# פענוח מוקטן: ב-JPEG זה קנה מידה של ה-DCT בתוך libjpeg – התמונה המלאה אף פעם לא נוצרת.
+# שמות הדגלים של cv2 (המודול עצמו נטען רק בפענוח הראשון)
+_REDUCED_FLAGS = {
+    1: ("IMREAD_COLOR", "IMREAD_GRAYSCALE"),
+    2: ("IMREAD_REDUCED_COLOR_2", "IMREAD_REDUCED_GRAYSCALE_2"),
+    4: ("IMREAD_REDUCED_COLOR_4", "IMREAD_REDUCED_GRAYSCALE_4"),
+    8: ("IMREAD_REDUCED_COLOR_8", "IMREAD_REDUCED_GRAYSCALE_8"),
+}
+
+
+class UploadRejected(Exception):
+    """העלאה שנדחתה לפני פענוח; status הוא קוד ה-HTTP להחזרה."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def read_stream(stream, max_bytes=MAX_GLYPH_BYTES, content_length=None):
+    """
+    קורא גוף בינארי מה-stream עד max_bytes, בלי עותקים נוספים (לא base64, לא JSON).
+    """
+    if content_length is not None and content_length > max_bytes:
+        raise UploadRejected(f"Upload too large ({content_length} > {max_bytes} bytes)", 413)
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadRejected(f"Upload too large (> {max_bytes} bytes)", 413)
+    if not data:
+        raise UploadRejected("Empty upload")
+    return data
+
+
+def read_image_info(data):
+    """מחזיר (רוחב, גובה, פורמט) מתוך הכותרת בלבד – PIL לא מפענח את הפיקסלים כאן."""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            return im.size + (im.format,)
+    except Exception:
+        raise UploadRejected("Unsupported or corrupt image")
+
+
+def read_image_header(data):
+    """מחזיר (רוחב, גובה) מתוך הכותרת בלבד."""
+    return read_image_info(data)[:2]
+
+
+def check_image(data, max_bytes=MAX_GLYPH_BYTES, max_pixels=MAX_GLYPH_PIXELS):
+    """בודק גודל ומידות לפני שמפענחים; מחזיר את הבאפר כמו שהוא."""
+    if len(data) > max_bytes:
+        raise UploadRejected(f"Upload too large ({len(data)} > {max_bytes} bytes)", 413)
+    width, height = read_image_header(data)
+    if width * height > max_pixels:
+        raise UploadRejected(f"Image too large ({width}x{height} > {max_pixels} pixels)", 413)
+    return data
+
+
+def reduced_factor(size, min_side):
+    """פקטור ההקטנה הגדול ביותר (1/2/4/8) שעדיין משאיר לצלע הקצרה לפחות min_side פיקסלים."""
+    for factor in (8, 4, 2):
+        if min(size) // factor >= min_side:
+            return factor
+    return 1
+
+
+def decode_upload(data, min_side=None, grayscale=False,
+                  max_bytes=MAX_IMAGE_BYTES, max_pixels=MAX_IMAGE_PIXELS):
+    """
+    שלב הקליטה של תמונה שלמה: בדיקת גודל ומידות מהכותרת, ואז פענוח יחיד למערך
+    שכל השלבים הבאים משתמשים בו. min_side – הרזולוציה שהשלבים הבאים צריכים באמת;
+    ב-JPEG הפענוח עצמו מוקטן (IMREAD_REDUCED_*) כשאפשר.
+    """
+    import cv2
+    import numpy as np
+
+    if len(data) > max_bytes:
+        raise UploadRejected(f"Upload too large ({len(data)} > {max_bytes} bytes)", 413)
+    width, height, fmt = read_image_info(data)
+    if width * height > max_pixels:
+        raise UploadRejected(f"Image too large ({width}x{height} > {max_pixels} pixels)", 413)
+
+    factor = reduced_factor((width, height), min_side) if min_side and fmt == "JPEG" else 1
+    with stage("decode_upload", bytes_in=len(data)) as rec:
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), getattr(cv2, _REDUCED_FLAGS[factor][int(grayscale)]))
+        if image is None:
+            raise UploadRejected("Unsupported or corrupt image")
+        rec.bytes_out = image.nbytes
+    return image
@@ -0,0 +1,222 @@
+import os
+import hmac
+import time
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+
+# גבולות ההיסטוגרמה (בשניות) לזמן קיר של כל שלב
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")
+# /metrics פתוח רק עם Authorization: Bearer <METRICS_TOKEN>; בלי טוקן הנקודה כבויה.
+# לא בכתובת (?token=) – לוג הגישה של gunicorn כותב את כל ה-query string
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "exports", "profiles"))
+
+_lock = threading.Lock()
+_stages = {}
+_jobs = {"jobs_total": 0, "glyphs_total": 0, "contours_total": 0, "points_total": 0,
+         "simplify_points_in_total": 0, "simplify_points_out_total": 0}
+_last_job = {}
+
+
+class _Stats:
+    __slots__ = ("count", "wall", "cpu", "bytes_in", "bytes_out", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.buckets = [0] * len(BUCKETS)
+
+
+def observe(name, wall, cpu=0.0, bytes_in=0, bytes_out=0, kind="stage"):
+    """רושם מדידה אחת של שלב/מסלול."""
+    with _lock:
+        stats = _stages.get((kind, name))
+        if stats is None:
+            stats = _stages[(kind, name)] = _Stats()
+        stats.count += 1
+        stats.wall += wall
+        stats.cpu += cpu
+        stats.bytes_in += bytes_in or 0
+        stats.bytes_out += bytes_out or 0
+        for i, bound in enumerate(BUCKETS):
+            if wall <= bound:
+                stats.buckets[i] += 1
+
+
+class _Record:
+    def __init__(self, bytes_in):
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+
+
+@contextmanager
+def stage(name, bytes_in=0):
+    """
+    מודד זמן קיר, זמן CPU (של ה-thread) ובתים נכנסים/יוצאים של שלב בצינור.
+    אפשר לעדכן את record.bytes_out בתוך הבלוק.
+    """
+    record = _Record(bytes_in)
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    try:
+        yield record
+    finally:
+        observe(name, time.perf_counter() - wall_start, time.thread_time() - cpu_start,
+                record.bytes_in, record.bytes_out)
+
+
+def record_job(glyphs, contours, points):
+    """מטא-דאטה של בניית פונט: מספר אותיות, קווי מתאר ונקודות."""
+    with _lock:
+        _jobs["jobs_total"] += 1
+        _jobs["glyphs_total"] += glyphs
+        _jobs["contours_total"] += contours
+        _jobs["points_total"] += points
+        _last_job.update(glyphs=glyphs, contours=contours, points=points)
+
+
+def record_simplify(points_in, points_out):
+    """מספר הנקודות לפני ואחרי שלב הפישוט."""
+    with _lock:
+        _jobs["simplify_points_in_total"] += points_in
+        _jobs["simplify_points_out_total"] += points_out
+
+
+def prometheus_text():
+    """כל המדדים בפורמט הטקסט של Prometheus."""
+    lines = []
+    with _lock:
+        stages = sorted(_stages.items())
+        jobs = dict(_jobs)
+        last_job = dict(_last_job)
+
+    for metric, help_text in (
+        ("font_stage_seconds", "Wall time per pipeline stage / HTTP route"),
+        ("font_stage_cpu_seconds_total", "Thread CPU time per pipeline stage / HTTP route"),
+        ("font_stage_bytes_in_total", "Bytes consumed per pipeline stage / HTTP route"),
+        ("font_stage_bytes_out_total", "Bytes produced per pipeline stage / HTTP route"),
+    ):
+        kind_type = "histogram" if metric == "font_stage_seconds" else "counter"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind_type}")
+        for (kind, name), stats in stages:
+            labels = f'kind="{kind}",name="{name}"'
+            if metric == "font_stage_seconds":
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f"{metric}_sum{{{labels}}} {stats.wall:.6f}")
+                lines.append(f"{metric}_count{{{labels}}} {stats.count}")
+            elif metric == "font_stage_cpu_seconds_total":
+                lines.append(f"{metric}{{{labels}}} {stats.cpu:.6f}")
+            elif metric == "font_stage_bytes_in_total":
+                lines.append(f"{metric}{{{labels}}} {stats.bytes_in}")
+            else:
+                lines.append(f"{metric}{{{labels}}} {stats.bytes_out}")
+
+    for key, value in jobs.items():
+        lines.append(f"# TYPE font_{key} counter")
+        lines.append(f"font_{key} {value}")
+    for key, value in last_job.items():
+        lines.append(f"# TYPE font_last_job_{key} gauge")
+        lines.append(f"font_last_job_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _ProfiledBody:
+    """
+    גוף התגובה של בקשה בפרופיל: גם האיטרציה נמדדת (קבצים ב-send_file נקראים רק כאן),
+    ו-close() מועבר לגוף המקורי – אחרת ה-handle של הקובץ נשאר פתוח.
+    """
+
+    def __init__(self, body, profiler, on_close):
+        self._body = body
+        self._profiler = profiler
+        self._on_close = on_close
+
+    def __iter__(self):
+        chunks = iter(self._body)
+        while True:
+            self._profiler.enable()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                self._profiler.disable()
+            yield chunk
+
+    def close(self):
+        try:
+            close = getattr(self._body, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._on_close()
+
+
+class ProfileMiddleware:
+    """
+    cProfile לבקשה בודדת לפי דרישה: ?profile=<PROFILE_TOKEN> בכתובת.
+    התוצאה נשמרת כקובץ .prof ב-PROFILE_DIR ו-20 הפונקציות הכבדות מודפסות ללוג,
+    כשהשרת סוגר את התגובה.
+    """
+
+    def __init__(self, wsgi_app, token=PROFILE_TOKEN, profile_dir=PROFILE_DIR):
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.profile_dir = profile_dir
+
+    def __call__(self, environ, start_response):
+        if not self.token or parse_qs(environ.get("QUERY_STRING", "")).get("profile") != [self.token]:
+            return self.wsgi_app(environ, start_response)
+
+        profiler = cProfile.Profile()
+        body = profiler.runcall(self.wsgi_app, environ, start_response)
+        return _ProfiledBody(body, profiler, lambda: self._dump(profiler, environ))
+
+    def _dump(self, profiler, environ):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        route = environ.get("PATH_INFO", "/").strip("/").replace("/", "_") or "index"
+        path = os.path.join(self.profile_dir, f"{int(time.time() * 1000)}_{route}.prof")
+        profiler.dump_stats(path)
+        print(f"🔬 פרופיל נשמר: {path}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+def init_app(app):
+    """מדידת זמן לכל מסלול HTTP, נקודת /metrics ו-cProfile לפי דרישה."""
+    from flask import request, g, Response
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = (time.perf_counter(), time.thread_time())
+
+    @app.after_request
+    def _stop_timer(response):
+        start = getattr(g, "_metrics_start", None)
+        if start is not None:
+            observe(request.url_rule.rule if request.url_rule else "<unmatched>",
+                    time.perf_counter() - start[0], time.thread_time() - start[1],
+                    request.content_length or 0, response.content_length or 0, kind="route")
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        if not METRICS_TOKEN:
+            return Response("Not Found", status=404)
+        auth = request.headers.get("Authorization", "")
+        token = auth[len("Bearer "):] if auth.startswith("Bearer ") else None
+        if not token or not hmac.compare_digest(token, METRICS_TOKEN):
+            return Response("Forbidden", status=403)
+        return Response(prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+    app.wsgi_app = ProfileMiddleware(app.wsgi_app)
+    return app
@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    """התור מלא – השרת מחזיר 429 והלקוח מנסה שוב מאוחר יותר."""
+
+
+class QueueClosed(Exception):
+    """התור נסגר (תהליך השרת מתחלף) – השרת מחזיר 503 והלקוח מנסה שוב בתהליך אחר."""
+
+
+class Job:
+    def __init__(self, job_id, kind):
+        self.id = job_id
+        self.kind = kind
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    def to_dict(self):
+        now = time.time()
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "queued_seconds": round((self.started or now) - self.created, 3),
+        }
+        if self.started:
+            data["run_seconds"] = round((self.finished or now) - self.started, 3)
+        if self.error:
+            data["message"] = self.error
+        return data
+
+    def to_state(self):
+        return {"id": self.id, "kind": self.kind, "status": self.status, "created": self.created,
+                "started": self.started, "finished": self.finished, "error": self.error}
+
+    @classmethod
+    def from_state(cls, state):
+        job = cls(state["id"], state["kind"])
+        for field in ("status", "created", "started", "finished", "error"):
+            setattr(job, field, state[field])
+        return job
+
+
+class JobQueue:
+    """
+    תור עבודות מקומי בתוך התהליך: מאגר עובדים חסום ומגבלת עומק.
+    submit מחזיר מיד Job עם מזהה; המצב נבדק דרך get.
+    state_dir – תיקייה משותפת שבה נשמר המצב של כל עבודה בכל מעבר, כך שכשהשרת רץ בכמה
+    תהליכים (gunicorn), תהליך אחר מהזה שהריץ את העבודה יכול לענות על get.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, keep_seconds=3600, state_dir=None):
+        self.max_pending = max_pending
+        self.keep_seconds = keep_seconds
+        self.state_dir = state_dir
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="font-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _pending(self):
+        return sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < cutoff]:
+            del self._jobs[job_id]
+        if self.state_dir:
+            # כולל קבצים של תהליכים שכבר לא קיימים
+            for fname in os.listdir(self.state_dir):
+                path = os.path.join(self.state_dir, fname)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+    def _state_path(self, job_id):
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _save(self, job):
+        """כתיבה אטומית (קובץ זמני + החלפה), כדי שתהליך אחר לא יקרא קובץ חצי כתוב."""
+        if not self.state_dir:
+            return
+        path = self._state_path(job.id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(job.to_state(), fh)
+        os.replace(tmp_path, path)
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        מוסיף עבודה לתור. התוצאה של fn לא נשמרת – רק המצב והזמנים; עבודה שמייצרת
+        קובץ (כמו בניית הפונט) שומרת אותו בעצמה.
+        """
+        with self._lock:
+            # הבדיקה וההגשה למאגר תחת אותו מנעול, כך ש-shutdown לא נכנס באמצע
+            # ולא נשארת עבודה "queued" שאף אחד לא יריץ
+            if self._closed:
+                raise QueueClosed("Job queue is shutting down")
+            self._prune()
+            if self._pending() >= self.max_pending:
+                raise QueueFull(f"Too many pending jobs ({self.max_pending})")
+            job = Job(uuid.uuid4().hex, kind)
+            self._jobs[job.id] = job
+            self._save(job)
+            self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.started = time.time()
+        job.status = "running"
+        self._save(job)
+        try:
+            fn(*args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            self._save(job)
+            print(f"🧵 עבודה {job.kind} {job.id[:8]} – {job.status} "
+                  f"({job.finished - job.started:.2f}s, המתנה {job.started - job.created:.2f}s)")
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.state_dir and job_id.isalnum():
+            try:
+                with open(self._state_path(job_id), encoding="utf-8") as fh:
+                    job = Job.from_state(json.load(fh))
+            except (OSError, ValueError, KeyError):
+                return None
+        return job
+
+    def shutdown(self, wait=True):
+        """
+        עצירה מסודרת (כשתהליך השרת מתחלף): עבודות שכבר רצות מסתיימות,
+        ועבודות שעוד בתור מסומנות כשגיאה כדי שהלקוח ינסה שוב במקום לחכות לנצח.
+        """
+        with self._lock:
+            self._closed = True
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            queued = [job for job in self._jobs.values() if job.status == "queued"]
+        for job in queued:
+            job.status = "error"
+            job.error = "Server restarting, please try again"
+            job.finished = time.time()
+            self._save(job)
+        self._executor.shutdown(wait=wait)
@@ -1,43 +1,28 @@
 import os
 import cv2
 import numpy as np
-import shutil
+from resolution import reduce, keep_factor
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def convert_to_black_white(input_path, output_path, filename=None):
-    """
-    קורא את התמונה כמו שהיא, רק שומר או מעבד במידת הצורך (כאן לא משנה צבע).
-    """
-    img = cv2.imread(input_path)
-    if img is None:
-        raise ValueError(f"Cannot read image: {input_path}")
-
-    # שמירה ישירה בלי המרה
-    cv2.imwrite(output_path, img)
-    print(f"[OK] Image saved without BW conversion to: {output_path}")
-
-    if filename:
-        static_uploads = os.path.join(BASE_DIR, 'static', 'uploads')
-        os.makedirs(static_uploads, exist_ok=True)
-        shutil.copy(output_path, os.path.join(static_uploads, filename))
-        print(f"[OK] Copied to static/uploads/{filename}")
-
-    return output_path
-
+# ===== נרמול תמונת אות =====
+TARGET_SIZE = 600
+MARGIN = 50
 
 
-def normalize_and_center_glyph(input_path, output_path, filename=None, target_size=600, margin=50, vertical_offset=0):
+def normalize_glyph(img, target_size=TARGET_SIZE, margin=MARGIN, vertical_offset=0):
     """
-    מנרמל ומרכז את התמונה בצבע המקורי בלי המרה לשחור-לבן.
+    מנרמל ומרכז מערך תמונה (בצבע המקורי) על קנבס לבן בגודל target_size.
     """
-    img = cv2.imread(input_path)
-    if img is None:
-        raise ValueError(f"Cannot read image: {input_path}")
+    max_dim = target_size - 2 * margin
+    # הקטנה גסה בפקטור שלם (ממוצע בלוקים, מהיר) כך שבצלע הארוכה – זו שנמתחת ל-max_dim –
+    # נשארים לפחות max_dim פיקסלים, ורק אחריה ההקטנה המדויקת – במקום INTER_AREA בפקטור
+    # שבור על כל התמונה (השוליים שלא מתחלקים בפקטור נחתכים – פחות מפיקסל אחד אחרי
+    # ההקטנה – במקום ריפוד לבן)
+    factor = keep_factor(max(img.shape[:2]), max_dim)
+    img = reduce(img[:img.shape[0] // factor * factor, :img.shape[1] // factor * factor], factor).image
 
     h, w = img.shape[:2]
-
-    max_dim = target_size - 2 * margin
     scale = min(max_dim / w, max_dim / h)
     new_w, new_h = int(w * scale), int(h * scale)
 
@@ -49,14 +34,4 @@ def normalize_and_center_glyph(input_path, output_path, filename=None, target_si
     y_off = (target_size - new_h) // 2 + vertical_offset
 
     canvas[y_off:y_off+new_h, x_off:x_off+new_w] = resized
-
-    cv2.imwrite(output_path, canvas)
-    print(f"[OK] Normalized color glyph saved to: {output_path}")
-
-    if filename:
-        static_uploads = os.path.join(BASE_DIR, 'static', 'uploads')
-        os.makedirs(static_uploads, exist_ok=True)
-        shutil.copy(output_path, os.path.join(static_uploads, filename))
-        print(f"[OK] Copied to static/uploads/{filename}")
-
-    return output_path
+    return canvas
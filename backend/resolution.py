@@ -0,0 +1,70 @@
+import os
+from collections import namedtuple
+
+import cv2
+
+# ===== רזולוציות עבודה =====
+# איתור תיבות רץ על עותק שהצלע הארוכה שלו לא עולה על DETECT_MAX_SIDE
+# (הספים בפיקסלים של find_letter_boxes מכוונים לגיליון של בערך 1300–1600 פיקסלים,
+# ומתחת ל-1000 אותיות מפוצלות כבר לא מתמזגות);
+# מעקב רץ על עותק שבו הצלע הארוכה של האות לפחות GLYPH_TRACE_SIZE (ופחות מפי שניים ממנה).
+# בפונט של 1000 יחידות לאם, 400 פיקסלים לאות הם בערך 2–3 יחידות לפיקסל – מעבר לזה אין מה להרוויח.
+DETECT_MAX_SIDE = int(os.environ.get("DETECT_MAX_SIDE", "1600"))
+GLYPH_TRACE_SIZE = int(os.environ.get("GLYPH_TRACE_SIZE", "400"))
+
+# עותק מוקטן של תמונה: כל פיקסל בו הוא בדיוק בלוק factor×factor של המקור.
+# pad_top – שורות לבנות שנוספו מעל המקור כדי שהגובה יתחלק ב-factor.
+WorkingImage = namedtuple("WorkingImage", ["image", "factor", "pad_top"])
+
+
+def fit_factor(shape, max_side=DETECT_MAX_SIDE):
+    """הפקטור השלם הקטן ביותר שמביא את הצלע הארוכה ל-max_side לכל היותר."""
+    return max(1, -(-max(shape[:2]) // max_side))
+
+
+def keep_factor(size, min_size=GLYPH_TRACE_SIZE):
+    """הפקטור השלם הגדול ביותר שמשאיר לפחות min_size פיקסלים (size – הצלע הארוכה)."""
+    return max(1, int(size) // min_size)
+
+
+def trace_factor(shape, min_size=GLYPH_TRACE_SIZE):
+    """פקטור ההקטנה לפני מעקב של תמונת אות אחת."""
+    return keep_factor(max(shape[:2]), min_size)
+
+
+def reduce(image, factor, pad_top=False):
+    """
+    הקטנה בפקטור שלם עם INTER_AREA: קודם ריפוד לבן עד כפולה של factor, כך שכל פיקסל
+    בעותק הוא ממוצע של בלוק מלא במקור והמיפוי חזרה מדויק.
+    ברירת המחדל מרפדת למטה ומימין (קואורדינטות מהפינה העליונה נשמרות);
+    pad_top=True מרפד למעלה, כך שקו התחתית נשמר – לזה מצפה trace_bitmap עם scale,
+    שסופר Y מלמטה.
+    """
+    if factor <= 1:
+        return WorkingImage(image, 1, 0)
+    h, w = image.shape[:2]
+    extra_y, extra_x = -h % factor, -w % factor
+    top, bottom = (extra_y, 0) if pad_top else (0, extra_y)
+    if extra_y or extra_x:
+        white = (255,) * (image.shape[2] if image.ndim == 3 else 1)
+        image = cv2.copyMakeBorder(image, top, bottom, 0, extra_x, cv2.BORDER_CONSTANT, value=white)
+    size = (image.shape[1] // factor, image.shape[0] // factor)
+    return WorkingImage(cv2.resize(image, size, interpolation=cv2.INTER_AREA), factor, top)
+
+
+def box_to_full(box, working, shape):
+    """תיבה (x, y, w, h) בעותק → התיבה המדויקת שהיא מכסה במקור, חתוכה לגבולות התמונה."""
+    x, y, w, h = box
+    f = working.factor
+    x0, y0 = max(x * f, 0), max(y * f - working.pad_top, 0)
+    x1, y1 = min((x + w) * f, shape[1]), min((y + h) * f - working.pad_top, shape[0])
+    return (int(x0), int(y0), int(max(x1 - x0, 0)), int(max(y1 - y0, 0)))
+
+
+def box_to_working(box, working):
+    """תיבה במקור → התיבה הקטנה ביותר בעותק שמכסה אותה כולה."""
+    x, y, w, h = box
+    f = working.factor
+    x0, y0 = x // f, (y + working.pad_top) // f
+    x1, y1 = -(-(x + w) // f), -(-(y + h + working.pad_top) // f)
+    return (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
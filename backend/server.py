@@ -1,20 +1,21 @@
+import startup
 import os
+import io
 import base64
-import shutil
-import requests
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify
 from flask import send_file
 from werkzeug.utils import secure_filename
-from urllib.parse import parse_qs, urlencode
-from email.message import EmailMessage
-import smtplib
+from urllib.parse import parse_qs
 from datetime import datetime
 
-# פונקציות עיבוד
-from process_image import convert_to_black_white, normalize_and_center_glyph
-from generate_font import generate_ttf
-from svg_converter import convert_png_to_svg
-from bw_converter import convert_to_bw
+# מודולי העיבוד (OpenCV, NumPy, fontTools, ufo2ft) ו-requests נטענים בתוך המסלולים שצריכים
+# אותם, כך שדפים סטטיים ו-/healthz עונים מיד אחרי עליית התהליך (ראו startup)
+from glyph_cache import GlyphCache, FontCache, cache_key
+from jobs import JobQueue, QueueFull, QueueClosed
+from workspace import WorkspaceManager, QuotaExceeded
+import instrumentation
+from glyph_sets import ACTIVE_GLYPH_SET
+from ingest import UploadRejected, read_stream, check_image, decode_upload, MAX_BATCH_BYTES, MAX_IMAGE_BYTES
 
 # --- נתיבי בסיס ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,20 +23,21 @@ TEMPLATE_DIR = os.path.join(BASE_DIR, '..', 'frontend', 'templates')
 STATIC_DIR = os.path.join(BASE_DIR, 'static')
 
 # תיקיות עבודה
-UPLOADS_DIR   = os.path.join(STATIC_DIR, 'uploads')
-PROCESSED_DIR = os.path.join(STATIC_DIR, 'processed')
-GLYPHS_DIR    = os.path.join(STATIC_DIR, 'glyphs')
-BW_DIR        = os.path.join(STATIC_DIR, 'bw')
-SVG_DIR       = os.path.join(STATIC_DIR, 'svg_letters')
 EXPORT_FOLDER = os.path.join(BASE_DIR, '..', 'exports')
-FONT_OUTPUT_PATH = os.path.join(EXPORT_FOLDER, 'my_font.ttf')
 INVOICE_FOLDER = os.path.join(EXPORT_FOLDER, 'invoices')
+GLYPH_CACHE_DIR = os.path.join(EXPORT_FOLDER, 'glyph_cache')
+WORKSPACES_DIR = os.path.join(EXPORT_FOLDER, 'workspaces')
+JOBS_DIR = os.path.join(EXPORT_FOLDER, 'jobs')
 
-for d in (UPLOADS_DIR, PROCESSED_DIR, GLYPHS_DIR, BW_DIR, SVG_DIR, EXPORT_FOLDER, INVOICE_FOLDER):
+for d in (EXPORT_FOLDER, INVOICE_FOLDER, GLYPH_CACHE_DIR, WORKSPACES_DIR, JOBS_DIR):
     os.makedirs(d, exist_ok=True)
 
 app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')  # session
+# גוף בקשה מעל המגבלה נדחה ב-413 עוד לפני שנקרא (הגבול הגדול מבין ההעלאות + שוליים ל-multipart)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get(
+    'MAX_REQUEST_BYTES', str(max(MAX_BATCH_BYTES, MAX_IMAGE_BYTES) + 1024 * 1024)))
+instrumentation.init_app(app)
 
 # ----------------------
 # 📌 פרטי קארדקום
@@ -51,13 +53,65 @@ EMAIL_PASSWORD = os.environ.get("EMAIL_PASSWORD")
 EMAIL_SERVER = "smtp.gmail.com"
 EMAIL_PORT = 587
 
-# סדר האותיות
-LETTERS_ORDER = [
-    "alef","bet","gimel","dalet","he","vav","zayin","het","tet",
-    "yod","kaf","lamed","mem","nun","samekh","ayin","pe","tsadi",
-    "qof","resh","shin","tav","finalkaf","finalmem","finalnun",
-    "finalpe","finaltsadi"
-]
+# סדר האותיות – מקבוצת האותיות הפעילה ברישום (GLYPH_SET, ברירת מחדל: hebrew)
+LETTERS_ORDER = list(ACTIVE_GLYPH_SET.names)
+
+# קווי המתאר נשמרים במטמון משותף לפי תוכן; האותיות – בסביבת עבודה לכל session
+GLYPH_CACHE = GlyphCache(
+    GLYPH_CACHE_DIR,
+    ttl_seconds=int(os.environ.get("GLYPH_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_files=int(os.environ.get("GLYPH_CACHE_MAX_FILES", "20000")),
+)
+# פונטים בנויים נשמרים בזיכרון בלבד, לפי hash של קבוצת האותיות
+FONT_CACHE = FontCache(int(os.environ.get("FONT_CACHE_MB", "64")) * 1024 * 1024)
+WORKSPACES = WorkspaceManager(
+    WORKSPACES_DIR, GLYPH_CACHE, FONT_CACHE,
+    ttl_seconds=int(os.environ.get("WORKSPACE_TTL_SECONDS", str(6 * 3600))),
+    quota_bytes=int(os.environ.get("WORKSPACE_QUOTA_MB", "50")) * 1024 * 1024,
+    total_quota_bytes=int(os.environ.get("WORKSPACES_TOTAL_QUOTA_MB", "2048")) * 1024 * 1024,
+)
+
+# תור בניית פונטים – הבנייה רצה ברקע, הדפדפן שואל על המצב.
+# המצב נשמר גם בדיסק, כי תחת gunicorn השאלה יכולה להגיע לתהליך אחר מזה שבונה
+FONT_JOBS = JobQueue(
+    max_workers=int(os.environ.get("FONT_BUILD_WORKERS", "2")),
+    max_pending=int(os.environ.get("FONT_QUEUE_DEPTH", "16")),
+    state_dir=JOBS_DIR,
+)
+
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({"error": f"Upload too large (> {app.config['MAX_CONTENT_LENGTH']} bytes)"}), 413
+
+
+def current_workspace():
+    """סביבת העבודה של ה-session הנוכחי (נוצרת בפעם הראשונה)."""
+    if not session.get('workspace'):
+        session['workspace'] = WORKSPACES.new_id()
+    return WORKSPACES.get(session['workspace'])
+
+
+def font_is_ready():
+    if 'font_ready' in session:
+        return session['font_ready']
+    if not session.get('workspace'):
+        return False
+    return current_workspace().has_final(LETTERS_ORDER)
+
+
+# פורמטי הורדה: flavor של fontTools, סוג MIME וסיומת
+FONT_FORMATS = {
+    "ttf": (None, "font/ttf", "ttf"),
+    "woff2": ("woff2", "font/woff2", "woff2"),
+}
+
+
+def send_font(etag, data, fmt, download_name, as_attachment=True):
+    """מגיש פונט מהזיכרון עם ETag, כך שבקשה חוזרת עם If-None-Match מקבלת 304."""
+    _, mimetype, ext = FONT_FORMATS[fmt]
+    return send_file(io.BytesIO(data), mimetype=mimetype, as_attachment=as_attachment,
+                     download_name=f"{download_name}.{ext}", etag=etag, conditional=True, max_age=0)
 
 # ----------------------
 # פונקציות יצירת חשבונית
@@ -109,7 +163,7 @@ def create_invoice_payload(name, email, total_sum=24.90):
 # ----------------------
 @app.route('/')
 def index():
-    font_ready = session.get('font_ready', os.path.exists(FONT_OUTPUT_PATH))
+    font_ready = font_is_ready()
     return render_template('index.html', font_ready=font_ready)
 
 # ----------------------
@@ -117,6 +171,9 @@ def index():
 # ----------------------
 @app.route('/upload', methods=['POST'])
 def upload():
+    import cv2
+    from process_image import normalize_glyph, TARGET_SIZE, MARGIN
+
     if 'image' not in request.files:
         return render_template('index.html', error='לא נשלח קובץ')
 
@@ -124,17 +181,28 @@ def upload():
     if f.filename == '':
         return render_template('index.html', error='לא נבחר קובץ')
 
-    filename = secure_filename(f.filename)
-    input_path = os.path.join(UPLOADS_DIR, filename)
-    f.save(input_path)
-
-    bw_name = f"bw_{filename}"
-    bw_path = os.path.join(PROCESSED_DIR, bw_name)
-    convert_to_black_white(input_path, bw_path, filename=bw_name)
-
-    processed_name = f"proc_{filename}"
-    processed_path = os.path.join(PROCESSED_DIR, processed_name)
-    normalize_and_center_glyph(input_path, processed_path, filename=processed_name)
+    # קליטה: פענוח אחד (מוקטן כבר בפענוח כשזה JPEG גדול) ישר מה-stream,
+    # בלי לשמור את המקור ובלי עותקים – נכתב רק הקובץ המנורמל שדף החיתוך מציג
+    try:
+        data = read_stream(f.stream, max_bytes=MAX_IMAGE_BYTES)
+        img = decode_upload(data, min_side=TARGET_SIZE - 2 * MARGIN)
+    except UploadRejected as e:
+        return render_template('index.html', error=str(e)), e.status
+    del data
+
+    stem, ext = os.path.splitext(secure_filename(f.filename))
+    if ext.lower() not in ('.png', '.jpg', '.jpeg', '.webp', '.bmp'):
+        ext = '.png'
+    processed_name = f"proc_{stem}{ext}"
+    ok, encoded = cv2.imencode(ext, normalize_glyph(img))
+    if not ok:
+        return render_template('index.html', error='לא ניתן לשמור את התמונה'), 500
+    try:
+        # התמונה נשמרת בסביבת העבודה של ה-session ולא ב-static, ומוגשת דרך /uploads
+        current_workspace().save_upload(processed_name, encoded.tobytes(), quota_bytes=WORKSPACES.quota_bytes)
+    except QuotaExceeded as e:
+        return render_template('index.html', error=str(e)), 413
+    print(f"[OK] Normalized color glyph saved to workspace: {processed_name}")
 
     session['last_filename'] = processed_name
     return redirect(url_for('crop', filename=processed_name))
@@ -148,69 +216,266 @@ def crop():
     if not filename:
         return render_template('crop.html', error="אין תמונה זמינה לחיתוך")
 
-    path_check = os.path.join(UPLOADS_DIR, filename)
-    if not os.path.exists(path_check):
+    if current_workspace().upload_path(filename) is None:
         return render_template('crop.html', error="התמונה המבוקשת לא נמצאה בדיסק")
 
-    font_ready = session.get('font_ready', os.path.exists(FONT_OUTPUT_PATH))
-    return render_template('crop.html', filename=filename, font_ready=font_ready)
+    font_ready = font_is_ready()
+    return render_template('crop.html', filename=filename, font_ready=font_ready,
+                           letters=ACTIVE_GLYPH_SET.labels())
+
+
+@app.route('/uploads/<path:filename>')
+def uploaded_image(filename):
+    """תמונה שהועלתה – רק מסביבת העבודה של ה-session הנוכחי."""
+    path = current_workspace().upload_path(filename)
+    if path is None:
+        return "התמונה לא נמצאה", 404
+    return send_file(path)
 
 # ----------------------
 # ✂️ שמירת אות חתוכה
 # ----------------------
+def store_glyph(ws, index, binary):
+    from glyph_pipeline import outline_from_buffer
+
+    eng_name = LETTERS_ORDER[index]
+    check_image(binary)
+    # מכסה ומטמון לפני המעקב – הוא החלק היקר, ואין טעם לעקוב אחרי אות שלא תישמר או שכבר עקבנו אחריה
+    ws.check_quota(len(binary), WORKSPACES.quota_bytes)
+    key = cache_key(eng_name, binary)
+    if GLYPH_CACHE.get(key) is None:
+        GLYPH_CACHE.put(key, outline_from_buffer(binary, eng_name, debug_dirs=ws.debug_dirs))
+
+    # שומרים רק את המקור, כדי שאפשר יהיה לבנות מחדש אחרי הפעלה מחדש
+    ws.save_glyph(eng_name, binary, quota_bytes=WORKSPACES.quota_bytes)
+    return f"{eng_name}.png"
+
+
+def font_preview_url(ws):
+    """כתובת התצוגה החיה; v משתנה עם קבוצת האותיות, כך שהדפדפן טוען מחדש רק כשמשהו השתנה."""
+    return url_for('font_preview', v=ws.glyph_set_digest(LETTERS_ORDER)[:16])
+
+
 @app.route('/backend/save_crop', methods=['POST'])
 def save_crop():
     try:
         data = request.get_json()
         index = int(data.get('index'))
-        eng_name = LETTERS_ORDER[index]
 
         _, b64 = data.get('data').split(',', 1)
         binary = base64.b64decode(b64)
-        tmp_path = os.path.join(PROCESSED_DIR, f"tmp_{eng_name}.png")
-        with open(tmp_path, 'wb') as fh:
-            fh.write(binary)
-
-        out_path = os.path.join(GLYPHS_DIR, f"{eng_name}.png")
-        shutil.copy(tmp_path, out_path)
 
-        bw_out = os.path.join(BW_DIR, f"{eng_name}.png")
-        shutil.copy(tmp_path, bw_out)
+        ws = current_workspace()
+        return {"saved": store_glyph(ws, index, binary), "font_preview_url": font_preview_url(ws)}
+    except (QuotaExceeded, UploadRejected) as e:
+        return {"error": str(e)}, getattr(e, "status", 413)
+    except Exception as e:
+        return {"error": str(e)}, 500
 
-        svg_out = os.path.join(SVG_DIR, f"{eng_name}.svg")
-        convert_png_to_svg(bw_out, svg_out)
 
-        return {"saved": f"{eng_name}.png"}
+@app.route('/backend/save_crop/<int:index>', methods=['POST'])
+def save_crop_binary(index):
+    """
+    אות אחת כגוף בינארי (application/octet-stream / image/png) או כקובץ multipart בשם image.
+    """
+    try:
+        if index >= len(LETTERS_ORDER):
+            return {"error": f"אינדקס לא חוקי: {index}"}, 400
+        f = request.files.get('image')
+        stream = f.stream if f is not None else request.stream
+        binary = read_stream(stream, content_length=None if f is not None else request.content_length)
+        ws = current_workspace()
+        return {"saved": store_glyph(ws, index, binary), "font_preview_url": font_preview_url(ws)}
+    except (QuotaExceeded, UploadRejected) as e:
+        return {"error": str(e)}, getattr(e, "status", 413)
     except Exception as e:
         return {"error": str(e)}, 500
 
+
+@app.route('/backend/save_crops', methods=['POST'])
+def save_crops():
+    """
+    הרבה אותיות בבקשה אחת: multipart שבו שם כל שדה קובץ הוא אינדקס האות.
+    מחזיר תוצאה לכל אות בנפרד.
+    """
+    if request.content_length and request.content_length > MAX_BATCH_BYTES:
+        return {"error": f"Upload too large (> {MAX_BATCH_BYTES} bytes)"}, 413
+
+    # קודם בדיקות, מכסה ומטמון לכל שדה; אחר כך כל האותיות החסרות במטמון נשלחות
+    # למעקב בבת אחת (GLYPH_CACHE.outlines_for – מאגר התהליכים), כמו ב-upload_sheet
+    ws = current_workspace()
+    results, sources, over_quota = [], {}, False
+    for field, f in request.files.items(multi=True):
+        entry = {"index": field}
+        results.append(entry)
+        if over_quota:
+            entry["error"] = "Workspace is over its disk quota"
+            continue
+        try:
+            index = int(field)
+            if not 0 <= index < len(LETTERS_ORDER):
+                raise UploadRejected(f"אינדקס לא חוקי: {index}")
+            binary = read_stream(f.stream)
+            check_image(binary)
+            pending = sum(len(data) for data in sources.values())
+            ws.check_quota(pending + len(binary), WORKSPACES.quota_bytes)
+        except QuotaExceeded as e:
+            entry["error"] = str(e)
+            over_quota = True
+            continue
+        except Exception as e:
+            entry["error"] = str(e)
+            continue
+        entry["name"] = LETTERS_ORDER[index]
+        sources[entry["name"]] = binary
+
+    outlines, _, errors = GLYPH_CACHE.outlines_for(sources)
+    for entry in results:
+        name = entry.pop("name", None)
+        if name is None:
+            continue
+        if name in outlines:
+            # שומרים רק את המקור, כדי שאפשר יהיה לבנות מחדש אחרי הפעלה מחדש
+            ws.save_glyph(name, sources[name])
+            entry["saved"] = f"{name}.png"
+        else:
+            entry["error"] = errors.get(name, "המעקב נכשל")
+
+    if over_quota:
+        return {"results": results}, 413
+    return {"results": results, "font_preview_url": font_preview_url(ws)}
+
+# ----------------------
+# 📄 גיליון שלם – חיתוך, סף ומעקב לכל האותיות בבקשה אחת
+# ----------------------
+@app.route('/backend/upload_sheet', methods=['POST'])
+def upload_sheet():
+    from glyph_pipeline import split_sheet, render_sheet_preview
+
+    f = request.files.get('image')
+    if f is None or f.filename == '':
+        return jsonify({"error": "לא נשלח קובץ"}), 400
+
+    try:
+        gray = decode_upload(read_stream(f.stream, max_bytes=MAX_IMAGE_BYTES), grayscale=True)
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status
+
+    ws = current_workspace()
+    # גיליון שאי אפשר לחלק (תמונה מנוונת, סף שנכשל) – 422; כל תקלה אחרת בעיבוד – 400, כמו ב-save_crops
+    try:
+        pieces = split_sheet(gray, LETTERS_ORDER)
+        sources = {name: data for name, _, data in pieces if data}
+        outlines, _, errors = GLYPH_CACHE.outlines_for(sources)
+    except ValueError as e:
+        return jsonify({"error": str(e) or "לא ניתן לחלק את הגיליון לאותיות"}), 422
+    except Exception as e:
+        return jsonify({"error": str(e) or type(e).__name__}), 400
+
+    glyphs = []
+    try:
+        for index, (name, (x, y, w, h), data) in enumerate(pieces):
+            entry = {"index": index, "name": name, "box": [x, y, w, h]}
+            if name in outlines:
+                ws.save_glyph(name, data, quota_bytes=WORKSPACES.quota_bytes)
+                entry["saved"] = f"{name}.png"
+            else:
+                entry["error"] = errors.get(name, "חיתוך ריק")
+            glyphs.append(entry)
+        ws.save_sheet_preview(render_sheet_preview(gray, pieces), quota_bytes=WORKSPACES.quota_bytes)
+    except QuotaExceeded as e:
+        return jsonify({"error": str(e)}), 413
+
+    return jsonify({
+        "glyphs": glyphs,
+        "saved": sum(1 for g in glyphs if "saved" in g),
+        "preview_url": url_for('sheet_preview'),
+        "font_preview_url": font_preview_url(ws),
+    })
+
+
+@app.route('/backend/sheet_preview')
+def sheet_preview():
+    path = current_workspace().sheet_preview_path
+    if not os.path.exists(path):
+        return "אין תצוגה מקדימה", 404
+    return send_file(path, mimetype="image/jpeg")
+
+
+# התבנית תלויה רק בקבוצת האותיות וב-DPI – נבנית פעם אחת לכל תהליך
+_TEMPLATE_FILES = {}
+
+
+@app.route('/backend/template_sheet')
+def template_sheet():
+    fmt = request.args.get('format', 'pdf')
+    if fmt not in ('pdf', 'png'):
+        return jsonify({"error": "פורמט לא נתמך"}), 400
+    if fmt not in _TEMPLATE_FILES:
+        import cv2
+        from template_sheet import draw_template, template_pdf
+        if fmt == 'pdf':
+            _TEMPLATE_FILES[fmt] = template_pdf(ACTIVE_GLYPH_SET)
+        else:
+            _TEMPLATE_FILES[fmt] = cv2.imencode(".png", draw_template(ACTIVE_GLYPH_SET))[1].tobytes()
+    return send_file(io.BytesIO(_TEMPLATE_FILES[fmt]), mimetype="application/pdf" if fmt == 'pdf' else "image/png",
+                     as_attachment=True, download_name=f"handwriting_template.{fmt}")
+
 # ----------------------
 # 🔠 יצירת פונט
 # ----------------------
 @app.route('/generate_font', methods=['POST'])
 def generate_font_route():
-    try:
-        generate_ttf(svg_folder=SVG_DIR, output_ttf=FONT_OUTPUT_PATH)
-
-        if os.path.exists(FONT_OUTPUT_PATH):
-            session['font_ready'] = True
-            return jsonify({
-                "status": "success",
-                "download_url": url_for('download_page')
-            })
-        else:
-            session['font_ready'] = False
-            return jsonify({
-                "status": "error",
-                "message": "❌ הפונט לא נוצר."
-            })
+    return submit_final_build()
 
-    except Exception as e:
+
+def queue_final_build():
+    """
+    בניית ה-TTF הסופי (ufo2ft) בתור העבודות ברקע – אף פעם לא בתוך thread של בקשה.
+    התוצאה נשמרת בסביבת העבודה, ו-/download_font רק מגיש אותה.
+    מחזיר (job, None), או (None, (הודעה, קוד HTTP)) כשהתור מלא או נסגר.
+    """
+    try:
+        job = FONT_JOBS.submit("generate_font", current_workspace().build, LETTERS_ORDER,
+                               profile="final")
+    except QueueFull:
+        return None, ("⏳ השרת עמוס כרגע, נסו שוב בעוד רגע.", 429)
+    except QueueClosed:
+        return None, ("🔄 השרת מתעדכן כרגע, נסו שוב בעוד רגע.", 503)
+    session['font_job'] = job.id
+    return job, None
+
+
+def submit_final_build():
+    job, error = queue_final_build()
+    if error:
+        message, status = error
+        return jsonify({"status": "error", "message": message}), status
+
+    data = job.to_dict()
+    data["status_url"] = url_for('font_job_status', job_id=job.id)
+    return jsonify(data), 202
+
+
+def wants_json():
+    """בקשת fetch שביקשה JSON במפורש (ולא ניווט של הדפדפן, ששולח text/html או */*)."""
+    return any(mimetype == "application/json" for mimetype, _ in request.accept_mimetypes)
+
+
+@app.route('/jobs/<job_id>')
+def font_job_status(job_id):
+    job = FONT_JOBS.get(job_id) if job_id == session.get('font_job') else None
+    if job is None:
+        return jsonify({"status": "error", "message": "עבודה לא נמצאה"}), 404
+
+    data = job.to_dict()
+    if job.status == "done":
+        session['font_ready'] = True
+        data["download_url"] = url_for('download_page')
+    elif job.status == "error":
         session['font_ready'] = False
-        return jsonify({
-            "status": "error",
-            "message": f"❌ שגיאה: {str(e)}"
-        })
+        data["message"] = f"❌ שגיאה: {job.error}"
+    return jsonify(data)
 
 # ----------------------
 # ⬇️ הורדת פונט
@@ -220,14 +485,52 @@ def download_font():
     if not session.get("paid"):
         return redirect(url_for('payment'))
 
-    if os.path.exists(FONT_OUTPUT_PATH):
-        return send_file(FONT_OUTPUT_PATH, as_attachment=True, download_name="my_font.ttf", mimetype="font/ttf")
-    return "הפונט עדיין לא נוצר", 404
+    fmt = request.args.get('format', 'ttf')
+    if fmt not in FONT_FORMATS:
+        return "פורמט לא נתמך", 400
+
+    # הורדה בתשלום – רק הגשה של הפונט שעבודת /generate_font בנתה. אם נשמרו אותיות מאז
+    # (או שעוד לא נבנה), הבנייה נשלחת לתור: fetch שמבקש JSON מקבל את כתובת המעקב
+    # (כמו ב-/generate_font), וניווט רגיל עובר לדף התודה, שמחכה לבנייה ואז מוריד
+    found = current_workspace().final_font(LETTERS_ORDER, flavor=FONT_FORMATS[fmt][0])
+    if found is None:
+        if not current_workspace().snapshot_sources(LETTERS_ORDER):
+            return "הפונט עדיין לא נוצר", 404
+        if wants_json():
+            return submit_final_build()
+        job, error = queue_final_build()
+        if error:
+            message, status = error
+            return render_template('thankyou.html', error=message), status
+        return redirect(url_for('thankyou', format=fmt))
+    etag, data = found
+    return send_font(etag, data, fmt, "my_font")
+
+
+@app.route('/font_preview')
+def font_preview():
+    """
+    תצוגה חיה בדפדפן, בלי תשלום: webfont (WOFF2 כברירת מחדל) מצומצם לאותיות שנשמרו עד עכשיו.
+    """
+    fmt = request.args.get('format', 'woff2')
+    if fmt not in FONT_FORMATS:
+        return "פורמט לא נתמך", 400
+    try:
+        etag, data = current_workspace().preview(LETTERS_ORDER, flavor=FONT_FORMATS[fmt][0])
+    except RuntimeError:
+        return "עדיין לא נשמרו אותיות", 404
+    response = send_font(etag, data, fmt, "preview", as_attachment=False)
+    if request.args.get('v'):
+        # הכתובת כוללת את גרסת קבוצת האותיות, אז מותר לדפדפן לשמור אותה
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = 86400
+        response.cache_control.private = True
+    return response
 
 
 @app.route('/download')
 def download_page():
-    font_ready = session.get('font_ready', os.path.exists(FONT_OUTPUT_PATH))
+    font_ready = font_is_ready()
     if not font_ready:
         return redirect(url_for('index'))
 
@@ -257,6 +560,8 @@ def start_payment():
     payload["SuccessRedirectUrl"] = request.host_url + "thankyou"
     payload["ErrorRedirectUrl"] = request.host_url + "payment"
 
+    import requests
+
     try:
         resp = requests.post(CARD_COM_API_URL, data=payload)
         result = parse_qs(resp.text)
@@ -290,7 +595,13 @@ def thankyou():
     if not session.get("paid"):
         return redirect(url_for('payment'))
 
-    return render_template('thankyou.html')
+    # אם בניית הפונט עוד רצה (למשל אחרי ש-/download_font שלח אותה לתור), הדף מחכה לה
+    fmt = request.args.get('format', 'ttf')
+    job_id = session.get('font_job')
+    job = FONT_JOBS.get(job_id) if job_id else None
+    status_url = url_for('font_job_status', job_id=job_id) if job and job.status in ("queued", "running") else None
+    return render_template('thankyou.html', status_url=status_url,
+                           download_url=url_for('download_font', format=fmt if fmt in FONT_FORMATS else 'ttf'))
 
 
 # ----------------------
@@ -307,7 +618,20 @@ def faq():
 
 
 # ----------------------
+# 💓 בדיקת חיים – בלי לגעת בצינור, עונה גם לפני שהחימום הסתיים
+# ----------------------
+@app.route('/healthz')
+def healthz():
+    return jsonify({"status": "ok", **startup.report()})
+
+
+startup.mark("app_ready")
+print(f"🚀 השרת מוכן אחרי {startup.elapsed() * 1000:.0f}ms מתחילת התהליך")
+
 if __name__ == '__main__':
+    # שרת הפיתוח של Flask; בפרודקשן: gunicorn -c backend/gunicorn.conf.py wsgi:app
+    if startup.WARMUP != "off":
+        startup.start_warm_up()
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
 
 
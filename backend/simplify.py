@@ -0,0 +1,313 @@
+import os
+import math
+
+import numpy as np
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.recordingPen import replayRecording
+
+from instrumentation import stage, record_simplify
+from tracer import count_points
+
+# ===== ברירות מחדל לפישוט =====
+# כל המרחקים ביחידות של קווי המתאר (יחידות potrace: 10 לפיקסל).
+# SIMPLIFY_TOLERANCE=0 מבטל את שלב הפישוט לגמרי.
+SIMPLIFY_TOLERANCE = float(os.environ.get("SIMPLIFY_TOLERANCE", "4"))
+DEFAULT_MIN_AREA = 300          # קווי מתאר ("כתמים") בשטח קטן מזה נזרקים (3 פיקסלים²)
+DEFAULT_MERGE_DISTANCE = 1.0    # נקודות קרובות מזה נחשבות כפולות
+DEFAULT_CORNER_ANGLE = 35.0     # מפרק עם שבירה גדולה מזו (במעלות) נשאר פינה ולא מתמזג
+MAX_RUN = 32                    # מקסימום מקטעים שמתאחדים לעקומה אחת
+
+_SAMPLES = 8
+_T = np.linspace(0.0, 1.0, _SAMPLES)
+
+
+def _bernstein(t):
+    mt = 1.0 - t
+    basis = np.empty((len(t), 4))
+    basis[:, 0] = mt * mt * mt
+    basis[:, 1] = 3 * mt * mt * t
+    basis[:, 2] = 3 * mt * t * t
+    basis[:, 3] = t * t * t
+    return basis
+
+
+_BASIS = _bernstein(_T)
+
+
+def _split_contours(outline):
+    contours, current = [], None
+    for op, pts in outline:
+        if op == "moveTo":
+            if current:
+                contours.append(current)
+            current = [(op, pts)]
+        elif current is None:
+            return None
+        else:
+            current.append((op, pts))
+            if op in ("closePath", "endPath"):
+                contours.append(current)
+                current = None
+    if current:
+        contours.append(current)
+    return contours
+
+
+def _to_segments(contour):
+    """
+    קו מתאר סגור → רשימת מקטעים כרשימות נקודות (קו: 2 נקודות, עקומה קובית: 4),
+    כשהמקטע האחרון תמיד חוזר לנקודת ההתחלה. מחזיר None לקו מתאר שלא נתמך
+    (פתוח, או עם עקומות ריבועיות), והוא יישאר כמו שהוא.
+    """
+    if contour[-1][0] != "closePath":
+        return None
+    start = prev = tuple(contour[0][1][0])
+    segments = []
+    for op, pts in contour[1:-1]:
+        if op == "lineTo":
+            seg = [prev, tuple(pts[0])]
+        elif op == "curveTo" and len(pts) == 3:
+            seg = [prev] + [tuple(p) for p in pts]
+        else:
+            return None
+        segments.append(seg)
+        prev = seg[-1]
+    if math.dist(prev, start) > 1e-6:
+        segments.append([prev, start])
+    return segments
+
+
+def _from_segments(segments):
+    def pt(p):
+        return (round(float(p[0]), 2), round(float(p[1]), 2))
+
+    value = [("moveTo", (pt(segments[0][0]),))]
+    for i, seg in enumerate(segments):
+        if len(seg) == 2:
+            # הקו האחרון נסגר ממילא ע"י closePath
+            if i < len(segments) - 1:
+                value.append(("lineTo", (pt(seg[1]),)))
+        else:
+            value.append(("curveTo", tuple(pt(p) for p in seg[1:])))
+    value.append(("closePath", ()))
+    return value
+
+
+def _area(contour):
+    pen = AreaPen()
+    replayRecording(contour, pen)
+    return abs(pen.value)
+
+
+def _line_distance(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length = math.hypot(dx, dy)
+    if length < 1e-9:
+        return math.dist(p, a)
+    return abs(dx * (p[1] - a[1]) - dy * (p[0] - a[0])) / length
+
+
+def _drop_duplicates(segments, merge_distance):
+    """מוחק מקטעים באורך אפס (כל הנקודות קרובות להתחלה) ומחבר את השכן."""
+    kept = [seg for seg in segments if any(math.dist(p, seg[0]) > merge_distance for p in seg[1:])]
+    if len(kept) < 2:
+        return segments
+    return [[kept[i - 1][-1]] + seg[1:] for i, seg in enumerate(kept)]
+
+
+def _flatten(segments, tolerance):
+    """עקומה שנקודות הבקרה שלה כמעט על המיתר הופכת לקו ישר."""
+    out = []
+    for seg in segments:
+        if len(seg) == 4:
+            p0, p1, p2, p3 = seg
+            if _line_distance(p1, p0, p3) <= tolerance and _line_distance(p2, p0, p3) <= tolerance:
+                # בקרה שחורגת אל מחוץ למיתר (עקומה "חוזרת") לא נחשבת ישרה
+                cx, cy = p3[0] - p0[0], p3[1] - p0[1]
+                chord_sq = cx * cx + cy * cy
+                along = [(p[0] - p0[0]) * cx + (p[1] - p0[1]) * cy for p in (p1, p2)]
+                if all(0 <= a <= chord_sq for a in along):
+                    seg = [p0, p3]
+        out.append(seg)
+    return out
+
+
+def _unit(a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    n = math.hypot(dx, dy)
+    return (dx / n, dy / n) if n > 1e-9 else None
+
+
+def _start_tangent(seg):
+    for p in seg[1:]:
+        t = _unit(seg[0], p)
+        if t:
+            return t
+    return None
+
+
+def _end_tangent(seg):
+    for p in seg[-2::-1]:
+        t = _unit(p, seg[-1])
+        if t:
+            return t
+    return None
+
+
+def _is_smooth(a, b, cos_limit):
+    ta, tb = _end_tangent(a), _start_tangent(b)
+    return ta is not None and tb is not None and ta[0] * tb[0] + ta[1] * tb[1] >= cos_limit
+
+
+def _merge_lines(segments, tolerance, cos_limit):
+    """קווים רצופים כמעט באותו כיוון מתאחדים, כל עוד כל הקודקודים בתוך הסבילות."""
+    out, run = [], None  # run – הקודקודים המקוריים של הקו האחרון ב-out
+    for seg in segments:
+        if run and len(seg) == 2 and _is_smooth(out[-1], seg, cos_limit):
+            vertices = run + [seg[1]]
+            if all(_line_distance(p, vertices[0], vertices[-1]) <= tolerance for p in vertices[1:-1]):
+                out[-1] = [vertices[0], vertices[-1]]
+                run = vertices
+                continue
+        out.append(seg)
+        run = list(seg) if len(seg) == 2 else None
+    return out
+
+
+def _fit_cubic(points, basis, p0, p3, t0, t1):
+    """
+    התאמת עקומה קובית בודדת לנקודות (Schneider): הקצוות והמשיקים קבועים,
+    ואורכי המשיקים נפתרים בריבועים פחותים.
+    """
+    b1, b2 = basis[:, 1], basis[:, 2]
+    rest = points - (basis[:, 0] + b1)[:, None] * p0 - (b2 + basis[:, 3])[:, None] * p3
+    c00, c11 = b1 @ b1, b2 @ b2
+    c01 = -(b1 @ b2) * float(t0 @ t1)
+    x0, x1 = b1 @ (rest @ t0), -(b2 @ (rest @ t1))
+    det = c00 * c11 - c01 * c01
+    chord = float(np.hypot(*(p3 - p0)))
+    alpha1 = alpha2 = chord / 3.0
+    if abs(det) > 1e-12:
+        a1, a2 = (x0 * c11 - x1 * c01) / det, (c00 * x1 - c01 * x0) / det
+        if a1 > 1e-6 * chord and a2 > 1e-6 * chord:
+            alpha1, alpha2 = a1, a2
+    return np.array([p0, p0 + t0 * alpha1, p3 - t1 * alpha2, p3])
+
+
+def _reparameterize(seg, points, u, q):
+    """צעד ניוטון אחד: מקרב כל פרמטר u לנקודה הקרובה ביותר על העקומה."""
+    mt, u2 = (1.0 - u)[:, None], u[:, None]
+    d1 = 3 * (mt * mt * (seg[1] - seg[0]) + 2 * mt * u2 * (seg[2] - seg[1]) + u2 * u2 * (seg[3] - seg[2]))
+    d2 = 6 * (mt * (seg[2] - 2 * seg[1] + seg[0]) + u2 * (seg[3] - 2 * seg[2] + seg[1]))
+    diff = q - points
+    num = np.einsum("ij,ij->i", diff, d1)
+    den = np.einsum("ij,ij->i", d1, d1) + np.einsum("ij,ij->i", diff, d2)
+    step = np.divide(num, den, out=np.zeros_like(num), where=np.abs(den) > 1e-12)
+    return np.clip(u - step, 0.0, 1.0)
+
+
+def _fit_run(run, points, tolerance):
+    """מנסה להחליף רצף עקומות בעקומה אחת; מחזיר None אם הסטייה חורגת מהסבילות."""
+    t0, t1 = _start_tangent(run[0]), _end_tangent(run[-1])
+    if t0 is None or t1 is None:
+        return None
+    t0, t1 = np.array(t0), np.array(t1)
+    lengths = np.cumsum(np.hypot(*np.diff(points, axis=0).T))
+    if lengths[-1] < 1e-9:
+        return None
+    u = np.concatenate([[0.0], lengths / lengths[-1]])
+    p0, p3 = np.array(run[0][0]), np.array(run[-1][-1])
+    tolerance_sq = tolerance * tolerance
+    for _ in range(3):
+        basis = _bernstein(u)
+        seg = _fit_cubic(points, basis, p0, p3, t0, t1)
+        q = basis @ seg
+        error_sq = np.max(np.einsum("ij,ij->i", q - points, q - points))
+        if error_sq <= tolerance_sq:
+            return [tuple(p) for p in seg.tolist()]
+        if error_sq > 16 * tolerance_sq:
+            # רחוק מדי – תיקון הפרמטרים לא יציל את ההתאמה
+            return None
+        u = _reparameterize(seg, points, u, q)
+    return None
+
+
+def _merge_curves(segments, tolerance, cos_limit):
+    """רצפים של עקומות שמתחברות בצורה חלקה מתאחדים לעקומה אחת כל עוד היא בתוך הסבילות."""
+    n = len(segments)
+    cubic = [len(seg) == 4 for seg in segments]
+    # דגימות של כל העקומות בבת אחת (בלי הנקודה האחרונה של כל מקטע)
+    samples = {}
+    idx = [i for i in range(n) if cubic[i]]
+    if idx:
+        sampled = np.einsum("tk,nkd->ntd", _BASIS[:-1], np.array([segments[i] for i in idx], dtype=np.float64))
+        samples = dict(zip(idx, sampled))
+
+    out, i = [], 0
+    while i < n:
+        best, j = segments[i], i
+        if cubic[i]:
+            while (j + 1 < n and j + 1 - i < MAX_RUN and cubic[j + 1]
+                   and _is_smooth(segments[j], segments[j + 1], cos_limit)):
+                points = np.vstack([samples[k] for k in range(i, j + 2)] + [segments[j + 1][-1:]])
+                fitted = _fit_run(segments[i:j + 2], points, tolerance)
+                if fitted is None:
+                    break
+                best, j = fitted, j + 1
+        out.append(best)
+        i = j + 1
+    return out
+
+
+def _rotate_to_corner(segments, cos_limit):
+    """מתחיל את קו המתאר בפינה, כדי שרצף חלק לא ייחתך בנקודת ההתחלה השרירותית."""
+    n = len(segments)
+    for k in range(n):
+        if not _is_smooth(segments[k - 1], segments[k], cos_limit):
+            return segments[k:] + segments[:k]
+    return segments
+
+
+def simplify_outline(outline, tolerance=None, min_area=DEFAULT_MIN_AREA,
+                     merge_distance=DEFAULT_MERGE_DISTANCE, corner_angle=DEFAULT_CORNER_ANGLE):
+    """
+    פישוט קווי מתאר (פקודות עט) לפני הכנסה לפונט:
+    זריקת כתמים קטנים, מחיקת נקודות כפולות, איחוד קווים כמעט ישרים
+    והתאמת עקומה אחת לרצף עקומות חלק – הכל בתוך tolerance.
+    קווי מתאר פתוחים או עם עקומות ריבועיות נשארים כמו שהם.
+    """
+    tolerance = SIMPLIFY_TOLERANCE if tolerance is None else tolerance
+    if tolerance <= 0 or not outline:
+        return outline
+    contours = _split_contours(outline)
+    if contours is None:
+        return outline
+
+    cos_limit = math.cos(math.radians(corner_angle))
+    result = []
+    for contour in contours:
+        segments = _to_segments(contour)
+        if segments is None:
+            result.extend(contour)
+            continue
+        if _area(contour) < min_area:
+            continue
+        segments = _drop_duplicates(segments, merge_distance)
+        segments = _flatten(segments, tolerance)
+        segments = _rotate_to_corner(segments, cos_limit)
+        segments = _merge_lines(segments, tolerance, cos_limit)
+        segments = _merge_curves(segments, tolerance, cos_limit)
+        result.extend(_from_segments(segments))
+    return result
+
+
+def optimize_outline(outline, tolerance=None):
+    """
+    שלב הפישוט בצינור – בין המעקב/הפענוח להכנסת האות לפונט.
+    נמדד כשלב simplify, ומספרי הנקודות לפני/אחרי נרשמים במדדים.
+    """
+    with stage("simplify"):
+        before = count_points(outline)[1]
+        outline = simplify_outline(outline, tolerance)
+        record_simplify(before, count_points(outline)[1])
+    return outline
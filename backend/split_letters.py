@@ -1,141 +1,212 @@
-    import cv2, os
-    import numpy as np
-    from pathlib import Path
-
-def split_letters_from_image(image_path, output_dir):
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-
-    img_gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-    if img_gray is None:
-        raise ValueError(f"Cannot load image: {image_path}")
-
-    # --- שלב 1: הכנה לשחור-לבן חד ---
-    _, bw = cv2.threshold(img_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+import cv2, os
+import numpy as np
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from binarize import binarize
+from resolution import reduce, fit_factor, box_to_full
+
+from glyph_sets import ACTIVE_GLYPH_SET
+
+LETTER_COUNT = len(ACTIVE_GLYPH_SET)
+
+
+def _rect_sums(integral, y0, y1, x0, x1):
+    """סכום מלבנים [y0:y1, x0:x1] לכל התיבות בבת אחת מתוך תמונה אינטגרלית."""
+    return (integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0])
+
+
+def _frame_ink(integral, boxes, margin=2):
+    """
+    כמות הדיו על מסגרת ברוחב פיקסל אחד סביב כל תיבה (כולל margin),
+    ב-O(1) לתיבה: סכום המלבן החיצוני פחות סכום המלבן הפנימי.
+    """
+    h_img, w_img = integral.shape[0] - 1, integral.shape[1] - 1
+    x, y, w, h = boxes.T
+    top = np.maximum(y - margin, 0)
+    bottom = np.minimum(y + h + margin, h_img)
+    left = np.maximum(x - margin, 0)
+    right = np.minimum(x + w + margin, w_img)
+
+    outer = _rect_sums(integral, top, bottom, left, right)
+    in_top, in_bottom = top + 1, np.maximum(bottom - 1, top + 1)
+    in_left, in_right = left + 1, np.maximum(right - 1, left + 1)
+    inner = _rect_sums(integral, in_top, in_bottom, in_left, in_right)
+    return outer - inner
+
+
+def _expand_boxes(boxes, shape):
+    """ריפוד יחסי לכל התיבות; אותיות צרות (ו, י, ן) מקבלות ריפוד רחב יותר."""
+    x, y, w, h = boxes.T
+    pad_ratio_x = np.where(w < h * 0.5, 0.6, 0.25)
+    pad_x = (w * pad_ratio_x).astype(np.int64)
+    pad_y = (h * 0.25).astype(np.int64)
+    nx = np.maximum(x - pad_x, 0)
+    ny = np.maximum(y - pad_y, 0)
+    nw = np.minimum(w + 2 * pad_x, shape[1] - nx)
+    nh = np.minimum(h + 2 * pad_y, shape[0] - ny)
+    return np.stack([nx, ny, nw, nh], axis=1)
+
+
+def _expand_until_white_frame(boxes, integral, shape, max_expand=10):
+    """מגדיל בפיקסל בכל צעד רק את התיבות שעדיין אין סביבן מסגרת לבנה."""
+    boxes = boxes.copy()
+    for _ in range(max_expand):
+        growing = _frame_ink(integral, boxes) > 0
+        if not growing.any():
+            break
+        x, y, w, h = boxes[growing].T
+        x = np.maximum(x - 1, 0)
+        y = np.maximum(y - 1, 0)
+        w = np.minimum(w + 2, shape[1] - x)
+        h = np.minimum(h + 2, shape[0] - y)
+        boxes[growing] = np.stack([x, y, w, h], axis=1)
+    return boxes
+
+
+def _merge_close_boxes(boxes, min_dist=10):
+    """
+    מיזוג תיבות קרובות (טיפול מיוחד באות א, ששני חלקיה נפרדים).
+    המרחק והחפיפה נמדדים מול התיבה הממוזגת שגדלה, וכל קבוצה ממשיכה לגדול עד שאין עוד
+    תיבה קרובה אליה – כך שרצף של חלקים קרובים מתאחד במעבר אחד, בלי תלות בסדר.
+    הפרש הגבהים נבדק כמו קודם, בין שתי התיבות המקוריות (תיבת הפתיחה של הקבוצה והמועמדת).
+    מועמדים למיזוג נמצאים בחיפוש בינארי על קצוות ממוינים במקום לולאה O(n²).
+    """
+    n = len(boxes)
+    x1a = [b[0] for b in boxes]
+    x1b = [b[0] + b[2] for b in boxes]
+    starts = sorted((x, i) for i, x in enumerate(x1a))
+    ends = sorted((x, i) for i, x in enumerate(x1b))
+    start_keys = [s for s, _ in starts]
+    end_keys = [e for e, _ in ends]
+
+    def near(keys, items, value):
+        lo = bisect_right(keys, value - min_dist)
+        hi = bisect_left(keys, value + min_dist)
+        return (i for _, i in items[lo:hi])
+
+    merged = []
+    used = [False] * n
+    for i in range(n):
+        if used[i]:
+            continue
+        used[i] = True
+        x1, y1, w1, h1 = boxes[i]
+        X1A, Y1A, X1B, Y1B = x1, y1, x1 + w1, y1 + h1
+        grew = True
+        while grew:
+            grew = False
+            # j מתחיל ליד הקצה הימני של הקבוצה, או מסתיים ליד הקצה השמאלי שלה
+            candidates = sorted(set(near(start_keys, starts, X1B)) | set(near(end_keys, ends, X1A)))
+            for j in candidates:
+                if used[j]:
+                    continue
+                x2, y2, w2, h2 = boxes[j]
+                y_overlap = (min(Y1B, y2 + h2) - max(Y1A, y2)) > 0
+                x_dist = min(abs(x2 - X1B), abs(X1A - (x2 + w2)))
+                if y_overlap and x_dist < min_dist and abs(h1 - h2) < 15:
+                    X1A = min(X1A, x2)
+                    Y1A = min(Y1A, y2)
+                    X1B = max(X1B, x2 + w2)
+                    Y1B = max(Y1B, y2 + h2)
+                    used[j] = True
+                    grew = True
+        merged.append((X1A, Y1A, X1B - X1A, Y1B - Y1A))
+    return merged
+
+
+def find_letter_boxes(img_gray, count=LETTER_COUNT, bw=None):
+    """
+    מאתר את תיבות האותיות בגיליון (מערך אפור בזיכרון) ומחזיר בדיוק count תיבות
+    (x, y, w, h), ממוינות לפי שורות ומימין לשמאל.
+    bw – הגיליון אחרי סף (רקע לבן), אם כבר חושב; אחרת מחושב כאן.
+    """
+    # --- שלב 1: הכנה לשחור-לבן חד (סף מקומי כשהתאורה לא אחידה) ---
+    if bw is None:
+        bw, _ = binarize(img_gray)
+    ink = cv2.bitwise_not(bw)
 
     # ניקוי רעשים קטנים וחיבור רכיבים קרובים
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-    bw = cv2.morphologyEx(bw, cv2.MORPH_CLOSE, kernel, iterations=2)
-    bw = cv2.morphologyEx(bw, cv2.MORPH_OPEN, kernel, iterations=1)
+    mask = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, kernel, iterations=2)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
 
-    # --- שלב 2: איתור קונטורים ---
-    contours, _ = cv2.findContours(bw, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    boxes = []
-    for c in contours:
-        x, y, w, h = cv2.boundingRect(c)
-        if w * h > 50:  # סינון רעשים קטנים
-            boxes.append((x, y, w, h))
+    # --- שלב 2: רכיבים קשירים במעבר אחד ---
+    _, _, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(mask, 8, cv2.CV_32S, cv2.CCL_GRANA)
+    stats = stats[1:, :4].astype(np.int64)  # בלי הרקע
+    stats = stats[stats[:, 2] * stats[:, 3] > 50]  # סינון רעשים קטנים
 
     # --- שלב 3: סידור תיבות בשורות, מימין לשמאל ---
-    boxes = sorted(boxes, key=lambda b: (b[1], -b[0]))  # קודם לפי Y, אחר כך X הפוך
-
-    # פונקציית הגדלה
-    def expand_box(box, pad_ratio_x=0.2, pad_ratio_y=0.2):
-        x, y, w, h = box
-        pad_x = int(w * pad_ratio_x)
-        pad_y = int(h * pad_ratio_y)
-        nx = max(x - pad_x, 0)
-        ny = max(y - pad_y, 0)
-        nw = min(w + 2 * pad_x, img_gray.shape[1] - nx)
-        nh = min(h + 2 * pad_y, img_gray.shape[0] - ny)
-        return (nx, ny, nw, nh)
-
-    # פונקציה לבדוק אם מסביב לתיבה יש לבן
-    def is_surrounded_by_white(x, y, w, h, img, margin=2):
-        h_img, w_img = img.shape
-        top = max(y - margin, 0)
-        bottom = min(y + h + margin, h_img)
-        left = max(x - margin, 0)
-        right = min(x + w + margin, w_img)
-
-        # קווי מסגרת
-        top_row = img[top, left:right]
-        bottom_row = img[bottom - 1, left:right]
-        left_col = img[top:bottom, left]
-        right_col = img[top:bottom, right - 1]
-
-        return np.all(top_row == 255) and np.all(bottom_row == 255) and \
-               np.all(left_col == 255) and np.all(right_col == 255)
-
-    # פונקציה להגדלת תיבה עד שיש מסגרת לבנה
-    def expand_until_white_frame(x, y, w, h, img, max_expand=10):
-        for m in range(max_expand):
-            if is_surrounded_by_white(x, y, w, h, img):
-                return (x, y, w, h)
-            x = max(x - 1, 0)
-            y = max(y - 1, 0)
-            w = min(w + 2, img.shape[1] - x)
-            h = min(h + 2, img.shape[0] - y)
-        return (x, y, w, h)
-
-    expanded_boxes = []
-    for (x, y, w, h) in boxes:
-        # התייחסות מיוחדת לאותיות צרות (ו, י, ן)
-        if w < h * 0.5:  # אות צרה
-            bx, by, bw_, bh_ = expand_box((x, y, w, h), pad_ratio_x=0.6, pad_ratio_y=0.25)
-        else:
-            bx, by, bw_, bh_ = expand_box((x, y, w, h), pad_ratio_x=0.25, pad_ratio_y=0.25)
-
-        # הרחבה עד שיש מסגרת לבנה
-        bx, by, bw_, bh_ = expand_until_white_frame(bx, by, bw_, bh_, img_gray)
-        expanded_boxes.append((bx, by, bw_, bh_))
-
-    # --- שלב 4: מיזוג תיבות קרובות (טיפול מיוחד באות א) ---
-    def merge_close_boxes(boxes, min_dist=10):
-        merged = []
-        used = [False] * len(boxes)
-        for i in range(len(boxes)):
-            if used[i]:
-                continue
-            x1, y1, w1, h1 = boxes[i]
-            X1A, Y1A, X1B, Y1B = x1, y1, x1 + w1, y1 + h1
-            for j in range(i + 1, len(boxes)):
-                if used[j]:
-                    continue
-                x2, y2, w2, h2 = boxes[j]
-                X2A, Y2A, X2B, Y2B = x2, y2, x2 + w2, y2 + h2
-                # מיזוג אם קרובים בטווח ובגובה (כדי לאחד את שני חלקי האות א)
-                y_overlap = (min(Y1B, Y2B) - max(Y1A, Y2A)) > 0
-                x_dist = min(abs(X2A - X1B), abs(X1A - X2B))
-                height_diff = abs(h1 - h2)
-                if y_overlap and x_dist < min_dist and height_diff < 15:
-                    X1A = min(X1A, X2A)
-                    Y1A = min(Y1A, Y2A)
-                    X1B = max(X1B, X2B)
-                    Y1B = max(Y1B, Y2B)
-                    used[j] = True
-            merged.append((X1A, Y1A, X1B - X1A, Y1B - Y1A))
-            used[i] = True
-        return merged
-
-    while len(expanded_boxes) > 27:
+    order = np.lexsort((-stats[:, 0], stats[:, 1]))  # קודם לפי Y, אחר כך X הפוך
+    boxes = stats[order]
+
+    # --- שלב 4: הגדלה, ואז הרחבה עד מסגרת לבנה בעזרת תמונה אינטגרלית ---
+    # הדיו נלקח מהסף ולא מ"כל מה שאינו לבן טהור", כדי שצל על הנייר לא ייחשב דיו
+    integral = cv2.integral(ink // 255, sdepth=cv2.CV_32S)
+    boxes = _expand_boxes(boxes, img_gray.shape)
+    boxes = _expand_until_white_frame(boxes, integral, img_gray.shape)
+    expanded_boxes = [tuple(int(v) for v in b) for b in boxes]
+
+    # --- שלב 5: מיזוג תיבות קרובות ---
+    while len(expanded_boxes) > count:
         prev_count = len(expanded_boxes)
-        expanded_boxes = merge_close_boxes(expanded_boxes, min_dist=10)
+        expanded_boxes = _merge_close_boxes(expanded_boxes, min_dist=10)
         if len(expanded_boxes) == prev_count:
             break  # לא מתמזג יותר
 
-    # --- שלב 5: אם פחות מדי אותיות, להוסיף "ריבועים" ממוצעים כדי להגיע ל-27 ---
-    if len(expanded_boxes) < 27:
+    # --- שלב 6: אם פחות מדי אותיות, להוסיף "ריבועים" ממוצעים כדי להגיע ל-count ---
+    if len(expanded_boxes) < count:
         avg_w = int(np.mean([b[2] for b in expanded_boxes])) if expanded_boxes else 50
         avg_h = int(np.mean([b[3] for b in expanded_boxes])) if expanded_boxes else 50
-        while len(expanded_boxes) < 27:
+        while len(expanded_boxes) < count:
             expanded_boxes.append((0, 0, avg_w, avg_h))
 
-    # --- שלב 6: מיון סופי — לפי שורות וסדר מימין לשמאל ---
-    expanded_boxes = sorted(expanded_boxes, key=lambda b: (b[1], -b[0]))
+    # --- שלב 7: מיון סופי — לפי שורות וסדר מימין לשמאל ---
+    return _reading_order(expanded_boxes)[:count]
+
+
+def locate_letters(img_gray, count=LETTER_COUNT):
+    """
+    find_letter_boxes על עותק מוקטן (עד DETECT_MAX_SIDE): הסף, המורפולוגיה והרכיבים
+    הקשירים רצים על חלק קטן מהפיקסלים, והתיבות ממופות חזרה לרזולוציה המלאה במדויק.
+    """
+    working = reduce(img_gray, fit_factor(img_gray.shape))
+    boxes = find_letter_boxes(working.image, count)
+    return [box_to_full(box, working, img_gray.shape) for box in boxes]
+
+
+def _reading_order(boxes):
+    """
+    מיון לפי שורות ומימין לשמאל. תיבות שה-Y שלהן קרוב (פחות מחצי גובה אות)
+    נחשבות לאותה שורה, כך שהפרש של פיקסל אחד בין אותיות באותה שורה לא משבש את הסדר.
+    """
+    if not boxes:
+        return boxes
+    tolerance = np.median([b[3] for b in boxes]) / 2.0
+    rows, row_top = [], None
+    for box in sorted(boxes, key=lambda b: b[1]):
+        if row_top is None or box[1] - row_top > tolerance:
+            rows.append([])
+            row_top = box[1]
+        rows[-1].append(box)
+    return [box for row in rows for box in sorted(row, key=lambda b: -b[0])]
+
+
+def split_letters_from_image(image_path, output_dir, glyph_set=ACTIVE_GLYPH_SET):
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    img_gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if img_gray is None:
+        raise ValueError(f"Cannot load image: {image_path}")
 
-    hebrew_letters = [
-        'alef', 'bet', 'gimel', 'dalet', 'he', 'vav', 'zayin', 'het', 'tet',
-        'yod', 'kaf', 'lamed', 'mem', 'nun', 'samekh', 'ayin', 'pe', 'tsadi',
-        'qof', 'resh', 'shin', 'tav', 'final_kaf', 'final_mem', 'final_nun',
-        'final_pe', 'final_tsadi'
-    ]
+    boxes = locate_letters(img_gray, count=len(glyph_set))
 
-    # --- שלב 7: חיתוך ושמירת כל האותיות ---
-    for i, (x, y, w, h) in enumerate(expanded_boxes[:27]):
+    # --- חיתוך ושמירת כל האותיות ---
+    for i, (x, y, w, h) in enumerate(boxes):
         crop = img_gray[y:y+h, x:x+w]
-        name = hebrew_letters[i]
+        name = glyph_set[i].name
         out_path = os.path.join(output_dir, f"{i:02d}_{name}.png")
         cv2.imwrite(out_path, crop)
         print(f"✅ נשמרה אות {i}: {name}")
 
-    print(f"\n✅ נחתכו ונשמרו {min(len(expanded_boxes),27)} אותיות בתיקייה:\n{output_dir}")
+    print(f"\n✅ נחתכו ונשמרו {len(boxes)} אותיות בתיקייה:\n{output_dir}")
@@ -0,0 +1,98 @@
+"""
+עליית השרת: השרת עצמו טוען רק את Flask, ומודולי הצינור הכבדים (NumPy, OpenCV, fontTools,
+defcon, ufo2ft) נטענים בשימוש הראשון – או מראש, ב-thread חימום ברקע.
+כאן נמדד גם הזמן מתחילת התהליך לכל שלב, והזמן של כל ייבוא בחימום.
+
+WARMUP:
+    thread  – (ברירת מחדל) חימום ברקע מיד אחרי שהשרת מוכן; הבקשות הראשונות לא מחכות לו
+    preload – תחת gunicorn: חימום בתהליך הראשי לפני ה-fork, כך שהזיכרון משותף לכל התהליכים
+              (עלייה איטית יותר, אבל בלי עותק של הספריות בכל תהליך)
+    off     – בלי חימום; כל מודול נטען בבקשה הראשונה שצריכה אותו
+"""
+import os
+import sys
+import time
+import importlib
+import threading
+
+WARMUP = os.environ.get("WARMUP", "thread")
+
+# בסדר התלויות, כך שכל שורה בדו"ח היא הזמן הנוסף של המודול הזה בלבד
+HEAVY_MODULES = (
+    "numpy", "cv2", "PIL.Image", "fontTools.ttLib", "defcon", "ufo2ft", "requests",
+    "ingest", "process_image", "glyph_pipeline", "generate_font", "template_sheet",
+)
+
+
+def _process_start():
+    """זמן תחילת התהליך (Linux, מ-/proc); אחרת – הרגע שבו המודול הזה נטען."""
+    try:
+        with open("/proc/self/stat") as fh:
+            start_ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as fh:
+            uptime = float(fh.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+PROCESS_START = _process_start()
+
+_lock = threading.Lock()
+_events = {}
+_imports = {}
+_warm = threading.Event()
+
+
+def elapsed():
+    return time.time() - PROCESS_START
+
+
+def mark(event):
+    """רושם שלב בעלייה (שניות מתחילת התהליך)."""
+    with _lock:
+        _events[event] = round(elapsed(), 3)
+
+
+def timed_import(name):
+    """טוען מודול ורושם כמה זמן לקח; מודול שכבר נטען לא נמדד."""
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        _imports[name] = round(time.perf_counter() - start, 4)
+    return module
+
+
+def warm_up(modules=HEAVY_MODULES):
+    """טוען מראש את מודולי הצינור; שגיאה במודול אחד לא עוצרת את השאר."""
+    for name in modules:
+        try:
+            timed_import(name)
+        except Exception as e:
+            print(f"⚠️ חימום {name} נכשל: {e}")
+    mark("warm")
+    _warm.set()
+    total = sum(_imports.values())
+    slowest = ", ".join(f"{name} {seconds * 1000:.0f}ms"
+                        for name, seconds in sorted(_imports.items(), key=lambda kv: -kv[1])[:3])
+    print(f"🔥 חימום הסתיים: {total * 1000:.0f}ms ייבוא ({slowest})")
+
+
+def start_warm_up():
+    """חימום ב-thread ברקע. בטוח רק בתהליך שלא יעשה fork אחר כך (ראו gunicorn.conf.py)."""
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def report():
+    """דו"ח העלייה: שלבים (שניות מתחילת התהליך) וזמן כל ייבוא בחימום."""
+    with _lock:
+        return {
+            "uptime_seconds": round(elapsed(), 3),
+            "warm": _warm.is_set(),
+            "events": dict(_events),
+            "imports": dict(_imports),
+        }
@@ -1,21 +1,24 @@
 import os
 import subprocess
+import numpy as np
 from PIL import Image
+from instrumentation import stage
 
-def convert_png_to_svg(input_path, output_path):
-    """
-    פונקציה לייבוא בקוד: ממירה PNG ל-SVG באמצעות Potrace.
-    """
+# מנוע המעקב: "internal" (בתוך התהליך) או "potrace" (תהליך חיצוני)
+SVG_ENGINE = os.environ.get("SVG_ENGINE", "internal")
+
+
+def _convert_with_potrace(input_path, output_path):
     bmp_path = input_path.replace(".png", ".bmp")
     Image.open(input_path).save(bmp_path)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
     try:
-        subprocess.run([
-            "potrace", bmp_path,
-            "--svg", "-o", output_path
-        ], check=True)
+        with stage("potrace", bytes_in=os.path.getsize(bmp_path)) as rec:
+            subprocess.run([
+                "potrace", bmp_path,
+                "--svg", "-o", output_path
+            ], check=True)
+            rec.bytes_out = os.path.getsize(output_path)
         print(f"✅ {input_path} → {output_path}")
     except subprocess.CalledProcessError:
         print(f"❌ שגיאה בהמרת {input_path}")
@@ -25,22 +28,53 @@ def convert_png_to_svg(input_path, output_path):
     return output_path
 
 
-def convert_to_svg(input_dir_or_file, output_dir_or_file):
+def _convert_in_process(input_path, output_path):
+    from tracer import trace_bitmap, write_potrace_svg
+
+    with stage("trace_to_svg", bytes_in=os.path.getsize(input_path)) as rec:
+        gray = np.asarray(Image.open(input_path).convert("L"))
+        outline = trace_bitmap(gray)
+        height, width = gray.shape
+        write_potrace_svg(outline, width, height, output_path)
+        rec.bytes_out = os.path.getsize(output_path)
+    print(f"✅ {input_path} → {output_path}")
+    return output_path
+
+
+def convert_png_to_svg(input_path, output_path, engine=None):
+    """
+    פונקציה לייבוא בקוד: ממירה PNG ל-SVG.
+    ברירת המחדל היא המנוע הפנימי (tracer.py); אם הוא נכשל, או אם
+    engine="potrace", ההמרה נעשית דרך Potrace כמו קודם.
+    """
+    engine = engine or SVG_ENGINE
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    if engine != "potrace":
+        try:
+            return _convert_in_process(input_path, output_path)
+        except Exception as e:
+            print(f"⚠️ המנוע הפנימי נכשל ({e}) – חוזרים ל-potrace")
+    return _convert_with_potrace(input_path, output_path)
+
+
+def convert_to_svg(input_dir_or_file, output_dir_or_file, engine=None):
     if os.path.isfile(input_dir_or_file):
-        return convert_png_to_svg(input_dir_or_file, output_dir_or_file)
+        return convert_png_to_svg(input_dir_or_file, output_dir_or_file, engine=engine)
     elif os.path.isdir(input_dir_or_file):
         os.makedirs(output_dir_or_file, exist_ok=True)
         for fname in os.listdir(input_dir_or_file):
             if fname.lower().endswith(".png"):
                 convert_png_to_svg(
                     os.path.join(input_dir_or_file, fname),
-                    os.path.join(output_dir_or_file, fname.replace(".png", ".svg"))
+                    os.path.join(output_dir_or_file, fname.replace(".png", ".svg")),
+                    engine=engine
                 )
 
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) != 3:
-        print("שימוש: python svg_converter.py <input_path> <output_path>")
+    if len(sys.argv) not in (3, 4):
+        print("שימוש: python svg_converter.py <input_path> <output_path> [internal|potrace]")
         sys.exit(1)
-    convert_to_svg(sys.argv[1], sys.argv[2])
+    convert_to_svg(sys.argv[1], sys.argv[2], engine=sys.argv[3] if len(sys.argv) == 4 else None)
@@ -0,0 +1,115 @@
+import os
+import re
+import math
+import xml.etree.ElementTree as ET
+
+from fontTools.misc.transform import Identity, Transform
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.pens.transformPen import TransformPen
+from fontTools.svgLib.path import parse_path
+
+from tracer import POTRACE_UNITS
+
+_TRANSFORM_RE = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _numbers(text):
+    return [float(v) for v in _NUMBER_RE.findall(text or "")]
+
+
+def parse_transform(text):
+    """מפרש תכונת transform של SVG (רשימת פעולות, משמאל לימין) ל-Transform של fontTools."""
+    result = Identity
+    for op, args in _TRANSFORM_RE.findall(text or ""):
+        v = _numbers(args)
+        if op == "matrix" and len(v) == 6:
+            t = Transform(*v)
+        elif op == "translate" and v:
+            t = Identity.translate(v[0], v[1] if len(v) > 1 else 0)
+        elif op == "scale" and v:
+            t = Identity.scale(v[0], v[1] if len(v) > 1 else v[0])
+        elif op == "rotate" and v:
+            cx, cy = (v[1], v[2]) if len(v) == 3 else (0, 0)
+            t = Identity.translate(cx, cy).rotate(math.radians(v[0])).translate(-cx, -cy)
+        elif op == "skewX" and v:
+            t = Identity.skew(math.radians(v[0]), 0)
+        elif op == "skewY" and v:
+            t = Identity.skew(0, math.radians(v[0]))
+        else:
+            continue
+        result = result.transform(t)
+    return result
+
+
+def _font_mapping(root_attrib):
+    """
+    ממיפוי ה-viewBox (פיקסלים, Y כלפי מטה) ליחידות potrace (10 לפיקסל, Y כלפי מעלה):
+    scale(10,-10) translate(-minX, -(minY + H)).
+    עבור SVG של potrace זה בדיוק ההופכי של ה-transform שעל <g>, כך שהגאומטריה
+    זהה למספרים הגולמיים שב-d.
+    """
+    box = _numbers(root_attrib.get("viewBox"))
+    if len(box) == 4:
+        min_x, min_y, _, height = box
+    else:
+        min_x, min_y = 0.0, 0.0
+        height = (_numbers(root_attrib.get("height")) or [0.0])[0]
+    return Identity.scale(POTRACE_UNITS, -POTRACE_UNITS).translate(-min_x, -(min_y + height))
+
+
+def read_svg_outline(source):
+    """
+    קורא את כל ה-<path> בקובץ SVG (נתיב או קובץ פתוח) בסריקה אחת עם iterparse,
+    בלי לבנות DOM: ה-transform של כל <g> מורכב על המחסנית, והפלט הוא
+    קווי מתאר (פקודות עט) ביחידות potrace. מחזיר (outline, מספר ה-paths).
+    """
+    rec = RecordingPen()
+    stack = []
+    paths = 0
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "end":
+            stack.pop()
+            elem.clear()
+            continue
+
+        tag = _local(elem.tag)
+        parent = stack[-1] if stack else _font_mapping(elem.attrib)
+        transform = elem.get("transform")
+        current = parent.transform(parse_transform(transform)) if transform else parent
+        stack.append(current)
+
+        if tag == "path":
+            d = elem.get("d", "")
+            if d.strip():
+                # ב-potrace המיפוי מבטל בדיוק את ה-transform של <g>; מעגלים שאריות של float
+                matrix = Transform(*(round(v, 9) for v in current))
+                parse_path(d, TransformPen(rec, matrix) if matrix != Identity else rec)
+                paths += 1
+    return rec.value, paths
+
+
+def glyph_name_from_filename(filename):
+    """שם האות מתוך שם הקובץ: 03_gimel.svg → gimel, gimel.svg → gimel."""
+    stem = os.path.splitext(filename)[0]
+    return stem.split("_", 1)[1] if "_" in stem else stem
+
+
+def read_svg_folder(svg_folder):
+    """
+    קריאה בכמות של תיקייה שלמה: מניב (שם קובץ, שם אות, קווי מתאר, מספר paths, שגיאה)
+    לכל קובץ SVG, לפי סדר שמות הקבצים. קובץ שנכשל לא עוצר את השאר.
+    """
+    for filename in sorted(os.listdir(svg_folder)):
+        if not filename.lower().endswith(".svg"):
+            continue
+        name = glyph_name_from_filename(filename)
+        try:
+            outline, paths = read_svg_outline(os.path.join(svg_folder, filename))
+            yield filename, name, outline, paths, None
+        except (ET.ParseError, ValueError, OSError) as e:
+            yield filename, name, None, 0, str(e)
@@ -0,0 +1,185 @@
+import io
+import math
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from glyph_sets import ACTIVE_GLYPH_SET
+from resolution import GLYPH_TRACE_SIZE, reduce, fit_factor
+
+# ===== תבנית להדפסה =====
+# יחידות התבנית הן פיקסלים ב-TEMPLATE_DPI על דף A4 לאורך.
+TEMPLATE_DPI = int(os.environ.get("TEMPLATE_DPI", "150"))
+PAGE_MM = (210.0, 297.0)
+TEMPLATE_COLS = 6
+MARKER_DICT = cv2.aruco.DICT_4X4_50
+# סמנים בפינות: שמאל-עליון, ימין-עליון, ימין-תחתון, שמאל-תחתון
+MARKER_IDS = (0, 1, 2, 3)
+BORDER_GRAY = 170           # צבע מסגרת המשבצת – בהיר, כדי שלא ייראה כמו דיו
+SLOT_INSET = 0.06           # החלק מכל צד של המשבצת שנחתך (המסגרת והשוליים שלה)
+MIN_SLOT_INK = 0.002        # מתחת לחלק הזה של דיו המשבצת נחשבת ריקה (כתמי רעש בלבד)
+
+# פריסת התבנית: page – (רוחב, גובה); markers – {id: 4 פינות (x, y)};
+# slots – מערך N×3 של (x, y, צלע) לכל משבצת, בסדר הקבוצה (מימין לשמאל, שורה אחרי שורה)
+TemplateLayout = namedtuple("TemplateLayout", ["page", "markers", "slots", "dpi"])
+
+
+class RegistrationError(ValueError):
+    """לא נמצאו מספיק סמנים בתמונה כדי לרשום אותה מול התבנית."""
+
+
+def template_layout(count, dpi=TEMPLATE_DPI):
+    """פריסה דטרמיניסטית של count משבצות – אותה פריסה בהדפסה וברישום."""
+    width = int(round(PAGE_MM[0] / 25.4 * dpi))
+    height = int(round(PAGE_MM[1] / 25.4 * dpi))
+    margin = int(0.5 * dpi)
+    marker = int(0.6 * dpi)
+    label = int(0.15 * dpi)
+    pad = int(0.07 * dpi)
+
+    positions = {
+        0: (margin, margin),
+        1: (width - margin - marker, margin),
+        2: (width - margin - marker, height - margin - marker),
+        3: (margin, height - margin - marker),
+    }
+    markers = {}
+    for marker_id, (x, y) in positions.items():
+        # פינות כמו ש-ArUco מחזיר אותן: עם כיוון השעון מהפינה השמאלית-העליונה (מרכזי פיקסלים)
+        x0, y0, x1, y1 = x - 0.5, y - 0.5, x + marker - 0.5, y + marker - 0.5
+        markers[marker_id] = np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)], dtype=np.float64)
+
+    top = margin + marker + pad
+    grid_w = width - 2 * margin
+    grid_h = height - 2 * (margin + marker + pad)
+    cols = max(TEMPLATE_COLS, math.ceil(math.sqrt(count * grid_w / float(grid_h))))
+    rows = max(1, math.ceil(count / cols))
+    cell_w, cell_h = grid_w / cols, grid_h / rows
+    side = int(min(cell_w - 2 * pad, cell_h - label - 2 * pad))
+
+    slots = np.empty((count, 3), dtype=np.float64)
+    for i in range(count):
+        row, col = divmod(i, cols)
+        cell_x = margin + (cols - 1 - col) * cell_w
+        cell_y = top + row * cell_h
+        slots[i] = (round(cell_x + (cell_w - side) / 2.0), round(cell_y + label + pad), side)
+    return TemplateLayout((width, height), markers, slots, dpi)
+
+
+def draw_template(glyph_set=ACTIVE_GLYPH_SET, dpi=TEMPLATE_DPI):
+    """מצייר את התבנית (מערך אפור): סמני ArUco בפינות ומשבצת ממוספרת לכל אות."""
+    layout = template_layout(len(glyph_set), dpi)
+    width, height = layout.page
+    page = np.full((height, width), 255, np.uint8)
+
+    dictionary = cv2.aruco.getPredefinedDictionary(MARKER_DICT)
+    for marker_id, corners in layout.markers.items():
+        x, y = (int(v + 0.5) for v in corners[0])
+        size = int(corners[1][0] - corners[0][0])
+        page[y:y + size, x:x + size] = cv2.aruco.generateImageMarker(dictionary, marker_id, size)
+
+    # Hershey של OpenCV לא כולל עברית – מעל כל משבצת המספר ושם האות
+    font_scale = max(0.3, layout.slots[0][2] / 450.0) if len(glyph_set) else 0.3
+    for i, (glyph, (x, y, side)) in enumerate(zip(glyph_set, layout.slots)):
+        x, y, side = int(x), int(y), int(side)
+        cv2.rectangle(page, (x, y), (x + side, y + side), BORDER_GRAY, 2)
+        cv2.putText(page, f"{i + 1} {glyph.name}", (x, y - 6), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, 90, 1, cv2.LINE_AA)
+    return page
+
+
+def template_pdf(glyph_set=ACTIVE_GLYPH_SET, dpi=TEMPLATE_DPI):
+    """התבנית כ-PDF בגודל A4 מדויק, להדפסה בלי שינוי קנה מידה."""
+    buf = io.BytesIO()
+    Image.fromarray(draw_template(glyph_set, dpi)).save(buf, "PDF", resolution=float(dpi))
+    return buf.getvalue()
+
+
+def _detector():
+    dictionary = cv2.aruco.getPredefinedDictionary(MARKER_DICT)
+    return cv2.aruco.ArucoDetector(dictionary, cv2.aruco.DetectorParameters())
+
+
+def register_sheet(gray, layout):
+    """
+    מאתר את הסמנים על עותק מוקטן ומחשב הומוגרפיה אחת מהתבנית לתמונה (ברזולוציה המלאה).
+    מספיקים שני סמנים (8 פינות); עם ארבעה ההתאמה עמידה גם לסמן שזוהה לא נכון (RANSAC).
+    """
+    working = reduce(gray, fit_factor(gray.shape))
+    corners, ids, _ = _detector().detectMarkers(working.image)
+    if ids is None:
+        raise RegistrationError("No template markers found")
+
+    template_pts, photo_pts = [], []
+    for marker_corners, marker_id in zip(corners, ids.ravel()):
+        if int(marker_id) in layout.markers:
+            template_pts.append(layout.markers[int(marker_id)])
+            # מרכז פיקסל בעותק → מרכז הבלוק המקביל במקור
+            photo_pts.append((marker_corners.reshape(4, 2) + 0.5) * working.factor - 0.5)
+    if len(template_pts) < 2:
+        raise RegistrationError(f"Found {len(template_pts)} template markers, need at least 2")
+
+    homography, _ = cv2.findHomography(np.concatenate(template_pts), np.concatenate(photo_pts),
+                                       cv2.RANSAC, 3.0 * working.factor)
+    if homography is None:
+        raise RegistrationError("Template markers are inconsistent")
+    return homography
+
+
+def _apply(homography, pts):
+    """מפעיל הומוגרפיה על מערך נקודות (..., 2)."""
+    h = homography
+    x, y = pts[..., 0], pts[..., 1]
+    w = h[2, 0] * x + h[2, 1] * y + h[2, 2]
+    return np.stack([(h[0, 0] * x + h[0, 1] * y + h[0, 2]) / w,
+                     (h[1, 0] * x + h[1, 1] * y + h[1, 2]) / w], axis=-1)
+
+
+def extract_slots(gray, homography, layout, size=None):
+    """
+    חותך את כל המשבצות בעיוות וקטורי אחד: רשת הדגימה של כל המשבצות נבנית יחד,
+    עוברת דרך ההומוגרפיה, ו-cv2.remap יחיד מחזיר מערך N×S×S.
+    size – צלע המשבצת בפלט; ברירת המחדל היא הרזולוציה שיש בתמונה, עד GLYPH_TRACE_SIZE.
+    מחזיר (slots, boxes) – boxes הן התיבות התוחמות של המשבצות בתמונה המקורית.
+    """
+    count = len(layout.slots)
+    inset = layout.slots[:, 2] * SLOT_INSET
+    x0 = layout.slots[:, 0] + inset
+    y0 = layout.slots[:, 1] + inset
+    side = layout.slots[:, 2] - 2 * inset
+
+    # כמה פיקסלי תמונה יש לכל פיקסל תבנית (סביב מרכז הדף)
+    cx, cy = layout.page[0] / 2.0, layout.page[1] / 2.0
+    probe = _apply(homography, np.array([[cx, cy], [cx + 1, cy], [cx, cy + 1]]))
+    (ux, uy), (vx, vy) = probe[1] - probe[0], probe[2] - probe[0]
+    photo_scale = math.sqrt(abs(ux * vy - uy * vx))
+    if size is None:
+        size = int(min(GLYPH_TRACE_SIZE, max(16, round(float(side.mean()) * photo_scale))))
+
+    # הקטנה בפקטור שלם לפני הדגימה, כך שה-remap הלינארי לא מדלג על יותר מפיקסל וחצי
+    factor = max(1, int(photo_scale * float(side.mean()) / size))
+    working = reduce(gray, factor)
+    to_working = np.array([[1.0 / factor, 0, 0.5 / factor - 0.5],
+                           [0, 1.0 / factor, 0.5 / factor - 0.5],
+                           [0, 0, 1.0]])
+
+    t = (np.arange(size) + 0.5) / size
+    grid_x = x0[:, None, None] + t[None, None, :] * side[:, None, None]
+    grid_y = y0[:, None, None] + t[None, :, None] * side[:, None, None]
+    grid = np.stack(np.broadcast_arrays(grid_x, grid_y), axis=-1)
+    mapped = _apply(to_working @ homography, grid).astype(np.float32)
+
+    stacked = cv2.remap(working.image, mapped[..., 0].reshape(count * size, size),
+                        mapped[..., 1].reshape(count * size, size),
+                        cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+
+    corners = np.stack([np.stack([x0, y0], 1), np.stack([x0 + side, y0], 1),
+                        np.stack([x0 + side, y0 + side], 1), np.stack([x0, y0 + side], 1)], axis=1)
+    quads = _apply(homography, corners)
+    lo = np.clip(np.floor(quads.min(axis=1)), 0, [gray.shape[1], gray.shape[0]]).astype(int)
+    hi = np.clip(np.ceil(quads.max(axis=1)), 0, [gray.shape[1], gray.shape[0]]).astype(int)
+    boxes = [(int(a[0]), int(a[1]), int(b[0] - a[0]), int(b[1] - a[1])) for a, b in zip(lo, hi)]
+    return stacked.reshape(count, size, size), boxes
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# המודולים של backend מיובאים בשם החשוף (כמו בשרת), לכן התיקייה נכנסת ל-sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
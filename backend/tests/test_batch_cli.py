@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from batch_cli import _is_done, _signature, plan_jobs, read_journal, run_batch
+
+
+def write(path, data=b"sheet"):
+    with open(path, "wb") as fh:
+        fh.write(data)
+    return str(path)
+
+
+def test_plan_jobs_from_folder_and_manifest(tmp_path):
+    sheets = tmp_path / "sheets"
+    sheets.mkdir()
+    write(sheets / "b.png")
+    write(sheets / "a.JPG")
+    write(sheets / "notes.txt")
+    assert plan_jobs(str(sheets)) == [("a", str(sheets / "a.JPG")), ("b", str(sheets / "b.png"))]
+
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("sheet,name\nsheets/a.JPG,dana\nsheets/b.png,\n,skipped\n", encoding="utf-8")
+    assert plan_jobs(str(manifest)) == [("dana", str(sheets / "a.JPG")), ("b", str(sheets / "b.png"))]
+
+    manifest.write_text("sheet,name\nsheets/a.JPG,same\nsheets/b.png,same\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        plan_jobs(str(manifest))
+
+
+def test_read_journal_keeps_the_last_entry_and_skips_a_torn_line(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    journal.write_text(json.dumps({"name": "a", "status": "error"}) + "\n"
+                       + json.dumps({"name": "a", "status": "ok"}) + "\n"
+                       + '{"name": "b", "sta', encoding="utf-8")
+    assert read_journal(str(journal)) == {"a": {"name": "a", "status": "ok"}}
+    assert read_journal(str(tmp_path / "missing.jsonl")) == {}
+
+
+def test_is_done_follows_sheet_signature_and_font(tmp_path):
+    sheet = write(tmp_path / "a.png")
+    font = write(tmp_path / "a.ttf", b"font")
+    entry = {"name": "a", "status": "ok", "font": "a.ttf", "signature": _signature(sheet)}
+    assert _is_done(entry, sheet, str(tmp_path))
+
+    assert not _is_done(None, sheet, str(tmp_path))
+    assert not _is_done(dict(entry, status="error"), sheet, str(tmp_path))
+
+    st = os.stat(sheet)
+    os.utime(sheet, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert not _is_done(entry, sheet, str(tmp_path))      # אותו גודל, זמן שינוי אחר
+    entry["signature"] = _signature(sheet)
+    write(sheet, b"a different sheet")
+    os.utime(sheet, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert not _is_done(entry, sheet, str(tmp_path))      # אותו זמן, גודל אחר
+
+    entry["signature"] = _signature(sheet)
+    assert _is_done(entry, sheet, str(tmp_path))
+    os.remove(font)
+    assert not _is_done(entry, sheet, str(tmp_path))
+
+
+def test_run_batch_skips_built_sheets_and_retries_failures(tmp_path):
+    sheets, out = tmp_path / "sheets", tmp_path / "out"
+    sheets.mkdir()
+    out.mkdir()
+    built = write(sheets / "built.png")
+    write(sheets / "broken.png", b"not an image")
+    write(out / "built.ttf", b"font")
+    journal = out / "journal.jsonl"
+    journal.write_text(json.dumps({"name": "built", "sheet": built, "status": "ok", "font": "built.ttf",
+                                   "signature": _signature(built), "seconds": 1.0, "stages": {}}) + "\n"
+                       + json.dumps({"name": "broken", "status": "error", "error": "old"}) + "\n",
+                       encoding="utf-8")
+
+    summary = run_batch(str(sheets), str(out), workers=1)
+    assert summary["fonts_ok"] == 1 and summary["fonts_built"] == 0
+    assert set(summary["failed"]) == {"broken"} and summary["failed"]["broken"] != "old"
+    assert read_journal(str(journal))["broken"]["status"] == "error"
+    assert json.loads((out / "report.json").read_text(encoding="utf-8"))["fonts_failed"] == 1
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from binarize import local_mean_std, sauvola_threshold, niblack_threshold, binarize, SAUVOLA_K, SAUVOLA_R, NIBLACK_K
+
+
+def naive_mean_std(gray, window):
+    """הגדרה ישירה: ממוצע וסטיית תקן על חלון window×window סביב כל פיקסל, עם שיקוף בשוליים."""
+    r = window // 2
+    padded = np.pad(gray.astype(np.float64), r, mode="symmetric")   # כמו BORDER_REFLECT
+    h, w = gray.shape
+    mean, std = np.empty((h, w)), np.empty((h, w))
+    for y in range(h):
+        for x in range(w):
+            block = padded[y:y + window, x:x + window]
+            mean[y, x], std[y, x] = block.mean(), block.std()
+    return mean, std
+
+
+@pytest.fixture
+def gray():
+    rng = np.random.default_rng(7)
+    return rng.integers(0, 256, size=(23, 31), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("window", [1, 3, 7, 15])
+def test_integral_mean_std_matches_naive_windows(gray, window):
+    mean, std = local_mean_std(gray, window)
+    ref_mean, ref_std = naive_mean_std(gray, window)
+    np.testing.assert_allclose(mean, ref_mean, atol=1e-9)
+    np.testing.assert_allclose(std, ref_std, atol=1e-6)
+
+
+def test_sauvola_and_niblack_match_naive_formulas(gray):
+    ref_mean, ref_std = naive_mean_std(gray, 9)
+    np.testing.assert_allclose(sauvola_threshold(gray, 9),
+                               ref_mean * (1 + SAUVOLA_K * (ref_std / SAUVOLA_R - 1)), atol=1e-6)
+    np.testing.assert_allclose(niblack_threshold(gray, 9), ref_mean + NIBLACK_K * ref_std, atol=1e-6)
+
+
+def test_flat_image_has_zero_std():
+    mean, std = local_mean_std(np.full((10, 12), 200, np.uint8), 5)
+    assert np.all(mean == 200) and np.all(std == 0)
+
+
+def test_sauvola_recovers_ink_under_a_shadow():
+    # נייר שמחשיך משמאל לימין (200 → 60) עם שני קווים כהים ב-100 מהנייר המקומי
+    page = np.tile(np.linspace(200, 60, 200), (100, 1))
+    page[40:45, 20:60] -= 100
+    page[40:45, 140:180] -= 100
+    gray = np.clip(page, 0, 255).astype(np.uint8)
+
+    bw, method = binarize(gray, method="sauvola")
+    assert method == "sauvola"
+    assert set(np.unique(bw)) <= {0, 255}
+    assert (bw[40:45, 25:55] == 0).mean() > 0.9 and (bw[40:45, 145:175] == 0).mean() > 0.9
+    assert (bw[70:, :] == 255).mean() > 0.95
+
+    # סף גלובלי מסמן את כל הצד המוצל כדיו
+    otsu, _ = binarize(gray, method="otsu")
+    assert (otsu[70:, 150:] == 0).mean() > 0.9
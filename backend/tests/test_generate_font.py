@@ -0,0 +1,54 @@
+import io
+
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+from generate_font import compile_preview, font_to_bytes, letter_map, subset_font
+
+
+def square(x0, y0, size):
+    return [("moveTo", ((x0, y0),)), ("lineTo", ((x0 + size, y0),)), ("lineTo", ((x0 + size, y0 + size),)),
+            ("lineTo", ((x0, y0 + size),)), ("closePath", ())]
+
+
+OUTLINES = {
+    "alef": square(0, 0, 400),
+    "bet": square(0, 0, 380) + square(100, 100, 50),
+    "yod": square(0, 200, 150),
+}
+
+
+def reload(data):
+    return TTFont(io.BytesIO(data))
+
+
+def contours(font, name):
+    pen = RecordingPen()
+    font.getGlyphSet()[name].draw(pen)
+    return sum(1 for op, _ in pen.value if op == "moveTo")
+
+
+def test_preview_is_a_loadable_cff_font_with_exactly_the_saved_glyphs():
+    font = reload(font_to_bytes(compile_preview(OUTLINES)))
+    assert "CFF " in font and "glyf" not in font
+    assert font.getGlyphOrder() == [".notdef", "alef", "bet", "yod"]
+    assert font.getBestCmap() == {letter_map[name]: name for name in OUTLINES}
+    assert [contours(font, name) for name in OUTLINES] == [1, 2, 1]
+    assert all(font["hmtx"][name][0] > 0 for name in OUTLINES)
+
+
+def test_preview_leaves_out_unknown_names():
+    font = reload(font_to_bytes(compile_preview(dict(OUTLINES, notaletter=square(0, 0, 10)))))
+    assert "notaletter" not in font.getGlyphOrder()
+
+
+def test_woff2_subset_keeps_only_the_requested_letters():
+    preview = reload(font_to_bytes(compile_preview(OUTLINES)))
+    data = font_to_bytes(subset_font(preview, ["alef", "yod", "notaletter"]), "woff2")
+    assert data[:4] == b"wOF2"
+
+    font = reload(data)
+    assert font.flavor == "woff2"
+    assert sorted(font.getBestCmap()) == sorted([letter_map["alef"], letter_map["yod"]])
+    assert len(font.getGlyphOrder()) == 3      # .notdef + שתי האותיות
+    assert [contours(font, font.getBestCmap()[letter_map[name]]) for name in ("alef", "yod")] == [1, 1]
@@ -0,0 +1,39 @@
+import os
+import time
+
+from glyph_cache import GlyphCache
+
+SQUARE = [("moveTo", ((0, 0),)), ("lineTo", ((10, 0),)), ("lineTo", ((10, 10),)), ("closePath", ())]
+
+
+def _age(cache, key, seconds):
+    past = time.time() - seconds
+    os.utime(cache._path(key), (past, past))
+
+
+def test_disk_entries_survive_a_new_process(tmp_path):
+    GlyphCache(str(tmp_path)).put("k", SQUARE, (0, 0, 10, 10))
+    assert GlyphCache(str(tmp_path)).get("k") == [(op, tuple(pts)) for op, pts in SQUARE]
+
+
+def test_gc_drops_entries_older_than_ttl(tmp_path):
+    cache = GlyphCache(str(tmp_path), ttl_seconds=3600)
+    cache.put("old", SQUARE, (0, 0, 10, 10))
+    cache.put("new", SQUARE, (0, 0, 10, 10))
+    _age(cache, "old", 7200)
+
+    assert cache.collect_garbage() == 1
+    assert sorted(os.listdir(tmp_path)) == ["new.json"]
+
+
+def test_gc_keeps_only_the_most_recently_read_files(tmp_path):
+    cache = GlyphCache(str(tmp_path), max_files=2)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, SQUARE, (0, 0, 10, 10))
+        _age(cache, key, 100 - i)
+    _age(cache, "a", 200)
+    # קריאה מהדיסק (בתהליך חדש) מרעננת את הרשומה
+    GlyphCache(str(tmp_path)).get("a")
+
+    assert cache.collect_garbage() == 1
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "c.json"]
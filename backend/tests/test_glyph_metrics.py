@@ -0,0 +1,72 @@
+import pytest
+
+from glyph_metrics import outline_bounds, compute_metrics, metrics_for, glyph_transform
+
+X_HEIGHT = 500
+SIDE = 20
+
+
+def rect(x0, y0, x1, y1):
+    return [("moveTo", ((x0, y0),)), ("lineTo", ((x1, y0),)), ("lineTo", ((x1, y1),)),
+            ("lineTo", ((x0, y1),)), ("closePath", ())]
+
+
+def placed_box(metrics, box):
+    """התיבה אחרי המיקום בפונט (glyph_transform)."""
+    t = glyph_transform(metrics)
+    (x0, y0), (x1, y1) = t.transformPoint(box[:2]), t.transformPoint(box[2:])
+    return x0, y0, x1, y1
+
+
+def test_bounds_include_curve_extrema_and_skip_empty_glyphs():
+    bulge = [("moveTo", ((0, 0),)), ("curveTo", ((0, 100), (100, 100), (100, 0))), ("closePath", ())]
+    bounds = outline_bounds({"square": rect(10, 20, 30, 40), "bulge": bulge, "empty": []})
+    assert bounds["square"] == (10, 20, 30, 40)
+    assert bounds["bulge"] == pytest.approx((0, 0, 100, 75))
+    assert bounds["empty"] is None
+
+
+def test_advance_and_side_bearings_for_a_known_box():
+    # שתי אותיות גוף בגובה 100 → קנה מידה 5; ה-bet ברוחב 50 ומוזז מהאפס
+    boxes = {"alef": (0, 0, 80, 100), "bet": (200, 30, 250, 130)}
+    metrics = compute_metrics(boxes, x_height=X_HEIGHT, side_bearing=SIDE)
+
+    bet = metrics["bet"]
+    assert bet.scale == 5.0
+    assert bet.advance == 50 * 5 + 2 * SIDE
+    x0, y0, x1, y1 = placed_box(bet, boxes["bet"])
+    assert x0 == pytest.approx(SIDE)                  # LSB
+    assert bet.advance - x1 == pytest.approx(SIDE)    # RSB
+    assert (y0, y1) == pytest.approx((0, X_HEIGHT))   # על קו הבסיס, עד גובה הגוף
+
+
+def test_vertical_alignment_follows_the_glyph_set():
+    boxes = {"alef": (0, 0, 80, 100), "finalnun": (0, 0, 20, 180), "lamed": (0, 0, 60, 150),
+             "hyphen": (0, 0, 40, 10)}
+    metrics = compute_metrics(boxes, x_height=X_HEIGHT, side_bearing=SIDE)
+
+    # finalnun תלויה: הראש על x_height, הזנב יורד מתחת לקו הבסיס
+    _, y0, _, y1 = placed_box(metrics["finalnun"], boxes["finalnun"])
+    assert y1 == pytest.approx(X_HEIGHT) and y0 < 0
+    # lamed עומדת על קו הבסיס ועולה מעל x_height
+    _, y0, _, y1 = placed_box(metrics["lamed"], boxes["lamed"])
+    assert y0 == pytest.approx(0) and y1 > X_HEIGHT
+    # המקף ממורכז על אמצע הגוף
+    _, y0, _, y1 = placed_box(metrics["hyphen"], boxes["hyphen"])
+    assert (y0 + y1) / 2 == pytest.approx(X_HEIGHT / 2)
+
+
+def test_marks_have_zero_advance_and_are_centred_on_the_origin():
+    boxes = {"alef": (0, 0, 80, 100), "patah": (300, 0, 340, 10), "holam": (0, 0, 10, 10)}
+    metrics = compute_metrics(boxes, x_height=X_HEIGHT, side_bearing=SIDE)
+
+    assert metrics["patah"].advance == 0
+    x0, _, x1, y1 = placed_box(metrics["patah"], boxes["patah"])
+    assert (x0 + x1) / 2 == pytest.approx(0)
+    assert y1 < 0
+    assert placed_box(metrics["holam"], boxes["holam"])[1] > X_HEIGHT
+
+
+def test_empty_glyph_gets_only_side_bearings():
+    metrics = metrics_for({"alef": rect(0, 0, 10, 10), "bet": []}, x_height=X_HEIGHT, side_bearing=SIDE)
+    assert metrics["bet"].advance == 2 * SIDE
@@ -0,0 +1,52 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+import glyph_pipeline
+from glyph_pipeline import process_glyphs_batch, shutdown_pool
+
+
+def square_png(size=60, ink=(15, 45)):
+    img = np.full((size, size), 255, np.uint8)
+    img[ink[0]:ink[1], ink[0]:ink[1]] = 0
+    ok, buf = cv2.imencode(".png", img)
+    assert ok
+    return buf.tobytes()
+
+
+@pytest.fixture
+def two_workers(monkeypatch):
+    shutdown_pool()
+    monkeypatch.setattr(glyph_pipeline, "GLYPH_WORKERS", 2)
+    yield
+    shutdown_pool()
+
+
+def test_pool_is_created_once_under_concurrent_requests(two_workers):
+    pools = []
+    threads = [threading.Thread(target=lambda: pools.append(glyph_pipeline._get_pool())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(p) for p in pools}) == 1
+    assert pools[0]._mp_context.get_start_method() == "forkserver"
+
+
+def test_batch_on_the_pool_matches_serial_tracing(two_workers):
+    items = [("alef", square_png()), ("bet", square_png(ink=(10, 30))), ("broken", b"not an image")]
+    pooled = process_glyphs_batch(items, max_workers=2)
+    serial = process_glyphs_batch(items, max_workers=1)
+
+    assert [r.name for r in pooled] == ["alef", "bet", "broken"]
+    assert [r.outline for r in pooled] == [r.outline for r in serial]
+    assert pooled[0].outline and pooled[2].outline is None and pooled[2].error
+
+
+def test_shutdown_pool_allows_a_fresh_pool(two_workers):
+    first = glyph_pipeline._get_pool()
+    shutdown_pool()
+    assert glyph_pipeline._pool is None
+    assert glyph_pipeline._get_pool() is not first
@@ -0,0 +1,38 @@
+import pytest
+
+from glyph_sets import GLYPHS, GLYPH_SETS, Glyph, GlyphSet, glyph_set
+
+
+def test_combined_set_indexes_slots_in_set_order():
+    glyphs = glyph_set("hebrew+digits")
+    assert len(glyphs) == 27 + 10 == 37
+    assert glyphs.name == "hebrew+digits"
+    assert glyphs.names[:27] == GLYPH_SETS["hebrew"].names
+    assert glyphs.slot("alef") == 0
+    assert glyphs.slot("finaltsadi") == 26
+    assert glyphs.slot("zero") == 27
+    assert glyphs[36].name == "nine"
+    assert glyphs.codepoint("nine") == 0x39
+    assert "bet" in glyphs and "A" not in glyphs
+
+
+def test_spec_is_whitespace_tolerant_and_rejects_unknown_sets():
+    assert glyph_set(" hebrew + digits ").names == glyph_set("hebrew+digits").names
+    for spec in ("", "+", "hebrew+klingon"):
+        with pytest.raises(ValueError):
+            glyph_set(spec)
+
+
+def test_duplicate_names_or_codepoints_are_rejected():
+    with pytest.raises(ValueError):
+        glyph_set("hebrew+hebrew")
+    with pytest.raises(ValueError):
+        GlyphSet("clash", [Glyph("a", 0x61, "body"), Glyph("b", 0x61, "body")])
+
+
+def test_marks_are_labelled_on_a_dotted_circle():
+    labels = glyph_set("hebrew+niqqud").labels()
+    assert labels[0] == "א"
+    assert labels[-1] == "◌ּ"
+    assert all(GLYPHS[name].codepoint == ord(label[-1]) for name, label in
+               zip(glyph_set("hebrew+niqqud").names, labels))
@@ -0,0 +1,76 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+
+from ingest import UploadRejected, read_stream, check_image
+
+
+def encode(ext, image, *params):
+    ok, buf = cv2.imencode(ext, image, list(params))
+    assert ok
+    return buf.tobytes()
+
+
+def test_read_stream_enforces_the_byte_limit():
+    assert read_stream(io.BytesIO(b"x" * 10), max_bytes=10) == b"x" * 10
+    with pytest.raises(UploadRejected) as e:
+        read_stream(io.BytesIO(b"x" * 11), max_bytes=10)
+    assert e.value.status == 413
+    # Content-Length מוצהר נדחה לפני קריאה
+    with pytest.raises(UploadRejected):
+        read_stream(io.BytesIO(b""), max_bytes=10, content_length=11)
+    with pytest.raises(UploadRejected) as e:
+        read_stream(io.BytesIO(b""), max_bytes=10)
+    assert e.value.status == 400
+
+
+def test_check_image_rejects_from_the_header_alone():
+    png = encode(".png", np.zeros((300, 200), np.uint8))
+    assert check_image(png, max_pixels=300 * 200) is png
+    # רק הכותרת של הקובץ (בלי הפיקסלים) – מספיקה כדי לדחות לפי המידות
+    with pytest.raises(UploadRejected) as e:
+        check_image(png[:64], max_pixels=300 * 200 - 1)
+    assert e.value.status == 413 and "300" in str(e.value)
+    with pytest.raises(UploadRejected) as e:
+        check_image(png, max_bytes=len(png) - 1)
+    assert e.value.status == 413
+
+
+def test_check_image_rejects_non_images():
+    with pytest.raises(UploadRejected) as e:
+        check_image(b"definitely not an image")
+    assert e.value.status == 400
+
+
+def test_decode_rejects_huge_images_before_decoding():
+    from ingest import decode_upload
+
+    jpeg = encode(".jpg", np.full((400, 600), 255, np.uint8))
+    with pytest.raises(UploadRejected) as e:
+        decode_upload(jpeg[:600], max_pixels=400 * 600 - 1)
+    assert e.value.status == 413
+    with pytest.raises(UploadRejected):
+        decode_upload(jpeg[:600])   # בגבולות, אבל חתוך – הפענוח נכשל
+
+
+@pytest.mark.parametrize("min_side, expected", [(None, (1200, 1600)), (1200, (1200, 1600)), (600, (600, 800)),
+                                                (300, (300, 400)), (150, (150, 200)), (100, (150, 200))])
+def test_jpeg_is_decoded_at_the_largest_reduction_that_keeps_min_side(min_side, expected):
+    from ingest import decode_upload, reduced_factor
+
+    gray = np.tile(np.linspace(0, 255, 1600, dtype=np.uint8), (1200, 1))
+    jpeg = encode(".jpg", gray, cv2.IMWRITE_JPEG_QUALITY, 90)
+    image = decode_upload(jpeg, min_side=min_side, grayscale=True)
+    assert image.shape == expected
+    if min_side:
+        assert reduced_factor((1600, 1200), min_side) == 1200 // expected[0]
+
+
+def test_png_is_never_reduced_and_colour_is_kept():
+    from ingest import decode_upload
+
+    png = encode(".png", np.zeros((1200, 1600, 3), np.uint8))
+    assert decode_upload(png, min_side=100).shape == (1200, 1600, 3)
+    assert decode_upload(png, min_side=100, grayscale=True).shape == (1200, 1600)
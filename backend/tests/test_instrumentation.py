@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from flask import Flask
+
+import instrumentation
+from instrumentation import ProfileMiddleware
+
+
+class Body:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+def run(middleware, query):
+    environ = {"QUERY_STRING": query, "PATH_INFO": "/download_font"}
+    body = middleware(environ, lambda status, headers: None)
+    data = b"".join(body)
+    body.close()
+    return data
+
+
+def test_profiled_response_is_streamed_and_closed(tmp_path):
+    inner = Body([b"ab", b"cd"])
+    middleware = ProfileMiddleware(lambda environ, start_response: inner, token="s3cret", profile_dir=str(tmp_path))
+
+    assert run(middleware, "profile=s3cret") == b"abcd"
+    assert inner.closed
+    assert [f for f in os.listdir(tmp_path) if f.endswith("_download_font.prof")]
+
+
+def test_unprofiled_response_is_passed_through(tmp_path):
+    inner = Body([b"x"])
+    middleware = ProfileMiddleware(lambda environ, start_response: inner, token="s3cret", profile_dir=str(tmp_path))
+
+    assert middleware({"QUERY_STRING": "profile=wrong"}, None) is inner
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "PROFILE_DIR", str(tmp_path))
+    app = Flask(__name__)
+    instrumentation.init_app(app)
+    return app.test_client()
+
+
+def test_metrics_is_off_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_requires_the_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", "m-token")
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics?token=nope").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer m-token"}).status_code == 200
+    # לא בכתובת – היא נכתבת ללוג הגישה
+    assert client.get("/metrics?token=m-token").status_code == 403
+
+
+def test_metrics_does_not_reuse_the_profile_token(client, monkeypatch):
+    monkeypatch.setattr(instrumentation, "METRICS_TOKEN", None)
+    monkeypatch.setattr(instrumentation, "PROFILE_TOKEN", "p-token")
+    assert client.get("/metrics", headers={"Authorization": "Bearer p-token"}).status_code == 404
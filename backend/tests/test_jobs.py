@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from jobs import JobQueue, QueueFull, QueueClosed
+
+
+def wait_for(queue, job, status="done"):
+    for _ in range(200):
+        if queue.get(job.id).status == status:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job stayed {queue.get(job.id).status}")
+
+
+@pytest.fixture
+def gate():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_full_queue_raises_queue_full(gate):
+    queue = JobQueue(max_workers=1, max_pending=2)
+    queue.submit("build", gate.wait)
+    queue.submit("build", gate.wait)
+    with pytest.raises(QueueFull):
+        queue.submit("build", gate.wait)
+    gate.set()
+    queue.shutdown()
+
+
+def test_state_is_visible_to_another_process(tmp_path):
+    writer = JobQueue(state_dir=str(tmp_path))
+    job = writer.submit("build", lambda: ("etag", b"font bytes"))
+    wait_for(writer, job)
+
+    # תור אחר (תהליך שרת אחר) עם אותה תיקיית מצב
+    reader = JobQueue(state_dir=str(tmp_path))
+    seen = reader.get(job.id)
+    assert seen is not job
+    assert seen.status == "done" and seen.finished >= seen.started
+    assert reader.get("missing") is None and reader.get("../etc") is None
+    writer.shutdown()
+
+
+def test_failed_job_records_the_error():
+    queue = JobQueue()
+
+    def fail():
+        raise RuntimeError("no glyphs")
+
+    job = queue.submit("build", fail)
+    wait_for(queue, job, "error")
+    assert queue.get(job.id).to_dict()["message"] == "no glyphs"
+    queue.shutdown()
+
+
+def test_result_is_not_kept_in_memory():
+    queue = JobQueue()
+    job = queue.submit("build", lambda: b"x" * 1024)
+    wait_for(queue, job)
+    assert not hasattr(job, "result")
+    queue.shutdown()
+
+
+def test_shutdown_marks_queued_jobs_and_rejects_new_ones(tmp_path, gate):
+    queue = JobQueue(max_workers=1, state_dir=str(tmp_path))
+    running = queue.submit("build", gate.wait)
+    wait_for(queue, running, "running")
+    waiting = queue.submit("build", gate.wait)
+
+    closer = threading.Thread(target=queue.shutdown)
+    closer.start()
+    wait_for(queue, waiting, "error")
+    with pytest.raises(QueueClosed):
+        queue.submit("build", gate.wait)
+    gate.set()
+    closer.join()
+
+    assert JobQueue(state_dir=str(tmp_path)).get(waiting.id).status == "error"
+    assert queue.get(running.id).status == "done"
+    assert len(list(tmp_path.iterdir())) == 2
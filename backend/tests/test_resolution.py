@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from resolution import fit_factor, keep_factor, trace_factor, reduce, box_to_full, box_to_working
+
+
+@pytest.mark.parametrize("shape, max_side, expected", [
+    ((1600, 1200), 1600, 1),
+    ((1601, 1200), 1600, 2),
+    ((1200, 3200), 1600, 2),
+    ((1200, 3201), 1600, 3),
+    ((1, 1), 1600, 1),
+    ((0, 0), 1600, 1),
+    ((480, 640, 3), 100, 7),     # ערוץ הצבע לא נספר כצלע
+])
+def test_fit_factor_is_the_smallest_that_fits(shape, max_side, expected):
+    factor = fit_factor(shape, max_side)
+    assert factor == expected
+    assert -(-max(shape[:2]) // factor) <= max_side
+
+
+@pytest.mark.parametrize("size, min_size, expected", [
+    (399, 400, 1),
+    (400, 400, 1),
+    (799, 400, 1),
+    (800, 400, 2),
+    (1999, 400, 4),
+    (0, 400, 1),
+])
+def test_keep_factor_is_the_largest_that_keeps(size, min_size, expected):
+    factor = keep_factor(size, min_size)
+    assert factor == expected
+    assert size // factor >= min_size or factor == 1
+
+
+def test_trace_factor_uses_the_long_side():
+    assert trace_factor((300, 1200), 400) == 3
+    assert trace_factor((1200, 300, 3), 400) == 3
+
+
+def test_reduce_pads_to_whole_blocks_with_white():
+    image = np.zeros((7, 5), np.uint8)
+    working = reduce(image, 3)
+    assert working.image.shape == (3, 2) and working.factor == 3 and working.pad_top == 0
+    # בלוק מלא – שחור; בלוק בשורה האחרונה – 1 שורת מקור מתוך 3
+    assert working.image[0, 0] == 0
+    assert working.image[2, 0] == pytest.approx(255 * 2 / 3, abs=1)
+    # עמודה אחרונה: 2 עמודות מקור מתוך 3
+    assert working.image[0, 1] == pytest.approx(255 / 3, abs=1)
+
+
+def test_reduce_pad_top_keeps_the_bottom_row_aligned():
+    image = np.full((7, 6), 255, np.uint8)
+    image[-1] = 0
+    working = reduce(image, 3, pad_top=True)
+    assert working.pad_top == 2
+    assert working.image[-1, 0] == pytest.approx(255 * 2 / 3, abs=1)
+    assert working.image[0, 0] == 255
+
+
+def test_reduce_keeps_colour_channels_and_skips_factor_one():
+    image = np.zeros((5, 5, 3), np.uint8)
+    assert reduce(image, 1).image is image
+    assert reduce(image, 2).image.shape == (3, 3, 3)
+
+
+@pytest.mark.parametrize("pad_top", [False, True])
+@pytest.mark.parametrize("box", [(0, 0, 1, 1), (5, 7, 10, 3), (0, 0, 23, 17), (22, 16, 1, 1)])
+def test_box_round_trip_covers_the_original(box, pad_top):
+    shape = (17, 23)
+    working = reduce(np.full(shape, 255, np.uint8), 4, pad_top=pad_top)
+    small = box_to_working(box, working)
+    x, y, w, h = box_to_full(small, working, shape)
+
+    assert x <= box[0] and y <= box[1]
+    assert x + w >= box[0] + box[2] and y + h >= box[1] + box[3]
+    # לא יותר מבלוק אחד מכל צד, ולא מחוץ לתמונה
+    assert box[0] - x < 4 and box[1] - y < 4
+    assert x + w <= shape[1] and y + h <= shape[0]
+    # התיבה הקטנה בתוך העותק
+    assert small[0] + small[2] <= working.image.shape[1] and small[1] + small[3] <= working.image.shape[0]
+
+
+def test_box_to_full_clips_padding():
+    working = reduce(np.full((10, 10), 255, np.uint8), 4, pad_top=True)   # pad_top = 2
+    assert box_to_full((0, 0, 3, 3), working, (10, 10)) == (0, 0, 10, 10)
+    assert box_to_full((0, 0, 1, 1), working, (10, 10)) == (0, 0, 4, 2)
+
+
+@pytest.mark.parametrize("shape", [(2000, 3000, 3), (100, 4000, 3), (4000, 100, 3), (300, 200, 3)])
+def test_normalize_glyph_fills_the_long_side(shape):
+    from process_image import MARGIN, TARGET_SIZE, normalize_glyph
+
+    img = np.zeros(shape, np.uint8)
+    canvas = normalize_glyph(img)
+    assert canvas.shape == (TARGET_SIZE, TARGET_SIZE, 3)
+    ys, xs = np.nonzero(canvas[..., 0] < 128)
+    long_side = max(xs.max() - xs.min(), ys.max() - ys.min()) + 1
+    assert long_side == TARGET_SIZE - 2 * MARGIN
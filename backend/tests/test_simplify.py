@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.recordingPen import replayRecording
+
+from simplify import simplify_outline
+from tracer import count_points
+
+TOLERANCE = 4.0
+
+
+def polygon(points):
+    return ([("moveTo", (points[0],))] + [("lineTo", (p,)) for p in points[1:]] + [("closePath", ())])
+
+
+def circle_polygon(radius=300.0, n=180, center=(500.0, 500.0)):
+    return polygon([(round(center[0] + radius * math.cos(2 * math.pi * k / n), 2),
+                     round(center[1] + radius * math.sin(2 * math.pi * k / n), 2)) for k in range(n)])
+
+
+def circle_cubics(radius=300.0, n=16, center=(500.0, 500.0)):
+    """מעגל מ-n קשתות קוביות (קירוב סטנדרטי), כך שכל החיבורים חלקים."""
+    k = 4.0 / 3.0 * math.tan(math.pi / (2 * n)) * radius
+    cx, cy = center
+
+    def at(a, r=radius):
+        return (cx + r * math.cos(a), cy + r * math.sin(a))
+
+    value = [("moveTo", (at(0.0),))]
+    for i in range(n):
+        a0, a1 = 2 * math.pi * i / n, 2 * math.pi * (i + 1) / n
+        p0, p3 = at(a0), at(a1)
+        c1 = (p0[0] - k * math.sin(a0), p0[1] + k * math.cos(a0))
+        c2 = (p3[0] + k * math.sin(a1), p3[1] - k * math.cos(a1))
+        value.append(("curveTo", (c1, c2, p3)))
+    value.append(("closePath", ()))
+    return value
+
+
+def area(outline):
+    pen = AreaPen()
+    replayRecording(outline, pen)
+    return abs(pen.value)
+
+
+def sample(outline, step=1.0):
+    """נקודות לאורך קווי המתאר (קווים ועקומות קוביות), בערך כל step יחידות."""
+    def dense(p0, p1, p2, p3):
+        n = int(math.dist(p0, p1) + math.dist(p1, p2) + math.dist(p2, p3)) // int(step) + 2
+        t = np.linspace(0.0, 1.0, n)[:, None]
+        mt = 1 - t
+        return mt ** 3 * p0 + 3 * mt ** 2 * t * p1 + 3 * mt * t ** 2 * p2 + t ** 3 * p3
+
+    points, start, prev = [], None, None
+    for op, pts in outline:
+        if op == "moveTo":
+            start = prev = np.array(pts[0], dtype=float)
+        elif op == "lineTo":
+            p = np.array(pts[0], dtype=float)
+            points.append(dense(prev, prev, p, p))
+            prev = p
+        elif op == "curveTo":
+            p1, p2, p3 = (np.array(p, dtype=float) for p in pts)
+            points.append(dense(prev, p1, p2, p3))
+            prev = p3
+        elif op == "closePath":
+            points.append(dense(prev, prev, start, start))
+    return np.vstack(points)
+
+
+def hausdorff(a, b):
+    d = np.hypot(*(sample(a)[:, None, :] - sample(b)[None, :, :]).transpose(2, 0, 1))
+    return max(d.min(axis=1).max(), d.min(axis=0).max())
+
+
+def test_polygon_circle_loses_points_within_tolerance():
+    original = circle_polygon()
+    simplified = simplify_outline(original, TOLERANCE)
+
+    assert count_points(simplified)[1] < count_points(original)[1] / 3
+    # כל נקודה זזה לכל היותר tolerance, לכן השטח משתנה לכל היותר היקף × tolerance
+    assert abs(area(simplified) - area(original)) <= 2 * math.pi * 300 * TOLERANCE
+    assert hausdorff(original, simplified) <= TOLERANCE + 0.5
+
+
+def test_smooth_cubic_run_merges_into_fewer_curves():
+    original = circle_cubics()
+    simplified = simplify_outline(original, TOLERANCE)
+
+    curves = sum(1 for op, _ in simplified if op == "curveTo")
+    assert curves < 16
+    assert abs(area(simplified) - area(original)) / area(original) < 0.01
+    assert hausdorff(original, simplified) <= TOLERANCE + 0.5
+
+
+def test_collinear_points_collapse_to_corners():
+    square = polygon([(0, 0), (50, 0), (100, 0), (100, 50), (100, 100), (50, 100.5), (0, 100), (0, 50)])
+    simplified = simplify_outline(square, TOLERANCE)
+
+    assert sorted(pts[0] for op, pts in simplified if op in ("moveTo", "lineTo")) == \
+        [(0, 0), (0, 100), (100, 0), (100, 100)]
+    assert area(simplified) == 100 * 100
+
+
+def test_sharp_corners_are_kept():
+    triangle = polygon([(0, 0), (200, 0), (100, 20)])
+    simplified = simplify_outline(triangle, TOLERANCE)
+    assert count_points(simplified)[1] == count_points(triangle)[1]
+    assert area(simplified) == area(triangle)
+
+
+def test_small_specks_are_dropped_and_zero_tolerance_is_a_noop():
+    speck = polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+    outline = speck + circle_polygon()
+    assert sum(1 for op, _ in simplify_outline(outline, TOLERANCE) if op == "moveTo") == 1
+    assert simplify_outline(outline, 0) is outline
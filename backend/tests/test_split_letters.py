@@ -0,0 +1,38 @@
+import itertools
+
+import pytest
+
+from split_letters import _merge_close_boxes
+
+
+def as_set(boxes):
+    return sorted(boxes)
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(range(3))))
+def test_chain_of_close_parts_merges_in_one_pass_regardless_of_order(order):
+    # A–B ו-B–C במרחק 5, אבל C רחוקה 30 מ-A: רק מדידה מול התיבה הגדלה מאחדת את שלושתן
+    parts = [(0, 0, 20, 50), (25, 2, 20, 50), (50, 0, 20, 52)]
+    merged = _merge_close_boxes([parts[i] for i in order], min_dist=10)
+    assert merged == [(0, 0, 70, 52)]
+
+
+def test_far_boxes_and_other_rows_stay_apart():
+    boxes = [(0, 0, 20, 50), (25, 0, 20, 50), (100, 0, 20, 50), (0, 100, 20, 50)]
+    assert as_set(_merge_close_boxes(boxes, min_dist=10)) == [(0, 0, 45, 50), (0, 100, 20, 50), (100, 0, 20, 50)]
+
+
+def test_height_is_compared_pairwise_with_the_seed_box():
+    # הנקודה הנמוכה קרובה, אבל נמוכה ב-40 מתיבת הפתיחה – היא לא חלק מהאות
+    boxes = [(0, 0, 20, 50), (25, 0, 20, 50), (50, 40, 8, 10)]
+    assert as_set(_merge_close_boxes(boxes, min_dist=10)) == [(0, 0, 45, 50), (50, 40, 8, 10)]
+
+    # 60 ו-40 כל אחד בטווח 15 מ-50 (תיבת הפתיחה), אף שהקבוצה כבר בגובה 60
+    boxes = [(0, 0, 20, 50), (25, 0, 20, 60), (50, 0, 20, 40)]
+    assert _merge_close_boxes(boxes, min_dist=10) == [(0, 0, 70, 60)]
+
+
+def test_merging_is_a_fixpoint():
+    boxes = [(0, 0, 20, 50), (25, 2, 20, 50), (50, 0, 20, 52), (200, 0, 20, 50)]
+    once = _merge_close_boxes(boxes, min_dist=10)
+    assert _merge_close_boxes(once, min_dist=10) == once
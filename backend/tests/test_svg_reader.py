@@ -0,0 +1,98 @@
+import io
+import math
+
+import pytest
+
+from svg_reader import parse_transform, read_svg_outline, read_svg_folder, glyph_name_from_filename
+
+
+def svg(body, view_box="0 0 100 100"):
+    return io.BytesIO(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{view_box}">{body}</svg>'.encode())
+
+
+def points(outline):
+    return [tuple(round(v, 6) for v in p) for _, pts in outline for p in pts]
+
+
+def to_svg_pixels(p):
+    """יחידות potrace (10 לפיקסל, Y כלפי מעלה) → פיקסלי ה-viewBox של 100×100."""
+    return (p[0] / 10.0, 100 - p[1] / 10.0)
+
+
+@pytest.mark.parametrize("text, point, expected", [
+    ("translate(10, 20)", (1, 1), (11, 21)),
+    ("scale(2)", (1, 3), (2, 6)),
+    ("scale(2, 3)", (1, 1), (2, 3)),
+    # רשימת פעולות מופעלת מימין לשמאל על הנקודה: קודם scale, אחר כך translate
+    ("translate(10,20) scale(2)", (1, 1), (12, 22)),
+    ("scale(2) translate(10,20)", (1, 1), (22, 42)),
+    ("matrix(1 0 0 1 5 5) rotate(90)", (1, 0), (5, 6)),
+    ("rotate(90, 10, 10)", (10, 0), (20, 10)),
+    ("matrix(2,0,0,2,0,0)translate(-1e1,.5)", (0, 0), (-20, 1)),
+    ("", (3, 4), (3, 4)),
+])
+def test_parse_transform(text, point, expected):
+    x, y = parse_transform(text).transformPoint(point)
+    assert (round(x, 9), round(y, 9)) == expected
+
+
+def test_nested_group_transforms_compose_outer_to_inner():
+    outline, paths = read_svg_outline(svg(
+        '<g transform="translate(10,0)"><g transform="scale(2)">'
+        '<path d="M1 1 L2 1 L2 2 Z"/></g>'
+        '<path transform="matrix(1,0,0,1,0,50)" d="M0 0 L1 0 L1 1 Z"/></g>'))
+    assert paths == 2
+    # parse_path של fontTools סוגר כל Z גם ב-lineTo חזרה לנקודת ההתחלה
+    assert [to_svg_pixels(p) for p in points(outline)] == [
+        (12, 2), (14, 2), (14, 4), (12, 2),
+        (10, 50), (11, 50), (11, 51), (10, 50),
+    ]
+
+
+def test_view_box_origin_is_removed():
+    outline, _ = read_svg_outline(svg('<path d="M10 20 L11 20 L11 21 Z"/>', view_box="10 20 100 100"))
+    assert [to_svg_pixels(p) for p in points(outline)][0] == (0, 0)
+
+
+def test_relative_commands():
+    absolute, _ = read_svg_outline(svg('<path d="M1 1 L3 1 L3 3 H1 V1 Z"/>'))
+    relative, _ = read_svg_outline(svg('<path d="m1 1 l2 0 l0 2 h-2 v-2 z"/>'))
+    assert points(relative) == points(absolute)
+    assert [op for op, _ in relative] == ["moveTo", "lineTo", "lineTo", "lineTo", "lineTo", "closePath"]
+
+
+def test_relative_curves_continue_from_the_current_point():
+    absolute, _ = read_svg_outline(svg('<path d="M10 10 C10 20 20 20 20 10 S30 0 30 10 Z"/>'))
+    relative, _ = read_svg_outline(svg('<path d="M10 10 c0 10 10 10 10 0 s10 -10 10 0 z"/>'))
+    assert points(relative) == points(absolute)
+
+
+@pytest.mark.parametrize("d", ["M0 50 A10 10 0 0 1 20 50", "M0 50 a10 10 0 0 1 20 0"])
+def test_arcs_become_cubics_on_the_circle(d):
+    outline, _ = read_svg_outline(svg(f'<path d="{d}"/>'))
+    curves = [pts for op, pts in outline if op == "curveTo"]
+    assert curves
+    assert to_svg_pixels(curves[-1][-1]) == pytest.approx((20, 50))
+    # נקודות הקצה של כל העקומות על חצי המעגל סביב (10, 50), מעל הקוטר (sweep=1)
+    for pts in curves:
+        x, y = to_svg_pixels(pts[-1])
+        assert math.hypot(x - 10, y - 50) == pytest.approx(10)
+        assert y <= 50 + 1e-9
+
+
+def test_folder_reports_bad_files_without_stopping(tmp_path):
+    (tmp_path / "01_alef.svg").write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10"><path d="M0 0 L1 0 L1 1 Z"/></svg>')
+    (tmp_path / "02_bet.svg").write_text("<svg")
+    (tmp_path / "notes.txt").write_text("x")
+
+    results = {name: (paths, error) for _, name, _, paths, error in read_svg_folder(str(tmp_path))}
+    assert results["alef"] == (1, None)
+    assert results["bet"][0] == 0 and results["bet"][1]
+    assert len(results) == 2
+
+
+def test_glyph_name_from_filename():
+    assert glyph_name_from_filename("03_gimel.svg") == "gimel"
+    assert glyph_name_from_filename("gimel.svg") == "gimel"
+    assert glyph_name_from_filename("05_final_kaf.svg") == "final_kaf"
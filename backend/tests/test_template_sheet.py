@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+import pytest
+
+from glyph_sets import glyph_set
+from template_sheet import RegistrationError, draw_template, extract_slots, register_sheet, template_layout
+
+DPI = 100
+GLYPHS = glyph_set("hebrew")
+INKED = (0, 7, 26)
+
+
+def filled_sheet(layout):
+    """התבנית עם עיגול דיו במרכז המשבצות שב-INKED בלבד."""
+    page = draw_template(GLYPHS, DPI)
+    for i in INKED:
+        x, y, side = (int(v) for v in layout.slots[i])
+        cv2.circle(page, (x + side // 2, y + side // 2), side // 4, 0, -1)
+    return page
+
+
+def photograph(page, angle, scale):
+    """'צילום' של הדף: סיבוב והגדלה בתוך קנבס גדול יותר, עם רקע אפור."""
+    h, w = page.shape
+    out_w, out_h = int(w * scale * 1.3), int(h * scale * 1.3)
+    matrix = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, scale)
+    matrix[:, 2] += (out_w - w) / 2.0, (out_h - h) / 2.0
+    photo = cv2.warpAffine(page, matrix, (out_w, out_h), flags=cv2.INTER_LINEAR,
+                           borderMode=cv2.BORDER_CONSTANT, borderValue=200)
+    return photo, np.vstack([matrix, [0, 0, 1]])
+
+
+@pytest.mark.parametrize("angle, scale", [(0, 1.0), (7, 1.6), (-12, 0.9)])
+def test_round_trip_recovers_the_slots(angle, scale):
+    layout = template_layout(len(GLYPHS), DPI)
+    photo, truth = photograph(filled_sheet(layout), angle, scale)
+
+    homography = register_sheet(photo, layout)
+    corners = np.concatenate(list(layout.markers.values()))
+    found = cv2.perspectiveTransform(corners[None], homography)[0]
+    expected = cv2.perspectiveTransform(corners[None], truth)[0]
+    assert np.abs(found - expected).max() < 1.5
+
+    slots, boxes = extract_slots(photo, homography, layout, size=48)
+    assert slots.shape == (len(GLYPHS), 48, 48)
+    assert len(boxes) == len(GLYPHS)
+    inked = [i for i, slot in enumerate(slots) if (slot < 128).mean() > 0.05]
+    assert inked == list(INKED)
+
+
+def test_slot_border_is_cut_away():
+    layout = template_layout(len(GLYPHS), DPI)
+    page = draw_template(GLYPHS, DPI)
+    slots, _ = extract_slots(page, np.eye(3), layout, size=32)
+    assert slots.min() > 200   # בלי דיו, והמסגרת האפורה לא נכנסת לחיתוך
+
+
+def test_blank_image_cannot_be_registered():
+    layout = template_layout(len(GLYPHS), DPI)
+    with pytest.raises(RegistrationError):
+        register_sheet(np.full((1200, 900), 255, np.uint8), layout)
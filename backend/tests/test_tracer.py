@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.recordingPen import replayRecording
+
+from tracer import trace_bitmap, POTRACE_UNITS
+
+
+def outline_area(outline):
+    """שטח קווי המתאר בפיקסלים² (חורים נגד הכיוון, כך שהם מופחתים)."""
+    pen = AreaPen()
+    replayRecording(outline, pen)
+    return abs(pen.value) / POTRACE_UNITS ** 2
+
+
+def blank(h, w):
+    return np.full((h, w), 255, np.uint8)
+
+
+def test_square_keeps_its_pixel_edges():
+    img = blank(40, 40)
+    img[10:20, 10:20] = 0
+    outline = trace_bitmap(img)
+    assert outline_area(outline) == 100
+    xs = [x for _, pts in outline for x, _ in pts]
+    ys = [y for _, pts in outline for _, y in pts]
+    assert (min(xs), max(xs)) == (10 * POTRACE_UNITS, 20 * POTRACE_UNITS)
+    assert (min(ys), max(ys)) == (20 * POTRACE_UNITS, 30 * POTRACE_UNITS)
+
+
+def test_ring_area_matches_ink():
+    img = blank(60, 60)
+    cv2.circle(img, (30, 30), 18, 0, -1)
+    cv2.circle(img, (30, 30), 12, 255, -1)
+    ink = int((img < 128).sum())
+    assert abs(outline_area(trace_bitmap(img)) - ink) < 0.03 * ink
+
+
+def test_one_pixel_stroke_survives():
+    img = blank(20, 40)
+    img[10, 5:35] = 0
+    assert outline_area(trace_bitmap(img)) == 30
+
+
+def test_scale_maps_back_to_source_units():
+    img = blank(20, 20)
+    img[5:10, 5:10] = 0
+    assert outline_area(trace_bitmap(img, scale=0.5)) == 100
+
+
+def test_colour_and_alpha_bitmaps_trace_like_gray():
+    img = blank(40, 40)
+    img[10:20, 10:20] = 0
+    expected = trace_bitmap(img)
+    assert trace_bitmap(cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)) == expected
+    assert trace_bitmap(cv2.cvtColor(img, cv2.COLOR_GRAY2BGRA)) == expected
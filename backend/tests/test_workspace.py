@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import pytest
+
+from glyph_cache import GlyphCache
+from workspace import Workspace, QuotaExceeded
+
+
+def make_workspace(tmp_path):
+    return Workspace(str(tmp_path), "abc123", GlyphCache())
+
+
+def test_save_survives_workspace_removed_by_another_worker(tmp_path):
+    ws = make_workspace(tmp_path)
+    shutil.rmtree(ws.root)
+
+    ws.save_glyph("alef", b"png")
+    ws.save_upload("proc_sheet.png", b"png")
+    assert ws.snapshot_sources(["alef"]) == {"alef": b"png"}
+    assert ws.upload_path("proc_sheet.png") is not None
+
+
+def test_upload_path_stays_inside_the_workspace(tmp_path):
+    ws = make_workspace(tmp_path)
+    ws.save_glyph("alef", b"png")
+    assert ws.upload_path("../glyphs/alef.png") is None
+    assert ws.upload_path("missing.png") is None
+
+
+def test_quota_is_checked_before_writing(tmp_path):
+    ws = make_workspace(tmp_path)
+    with pytest.raises(QuotaExceeded):
+        ws.save_upload("big.png", b"x" * 100, quota_bytes=10)
+    assert ws.upload_path("big.png") is None
+
+
+def test_sheet_preview_respects_quota_and_missing_root(tmp_path):
+    ws = make_workspace(tmp_path)
+    shutil.rmtree(ws.root)
+    ws.save_sheet_preview(b"jpeg")
+    with open(ws.sheet_preview_path, "rb") as fh:
+        assert fh.read() == b"jpeg"
+    with pytest.raises(QuotaExceeded):
+        ws.save_sheet_preview(b"x" * 100, quota_bytes=10)
+
+
+def test_final_font_is_stored_after_workspace_removed_mid_build(tmp_path):
+    ws = make_workspace(tmp_path)
+    shutil.rmtree(ws.root)
+    ws._store_final("ab" * 32, b"ttf")
+    ws._store_final("cd" * 32, b"ttf2")
+    assert sorted(os.listdir(ws.root)) == [f"final-{'cd' * 16}.ttf"]
@@ -0,0 +1,189 @@
+import cv2
+import numpy as np
+
+# ===== יחידות פלט =====
+# הקואורדינטות זהות לקואורדינטות הגולמיות ש-potrace כותב ל-SVG:
+# 10 יחידות לפיקסל, ציר Y כלפי מעלה ונקודת האפס בפינה השמאלית-תחתונה.
+# כך generate_ttf מקבל את אותה גאומטריה בדיוק משני המנועים.
+POTRACE_UNITS = 10
+
+# ===== ברירות מחדל למעקב =====
+DEFAULT_THRESHOLD = 128   # כמו blacklevel=0.5 של potrace
+DEFAULT_TURDSIZE = 2      # כתמים בשטח קטן מזה (בפיקסלים) נזרקים
+DEFAULT_TOLERANCE = 0.8   # סטייה מקסימלית בפישוט הפוליגון (בפיקסלים)
+DEFAULT_CORNER_ANGLE = 60.0  # זווית פנייה (במעלות) שמעליה קודקוד נחשב פינה
+
+
+def _ink_mask(bitmap, threshold):
+    bitmap = np.asarray(bitmap)
+    if bitmap.ndim == 3:
+        bitmap = cv2.cvtColor(bitmap, cv2.COLOR_BGRA2GRAY if bitmap.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    if bitmap.dtype == bool:
+        return bitmap.astype(np.uint8)
+    return (bitmap < threshold).astype(np.uint8)
+
+
+def _edge_lattice(mask):
+    """
+    מסכה על רשת הפינות והצלעות של הפיקסלים: פיקסל (i, j) הוא אינדקס (2i+1, 2j+1),
+    והוא מכסה את האינדקסים 2i..2i+2 – כולל הצלעות והפינות שלו.
+    הקו שעובר במרכזי הפיקסלים של המסכה הזאת הוא בדיוק הגבול של הדיו המקורי
+    (כמו ב-potrace, שעוקב אחרי צלעות הפיקסלים ולא אחרי המרכזים שלהם), בקואורדינטות כפולות.
+    """
+    lattice = np.zeros((2 * mask.shape[0] + 1, 2 * mask.shape[1] + 1), np.uint8)
+    lattice[1::2, 1::2] = mask
+    return cv2.dilate(lattice, np.ones((3, 3), np.uint8))
+
+
+def _signed_area(pts):
+    x, y = pts[:, 0], pts[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _corner_flags(pts, corner_angle):
+    incoming = pts - np.roll(pts, 1, axis=0)
+    outgoing = np.roll(pts, -1, axis=0) - pts
+    dot = np.einsum("ij,ij->i", incoming, outgoing)
+    cross = incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0]
+    turn = np.degrees(np.abs(np.arctan2(cross, dot)))
+    return turn > corner_angle
+
+
+def _polygon_to_recording(pts, corners, smooth):
+    """
+    הופך פוליגון סגור לרצף פקודות עט.
+    קודקוד "חלק" הופך לעקומה ריבועית (מוגבהת לקובית) בין אמצעי הצלעות,
+    קודקוד פינה נשאר קו ישר.
+    """
+    n = len(pts)
+    pts = [(round(float(x), 2), round(float(y), 2)) for x, y in pts]
+
+    def mid(a, b):
+        return ((a[0] + b[0]) / 2.0, (a[1] + b[1]) / 2.0)
+
+    if not smooth:
+        value = [("moveTo", (pts[0],))]
+        value.extend(("lineTo", (p,)) for p in pts[1:])
+        value.append(("closePath", ()))
+        return value
+
+    corner_idx = np.flatnonzero(corners)
+    if len(corner_idx):
+        start = int(corner_idx[0])
+        value = [("moveTo", (pts[start],))]
+        order = [(start + k) % n for k in range(1, n)]
+    else:
+        value = [("moveTo", (mid(pts[-1], pts[0]),))]
+        order = list(range(n))
+
+    for i in order:
+        prev_i = (i - 1) % n
+        if corners[i]:
+            value.append(("lineTo", (pts[i],)))
+            continue
+        p0 = mid(pts[prev_i], pts[i])
+        if corners[prev_i]:
+            value.append(("lineTo", (p0,)))
+        p1 = mid(pts[i], pts[(i + 1) % n])
+        c = pts[i]
+        c1 = (p0[0] + 2.0 / 3.0 * (c[0] - p0[0]), p0[1] + 2.0 / 3.0 * (c[1] - p0[1]))
+        c2 = (p1[0] + 2.0 / 3.0 * (c[0] - p1[0]), p1[1] + 2.0 / 3.0 * (c[1] - p1[1]))
+        value.append(("curveTo", (c1, c2, p1)))
+
+    value.append(("closePath", ()))
+    return value
+
+
+def trace_bitmap(bitmap, threshold=DEFAULT_THRESHOLD, turdsize=DEFAULT_TURDSIZE,
+                 tolerance=DEFAULT_TOLERANCE, corner_angle=DEFAULT_CORNER_ANGLE,
+                 smooth=True, scale=1.0):
+    """
+    מעקב וקטורי בתוך התהליך: מקבל מערך NumPy (אפור/בינארי, דיו כהה על רקע לבן)
+    ומחזיר את קווי המתאר כרשימת פקודות עט (בפורמט RecordingPen),
+    ביחידות של potrace.
+
+    scale – היחס בין הרזולוציה של המערך לרזולוציה המקורית של האות
+    (למשל 0.5 אם האות הוקטנה לפני המעקב); הפלט מוחזר ביחידות של המקור.
+    """
+    mask = _ink_mask(bitmap, threshold)
+    height = mask.shape[0]
+    unit = POTRACE_UNITS / float(scale)
+
+    # מעקב על צלעות הפיקסלים: ברשת הכפולה כל אינדקס הוא חצי פיקסל, ושטח הוא פי 4
+    contours, hierarchy = cv2.findContours(_edge_lattice(mask), cv2.RETR_CCOMP, cv2.CHAIN_APPROX_NONE)
+    if hierarchy is None:
+        return []
+
+    outline = []
+    for contour, (_, _, _, parent) in zip(contours, hierarchy[0]):
+        if len(contour) < 3 or cv2.contourArea(contour) < 4 * turdsize:
+            continue
+        poly = cv2.approxPolyDP(contour, 2 * tolerance, True).reshape(-1, 2).astype(np.float64)
+        if len(poly) < 3:
+            continue
+
+        # חצי אינדקס = פיקסל, היפוך ציר Y והמרה ליחידות potrace
+        poly[:, 0] = poly[:, 0] / 2.0 * unit
+        poly[:, 1] = (height - poly[:, 1] / 2.0) * unit
+
+        # קו מתאר חיצוני נגד כיוון השעון, חור עם כיוון השעון (מוסכמת UFO)
+        is_hole = parent != -1
+        if (_signed_area(poly) > 0) == is_hole:
+            poly = poly[::-1]
+
+        corners = _corner_flags(poly, corner_angle)
+        outline.extend(_polygon_to_recording(poly, corners, smooth))
+
+    return outline
+
+
+def _fmt(v):
+    return f"{v:.2f}".rstrip("0").rstrip(".")
+
+
+def outline_to_svg_path(outline):
+    """ממיר קווי מתאר למחרוזת d של SVG (פקודות מוחלטות)."""
+    parts = []
+    for op, pts in outline:
+        coords = " ".join(f"{_fmt(x)} {_fmt(y)}" for x, y in pts)
+        if op == "moveTo":
+            parts.append(f"M{coords}")
+        elif op == "lineTo":
+            parts.append(f"L{coords}")
+        elif op == "curveTo":
+            parts.append(f"C{coords}")
+        elif op == "qCurveTo":
+            parts.append(f"Q{coords}")
+        elif op in ("closePath", "endPath"):
+            parts.append("z")
+    return "".join(parts)
+
+
+def write_potrace_svg(outline, width, height, output_path):
+    """
+    כותב קובץ SVG במבנה של potrace: אותו viewBox ואותה טרנספורמציה על <g>,
+    כדי שאפשר יהיה להשוות את הפלט של המנוע הפנימי ל-potrace אחד לאחד.
+    """
+    d = outline_to_svg_path(outline)
+    inv = 1.0 / POTRACE_UNITS
+    svg = (
+        '<?xml version="1.0" standalone="no"?>\n'
+        f'<svg version="1.0" xmlns="http://www.w3.org/2000/svg" '
+        f'width="{width}pt" height="{height}pt" viewBox="0 0 {width} {height}" '
+        'preserveAspectRatio="xMidYMid meet">\n'
+        f'<g transform="translate(0.000000,{height:.6f}) scale({inv:.6f},{-inv:.6f})" '
+        'fill="#000000" stroke="none">\n'
+        f'<path d="{d}"/>\n'
+        '</g>\n'
+        '</svg>\n'
+    )
+    with open(output_path, "w", encoding="utf-8") as fh:
+        fh.write(svg)
+    return output_path
+
+
+def count_points(outline):
+    """מחזיר (מספר קווי מתאר, מספר נקודות) ברשימת פקודות עט."""
+    contours = sum(1 for op, _ in outline if op == "moveTo")
+    points = sum(len(pts) for _, pts in outline)
+    return contours, points
@@ -0,0 +1,291 @@
+import os
+import time
+import uuid
+import hashlib
+import shutil
+import threading
+from io import BytesIO
+
+from glyph_cache import IncrementalFontBuilder, FontCache
+
+
+class QuotaExceeded(Exception):
+    """סביבת העבודה חרגה ממכסת הדיסק שלה."""
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for fname in files:
+            try:
+                total += os.path.getsize(os.path.join(root, fname))
+            except OSError:
+                pass
+    return total
+
+
+class Workspace:
+    """
+    סביבת עבודה של משתמש/עבודה אחת: תיקיית אותיות, קבצי דיבאג ופונט פלט משלה,
+    כך שמשתמשים במקביל לא דורסים זה את זה.
+    """
+
+    def __init__(self, root, workspace_id, cache, font_cache=None):
+        self.id = workspace_id
+        self.root = os.path.join(root, workspace_id)
+        self.glyphs_dir = os.path.join(self.root, "glyphs")
+        self.uploads_dir = os.path.join(self.root, "uploads")
+        self.bw_dir = os.path.join(self.root, "bw")
+        self.svg_dir = os.path.join(self.root, "svg")
+        self.builder = IncrementalFontBuilder(cache)
+        self.font_cache = font_cache or FontCache()
+        self.sources = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.glyphs_dir, exist_ok=True)
+        self.touch()
+
+    @property
+    def debug_dirs(self):
+        return (self.bw_dir, self.svg_dir)
+
+    def touch(self):
+        self.last_used = time.time()
+        try:
+            os.utime(self.root, None)
+        except OSError:
+            pass
+
+    def disk_usage(self):
+        return _dir_size(self.root)
+
+    def check_quota(self, size, quota_bytes=None):
+        if quota_bytes and self.disk_usage() + size > quota_bytes:
+            raise QuotaExceeded(f"Workspace {self.id} is over its disk quota")
+
+    def save_upload(self, filename, data, quota_bytes=None):
+        """תמונה שהועלתה (אחרי נרמול) – נשמרת בסביבה ומוגשת רק ל-session שלה."""
+        self.check_quota(len(data), quota_bytes)
+        # ייתכן שה-GC בתהליך אחר מחק את הסביבה מאז שנוצר האובייקט הזה
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        with open(os.path.join(self.uploads_dir, filename), "wb") as fh:
+            fh.write(data)
+        self.touch()
+
+    def save_sheet_preview(self, data, quota_bytes=None):
+        """תצוגת הגיליון האחרון (JPEG) – קובץ אחד בשורש הסביבה, בתוך המכסה."""
+        self.check_quota(len(data), quota_bytes)
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.sheet_preview_path, "wb") as fh:
+            fh.write(data)
+        self.touch()
+
+    @property
+    def sheet_preview_path(self):
+        return os.path.join(self.root, "sheet_preview.jpg")
+
+    def upload_path(self, filename):
+        """הנתיב של תמונה שהועלתה, או None אם אין כזו בסביבה."""
+        path = os.path.join(self.uploads_dir, os.path.basename(filename))
+        return path if os.path.isfile(path) else None
+
+    def save_glyph(self, name, data, quota_bytes=None):
+        self.check_quota(len(data), quota_bytes)
+        os.makedirs(self.glyphs_dir, exist_ok=True)
+        with open(os.path.join(self.glyphs_dir, f"{name}.png"), "wb") as fh:
+            fh.write(data)
+        with self.lock:
+            self.sources[name] = data
+        self.touch()
+
+    def snapshot_sources(self, names):
+        from glyph_pipeline import load_sources
+
+        with self.lock:
+            self.sources = load_sources(self.glyphs_dir, names, self.sources)
+            return dict(self.sources)
+
+    @staticmethod
+    def _digest(sources):
+        h = hashlib.sha256()
+        for name in sorted(sources):
+            h.update(name.encode("utf-8"))
+            h.update(hashlib.sha256(sources[name]).digest())
+        return h.hexdigest()
+
+    def glyph_set_digest(self, names):
+        """hash של קבוצת האותיות השמורות – משתנה בכל פעם שאות נשמרת או מוחלפת."""
+        return self._digest(self.snapshot_sources(names))
+
+    def build(self, names, profile="final", flavor=None, **options):
+        """
+        מחזיר (etag, bytes) של הפונט בפרופיל ובפורמט המבוקשים, בזיכרון בלבד.
+        פונט שכבר נבנה עבור אותה קבוצת אותיות מוגש מהמטמון בלי בנייה;
+        WOFF2 נגזר מה-TTF/OTF השמור בלי לקמפל מחדש.
+        """
+        from fontTools.ttLib import TTFont
+        from generate_font import font_to_bytes
+
+        self.touch()
+        sources = self.snapshot_sources(names)
+        digest = self._digest(sources)
+        etag = f"{digest[:32]}-{profile}-{flavor or 'sfnt'}"
+
+        data = self.font_cache.get(etag)
+        if data is None and flavor:
+            sfnt = self.font_cache.get(f"{digest[:32]}-{profile}-sfnt")
+            if sfnt is not None:
+                data = font_to_bytes(TTFont(BytesIO(sfnt)), flavor)
+        if data is None:
+            data, _ = self.builder.build(sources, profile=profile, flavor=flavor, **options)
+        if not data:
+            raise RuntimeError("❌ הפונט לא נוצר.")
+
+        self.font_cache.put(etag, data)
+        # רק בנייה מלאה הופכת את הפונט ל"מוכן להורדה" (has_final); preview ותצוגה חיה לא נשמרות
+        if profile == "final" and not flavor:
+            self._store_final(digest, data)
+        return etag, data
+
+    def _final_path(self, digest):
+        return os.path.join(self.root, f"final-{digest[:32]}.ttf")
+
+    def _store_final(self, digest, data):
+        """
+        הפונט הסופי נשמר גם בתיקיית הסביבה (רק הגרסה האחרונה), כך שההורדה מוגשת ממנו
+        גם מתהליך שרת אחר וגם אחרי הפעלה מחדש, בלי לבנות שוב.
+        """
+        path = self._final_path(digest)
+        # ה-GC (בכל תהליך) יכול למחוק את הסביבה בזמן שהבנייה רצה בתור
+        os.makedirs(self.root, exist_ok=True)
+        for fname in os.listdir(self.root):
+            if fname.startswith("final-") and fname != os.path.basename(path):
+                os.remove(os.path.join(self.root, fname))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+
+    def has_final(self, names):
+        """האם כבר נבנה פונט final לקבוצת האותיות השמורה כרגע."""
+        return os.path.exists(self._final_path(self.glyph_set_digest(names)))
+
+    def final_font(self, names, flavor=None):
+        """
+        (etag, bytes) של הפונט הסופי שכבר נבנה לקבוצת האותיות הנוכחית, בלי לבנות;
+        None אם עוד לא נבנה (או שנשמרו אותיות מאז). WOFF2 נגזר מה-TTF השמור.
+        """
+        from fontTools.ttLib import TTFont
+        from generate_font import font_to_bytes
+
+        digest = self.glyph_set_digest(names)
+        etag = f"{digest[:32]}-final-{flavor or 'sfnt'}"
+        data = self.font_cache.get(etag)
+        if data is not None:
+            return etag, data
+
+        sfnt = self.font_cache.get(f"{digest[:32]}-final-sfnt")
+        if sfnt is None:
+            try:
+                with open(self._final_path(digest), "rb") as fh:
+                    sfnt = fh.read()
+            except OSError:
+                return None
+        data = font_to_bytes(TTFont(BytesIO(sfnt)), flavor) if flavor else sfnt
+        self.font_cache.put(etag, data)
+        return etag, data
+
+    def preview(self, names, flavor="woff2"):
+        """
+        webfont לתצוגה חיה בדפדפן: בניית preview מצומצמת לאותיות שנשמרו עד עכשיו.
+        כל אות חדשה עוברת מעקב כבר בשמירה, כך שכאן נשאר רק קימפול מהמטמון.
+        """
+        from fontTools.ttLib import TTFont
+        from generate_font import font_to_bytes, subset_font
+
+        self.touch()
+        sources = self.snapshot_sources(names)
+        if not sources:
+            raise RuntimeError("❌ עדיין לא נשמרו אותיות.")
+        digest = self._digest(sources)
+        etag = f"{digest[:32]}-subset-{flavor or 'sfnt'}"
+
+        data = self.font_cache.get(etag)
+        if data is None:
+            _, sfnt = self.build(names, profile="preview")
+            data = font_to_bytes(subset_font(TTFont(BytesIO(sfnt)), sources), flavor)
+            self.font_cache.put(etag, data)
+        return etag, data
+
+
+class WorkspaceManager:
+    """
+    מנהל את סביבות העבודה: יצירה לפי מזהה, איסוף זבל לפי TTL,
+    ומכסת דיסק כוללת שמפנה קודם את הסביבות הישנות ביותר.
+    """
+
+    def __init__(self, root, cache, font_cache=None, ttl_seconds=6 * 3600, quota_bytes=50 * 1024 * 1024,
+                 total_quota_bytes=2 * 1024 * 1024 * 1024, gc_interval=300):
+        self.root = root
+        self.cache = cache
+        self.font_cache = font_cache or FontCache()
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.total_quota_bytes = total_quota_bytes
+        self.gc_interval = gc_interval
+        self._workspaces = {}
+        self._lock = threading.Lock()
+        self._last_gc = 0
+        os.makedirs(root, exist_ok=True)
+
+    def new_id(self):
+        return uuid.uuid4().hex
+
+    def get(self, workspace_id):
+        if not workspace_id or not workspace_id.isalnum():
+            raise ValueError(f"Invalid workspace id: {workspace_id!r}")
+        self.maybe_collect_garbage()
+        with self._lock:
+            ws = self._workspaces.get(workspace_id)
+            if ws is None:
+                ws = Workspace(self.root, workspace_id, self.cache, self.font_cache)
+                self._workspaces[workspace_id] = ws
+        ws.touch()
+        return ws
+
+    def maybe_collect_garbage(self):
+        if time.time() - self._last_gc >= self.gc_interval:
+            self.collect_garbage()
+
+    def _remove(self, workspace_id):
+        with self._lock:
+            self._workspaces.pop(workspace_id, None)
+        shutil.rmtree(os.path.join(self.root, workspace_id), ignore_errors=True)
+
+    def collect_garbage(self):
+        """
+        מוחק סביבות שלא נגעו בהן יותר מ-TTL, ואם עדיין חורגים מהמכסה הכוללת –
+        מוחק את הישנות ביותר עד שחוזרים למכסה. מחזיר את מספר הסביבות שנמחקו.
+        """
+        self._last_gc = time.time()
+        entries = []
+        for workspace_id in os.listdir(self.root):
+            path = os.path.join(self.root, workspace_id)
+            if os.path.isdir(path):
+                entries.append((os.path.getmtime(path), workspace_id, _dir_size(path)))
+        entries.sort()
+
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        total = sum(size for _, _, size in entries)
+        for mtime, workspace_id, size in entries:
+            if mtime < cutoff or total > self.total_quota_bytes:
+                self._remove(workspace_id)
+                total -= size
+                removed += 1
+
+        if removed:
+            print(f"🧹 נמחקו {removed} סביבות עבודה ישנות")
+        evicted = self.cache.collect_garbage()
+        if evicted:
+            print(f"🧹 נמחקו {evicted} רשומות ישנות ממטמון האותיות")
+        return removed
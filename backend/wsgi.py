@@ -0,0 +1,7 @@
+"""
+נקודת הכניסה של WSGI לפרודקשן:
+    gunicorn -c backend/gunicorn.conf.py wsgi:app
+"""
+from server import app
+
+__all__ = ["app"]